@@ -3,6 +3,18 @@ ASGI config for locator_project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Running under ASGI, set LOCATOR_ASYNC_VIEWS=1 so the hierarchy and node pages,
+the node/batch/sync API endpoints and /media/ are served by the async views in
+locator.async_views, e.g.:
+
+    LOCATOR_ASYNC_VIEWS=1 uvicorn config.asgi:application --workers 4
+
+One worker process serves many slow clients (tablets on the plant Wi-Fi, photo
+downloads) concurrently; sync views still work and run in a thread pool. The
+locator middleware is async-capable, so async views run without a thread hop.
+With PostgreSQL, use DB_CONN_MAX_AGE=0 or DB_POOL=1 (see settings.py):
+persistent connections are not reused reliably under ASGI.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
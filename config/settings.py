@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 
@@ -32,10 +33,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'locator.middleware.QueryInspectorMiddleware',
+    'locator.routers.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'locator.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -53,6 +57,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'locator.context_processors.fragment_cache',
             ],
         },
     },
@@ -71,12 +76,63 @@ WSGI_APPLICATION = 'config.wsgi.application'
 #     }
 # }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite unless DB_ENGINE=postgresql. DB_POOL=1 borrows connections from an
+# in-process pool (locator.db.backends.postgresql_pool), which also serves the
+# ASGI path; otherwise connections persist for DB_CONN_MAX_AGE seconds.
+# Set DB_DISABLE_SERVER_SIDE_CURSORS=1 behind PgBouncer in transaction mode.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'sqlite':
+    # DB_SQLITE_TUNED=1: WAL, BEGIN IMMEDIATE and busy retries for concurrent
+    # readers and writers (locator.db.backends.sqlite_tuned).
+    DB_SQLITE_TUNED = os.getenv('DB_SQLITE_TUNED', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'locator.db.backends.sqlite_tuned' if DB_SQLITE_TUNED else 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME') or BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                'timeout': int(os.getenv('DB_SQLITE_TIMEOUT', '20')),
+                'busy_retries': int(os.getenv('DB_SQLITE_BUSY_RETRIES', '3')),
+            } if DB_SQLITE_TUNED else {},
+        }
     }
-}
+elif DB_ENGINE == 'postgresql':
+    DB_POOL = os.getenv('DB_POOL', '0') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'locator.db.backends.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'towerguide'),
+            'USER': os.getenv('DB_USER', 'towerguide'),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # Pooled connections go back to the pool at the end of each request.
+            'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            # Only persistent connections are checked; the pool drops broken ones itself.
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'DISABLE_SERVER_SIDE_CURSORS': os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', '0') == '1',
+            'OPTIONS': {
+                'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5')),
+                **({'pool': {'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+                             'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '20')),
+                             'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10'))}} if DB_POOL else {}),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
+
+# Streaming replicas of the primary, e.g. DB_REPLICA_HOSTS=db-replica-1,db-replica-2.
+# Read-only views read from them (locator.routers); a client that writes is
+# pinned to the primary for LOCATOR_REPLICA_PIN_SECONDS.
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+
+LOCATOR_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+LOCATOR_REPLICA_MAX_LAG = int(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+LOCATOR_REPLICA_CHECK_INTERVAL = 5
+LOCATOR_REPLICA_PIN_SECONDS = 10
+DATABASE_ROUTERS = ['locator.routers.ReplicaRouter'] if LOCATOR_READ_REPLICAS else []
 
 
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -115,6 +171,16 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
+# With DEBUG off collectstatic fingerprints the file names and writes .gz (and,
+# with the brotli package installed, .br) copies of text assets; they are sent
+# by locator.views.serve_static or the front server (nginx gzip_static).
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+                    else 'locator.storage.CompressedManifestStaticFilesStorage'},
+}
+LOCATOR_STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -125,6 +191,85 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = 'home'
 
+# Per-request query count/time headers and N+1 warnings (locator.middleware).
+LOCATOR_QUERY_INSPECTOR = DEBUG
+LOCATOR_N_PLUS_ONE_THRESHOLD = 3
+
+# On-demand profiling of single requests by staff users (X-Profile header or
+# ?_profile=sample|cprofile); results are kept under LOCATOR_PROFILE_DIR.
+# On with DEBUG; elsewhere only with LOCATOR_PROFILING=1.
+LOCATOR_PROFILING = DEBUG or os.getenv('LOCATOR_PROFILING', '0') == '1'
+LOCATOR_PROFILE_DIR = BASE_DIR / 'profiles'
+LOCATOR_PROFILE_KEEP = 100
+LOCATOR_PROFILE_INTERVAL = 0.001
+
+# Conditional GET and full-page caching of the hierarchy and node pages (locator.caching).
+LOCATOR_PAGE_CACHE = True
+
+# {% cache %} fragments for node cards, MCC node grids and substation lists. Their
+# keys include the object versions, so edits never serve stale fragments; they
+# live in the 'template_fragments' cache, sized for a few thousand nodes.
+LOCATOR_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+
+# ASGI mode (config/asgi.py): async hierarchy/node pages, read API endpoints and
+# media streaming (locator.async_views) take over from the sync views.
+LOCATOR_ASYNC_VIEWS = os.getenv('LOCATOR_ASYNC_VIEWS', '0') == '1'
+
+# Uploaded photos are made upright, stripped of EXIF/XMP metadata, fitted within
+# LOCATOR_PHOTO_MAX_SIZE pixels and given their derivatives. With
+# LOCATOR_PHOTO_JOBS=1 that happens in `manage.py photo_worker` (locator.jobs),
+# otherwise on LOCATOR_PHOTO_THREADS background threads of the web worker.
+LOCATOR_PHOTO_JOBS = os.getenv('LOCATOR_PHOTO_JOBS', '0') == '1'
+LOCATOR_PHOTO_THREADS = int(os.getenv('LOCATOR_PHOTO_THREADS', '1'))
+LOCATOR_PHOTO_MAX_SIZE = 2560
+LOCATOR_PHOTO_JOB_ATTEMPTS = 5
+LOCATOR_PHOTO_JOB_RETRY_DELAY = 30
+
+# Photos are served to signed-in users by locator.media; content-hashed names
+# are cached for LOCATOR_MEDIA_MAX_AGE seconds as immutable. Set
+# LOCATOR_MEDIA_SENDFILE to 'x-sendfile' (Apache, lighttpd) or
+# 'x-accel-redirect' (nginx, internal location LOCATOR_MEDIA_ACCEL_PREFIX
+# aliased to MEDIA_ROOT) to let the front server send the files.
+LOCATOR_MEDIA_MAX_AGE = 60 * 60 * 24 * 365
+LOCATOR_MEDIA_SENDFILE = os.getenv('LOCATOR_MEDIA_SENDFILE') or None
+LOCATOR_MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Cache alias used to broadcast invalidations of the in-process caches (plant
+# hierarchy, node search index) between processes, e.g. a shared Redis/Memcached
+# cache when running several workers.
+LOCATOR_SHARED_CACHE = os.getenv('LOCATOR_SHARED_CACHE') or None
+
+REST_FRAMEWORK = {
+    'DEFAULT_VERSIONING_CLASS': 'rest_framework.versioning.URLPathVersioning',
+    'DEFAULT_VERSION': 'v1',
+    'ALLOWED_VERSIONS': ['v1'],
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # Like the node pages' photos and search, the inventory is for signed-in users only.
+    'DEFAULT_PERMISSION_CLASSES': ['rest_framework.permissions.IsAuthenticated'],
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'locator': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
     # Add other authentication backends here if needed
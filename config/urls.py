@@ -14,10 +14,12 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
-from django.conf.urls.static import static
+from django.urls import path, include, re_path
 
+from locator import async_views, views
 from . import settings
 
 urlpatterns = [
@@ -25,6 +27,11 @@ urlpatterns = [
     path('', include('locator.urls')),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+# Uploaded photos, in production too (see locator/media.py).
+serve_media = async_views.serve_media if settings.LOCATOR_ASYNC_VIEWS else views.serve_media
+urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media)]
+
+if not settings.DEBUG:
+    # collectstatic output (see locator/storage.py), unless the front server serves STATIC_ROOT.
+    urlpatterns += [re_path(r'^%s(?P<path>.*)$' % re.escape(settings.STATIC_URL.lstrip('/')), views.serve_static)]
 
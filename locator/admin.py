@@ -1,8 +1,11 @@
 from django.contrib import admin
 from django.utils.safestring import mark_safe
+
+from . import images, jobs
 from .models import (DistributiveSubstation as DS,
                      MotorControlCenter as MCC, 
-                     Node
+                     Node,
+                     PhotoJob
                     )
 
 
@@ -36,5 +39,23 @@ class NodeAdmin(admin.ModelAdmin):
     @admin.display(description="Image", ordering='title')
     def label_photo(self, node: Node):
         if node.label:
-            return mark_safe(f"<img src='{node.label.url}' width=50>")
+            return mark_safe(f"<img src='{images.derivative_url(node.label, 'thumb')}' width=50>")
         return "No image"
+
+
+@admin.register(PhotoJob)
+class PhotoJobAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_after', 'finished_at', 'error')
+    list_filter = ('status',)
+    search_fields = ('name', 'result')
+    readonly_fields = ['name', 'status', 'attempts', 'run_after', 'started_at', 'finished_at', 'result', 'error',
+                       'created_at']
+    ordering = ['-created_at']
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Retry selected jobs')
+    def retry(self, request, queryset):
+        self.message_user(request, f'{jobs.retry(queryset)} jobs queued again.')
@@ -0,0 +1,194 @@
+from django.utils.cache import get_conditional_response, set_response_etag
+from functools import partial
+
+from rest_framework import mixins, routers, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+from . import changes, levels, search
+from .filters import SubstationApiFilter, MCCApiFilter, NodeApiFilter, SummaryApiFilter
+from .models import (DistributiveSubstation as DS,
+                     MotorControlCenter as MCC,
+                     Node,
+                     NodeSummary)
+from .serializers import SubstationSerializer, MCCSerializer, NodeSerializer, NodeSummarySerializer
+
+
+class IdCursorPagination(CursorPagination):
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class LevelPagination(PageNumberPagination):
+    page_size = levels.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class ConditionalGetMixin:
+    """Tag successful reads with a content ETag and answer If-None-Match with 304."""
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in ('GET', 'HEAD') and response.status_code == 200:
+            response.render()
+            set_response_etag(response)
+            return get_conditional_response(request, etag=response['ETag'], response=response)
+        return response
+
+
+class SubstationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = DS.objects.prefetch_related('motor_centers')
+    serializer_class = SubstationSerializer
+    filterset_class = SubstationApiFilter
+    pagination_class = IdCursorPagination
+    read_replica = True
+
+
+class MCCViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = MCC.objects.select_related('substation')
+    serializer_class = MCCSerializer
+    filterset_class = MCCApiFilter
+    pagination_class = IdCursorPagination
+    read_replica = True
+    lookup_field = 'slug'
+
+
+class NodeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Node.objects.select_related('mcc', 'substation')
+    serializer_class = NodeSerializer
+    filterset_class = NodeApiFilter
+    pagination_class = IdCursorPagination
+    read_replica = True
+    lookup_field = 'slug'
+
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request, *args, **kwargs):
+        """Resolve many node numbers at once: ?slugs=1_1,2_6 or POST {"slugs": [...]}"""
+        if request.method == 'POST':
+            slugs = batch_slugs(request.data.get('slugs', []))
+        else:
+            slugs = batch_slugs(request.query_params.get('slugs', ''))
+        return Response(batch_data(search.lookup_batch(slugs)))
+
+
+class SummaryViewSet(ConditionalGetMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Node count, installed power (kW) and speed classes per MCC, substation or level.
+
+    Filter with ?scope=mcc|substation|level and ?key=<MCC id, substation id or level>.
+    """
+    queryset = NodeSummary.objects.order_by('scope', 'key')
+    serializer_class = NodeSummarySerializer
+    filterset_class = SummaryApiFilter
+    read_replica = True
+
+
+class LevelViewSet(ConditionalGetMixin, viewsets.ViewSet):
+    """Nodes on one floor level across all substations, grouped by substation and MCC.
+
+    The list gives each level's summary; a level's nodes are paged with ?page= and ?page_size=.
+    """
+    lookup_field = 'level'
+    lookup_value_regex = '[^/]+'
+    read_replica = True
+
+    def list(self, request, *args, **kwargs):
+        summaries = NodeSummary.objects.filter(scope=NodeSummary.LEVEL).order_by('key')
+        return Response(NodeSummarySerializer(summaries, many=True).data)
+
+    def retrieve(self, request, level=None, *args, **kwargs):
+        summary = levels.summary(level)
+        if not levels.is_known(level, summary):
+            raise NotFound()
+        paginator = LevelPagination()
+        paginator.django_paginator_class = partial(levels.LevelPaginator,
+                                                   node_count=summary.node_count if summary else None)
+        nodes = paginator.paginate_queryset(levels.nodes_on(level), request, view=self)
+        return paginator.get_paginated_response(substations_data(search.group_nodes(nodes)))
+
+
+class SyncViewSet(viewsets.ViewSet):
+    """Delta sync for field devices.
+
+    GET ?since=<token> returns the substations, MCCs and nodes saved after the
+    token and the ids deleted after it, with a new token. Without a token the
+    whole inventory is sent. Repeat with the new token while `more` is true;
+    an interrupted sync resumes from the last token the device applied.
+    Apply substations, MCCs, nodes, then deletions in reverse order.
+    """
+    read_replica = True
+
+    def list(self, request, *args, **kwargs):
+        return Response(sync_data(changes.changes_since(*sync_params(request.query_params))))
+
+
+def batch_slugs(slugs) -> list[str]:
+    """Node numbers from a "1_1, 2_6" string or a list of them."""
+    if isinstance(slugs, str):
+        slugs = search.parse_slugs(slugs)
+    if not isinstance(slugs, list) or not slugs:
+        raise ValidationError({'slugs': 'Provide one or more node numbers.'})
+    slugs = list(dict.fromkeys(str(slug) for slug in slugs))
+    if len(slugs) > search.MAX_BATCH:
+        raise ValidationError({'slugs': f'{len(slugs)} node numbers given; send at most {search.MAX_BATCH} at a time.'})
+    return slugs
+
+
+def batch_data(result: search.BatchResult) -> dict:
+    return {
+        'found': len(result.nodes),
+        'missing': result.missing,
+        'substations': substations_data(result.groups),
+    }
+
+
+def substations_data(groups) -> list:
+    """Nodes grouped by substation and MCC, from search.group_nodes()."""
+    return [{
+        'id': substation.pk,
+        'title': substation.title,
+        'mccs': [{
+            'slug': mcc.slug,
+            'title': mcc.title,
+            'nodes': NodeSerializer(nodes, many=True).data,
+        } for mcc, nodes in mccs],
+    } for substation, mccs in groups]
+
+
+def sync_params(query_params) -> tuple[int, int]:
+    """(since, limit) of a sync request."""
+    try:
+        since = int(query_params.get('since') or 0)
+    except ValueError:
+        since = -1
+    if since < 0:
+        raise ValidationError({'since': 'Expected a sync token from a previous response.'})
+    try:
+        limit = int(query_params.get('limit') or 1000)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValidationError({'limit': f'Expected a positive number of changes (at most {changes.MAX_LIMIT} are sent).'})
+    return since, limit
+
+
+def sync_data(feed: changes.Feed) -> dict:
+    serializers = {'substations': SubstationSerializer, 'mccs': MCCSerializer, 'nodes': NodeSerializer}
+    data = {'token': str(feed.token), 'more': feed.more}
+    for key, serializer in serializers.items():
+        data[key] = serializer(feed.objects[key], many=True).data
+    data['deleted'] = feed.deleted
+    return data
+
+
+router = routers.DefaultRouter()
+router.register('substations', SubstationViewSet, basename='api-substation')
+router.register('mccs', MCCViewSet, basename='api-mcc')
+router.register('nodes', NodeViewSet, basename='api-node')
+router.register('summaries', SummaryViewSet, basename='api-summary')
+router.register('levels', LevelViewSet, basename='api-level')
+router.register('sync', SyncViewSet, basename='api-sync')
@@ -0,0 +1,15 @@
+from django.urls import path, re_path
+
+from . import async_views
+
+# Prepended to locator/urls.py when LOCATOR_ASYNC_VIEWS is on; names match the sync routes.
+urlpatterns = [
+    path('', async_views.HomeView.as_view(), name='home'),
+    path('substation/<int:sub_num>/', async_views.SubstationView.as_view(), name='substation'),
+    path('mcc/<slug:mcc_slug>/', async_views.MCCView.as_view(), name='mcc'),
+    path('node/<slug:slug>/', async_views.NodeView.as_view(), name='node-detail'),
+    path('search/autocomplete/', async_views.autocomplete_node, name='autocomplete_node'),
+    re_path(r'^api/(?P<version>v1)/nodes/batch/$', async_views.node_batch, name='api-node-batch'),
+    re_path(r'^api/(?P<version>v1)/nodes/(?P<slug>[^/.]+)/$', async_views.node_detail, name='api-node-detail'),
+    re_path(r'^api/(?P<version>v1)/sync/$', async_views.sync_list, name='api-sync-list'),
+]
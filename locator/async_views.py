@@ -0,0 +1,166 @@
+"""Async versions of the read-heavy views, served under ASGI.
+
+With LOCATOR_ASYNC_VIEWS enabled these views take precedence over their sync
+counterparts in locator/urls.py. Version checks, 304 answers, page cache hits,
+API lookups and media files are handled on the event loop with the async ORM;
+template rendering, request.user and the in-memory hierarchy and search index
+(which load with the sync ORM) run in worker threads through sync_to_async.
+API requests the async endpoints don't cover (the browsable API, filters,
+POST, and requests without a session user, which may use another DRF
+authentication or are refused there) are passed on to the DRF views unchanged.
+"""
+import os
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers, set_response_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+
+from . import api, changes, media, search, views
+from .caching import AsyncConditionalPageMixin
+from .routers import replica_reads
+from .serializers import NodeSerializer
+
+
+class HomeView(AsyncConditionalPageMixin, views.HomeView):
+
+    async def aget_data_version(self):
+        return await sync_to_async(self.get_data_version)()
+
+
+class SubstationView(AsyncConditionalPageMixin, views.SubstationView):
+
+    async def aget_data_version(self):
+        return await sync_to_async(self.get_data_version)()
+
+
+class MCCView(AsyncConditionalPageMixin, views.MCCView):
+
+    async def aget_data_version(self):
+        self.mcc = await self.version_queryset().afirst()
+        return self.loaded_version()
+
+
+class NodeView(AsyncConditionalPageMixin, views.NodeView):
+
+    async def aget_data_version(self):
+        self.node = await self.version_queryset().afirst()
+        return self.loaded_version()
+
+
+@replica_reads
+async def autocomplete_node(request):
+    if not await sync_to_async(lambda: request.user.has_perm('locator.view_node'))():
+        raise PermissionDenied
+    # The index is searched in memory, but loads with the sync ORM on first use.
+    return _json(await sync_to_async(views.autocomplete_results)(request.GET))
+
+
+# API
+
+def _json(data, status=200):
+    return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+
+def _api_response(request, data, status=200):
+    """JSON as the DRF views send it, with their content ETag and 304 handling."""
+    response = _json(data, status)
+    patch_vary_headers(response, ['Accept'])
+    if status == 200:
+        set_response_etag(response)
+        return get_conditional_response(request, etag=response['ETag'], response=response)
+    return response
+
+
+def _for_drf(request, params=()) -> bool:
+    """Whether the request needs the DRF view: a non-GET method, HTML or other query parameters."""
+    return (request.method not in ('GET', 'HEAD')
+            or 'text/html' in request.headers.get('Accept', '')
+            or any(key not in params for key in request.GET))
+
+
+async def _signed_in(request) -> bool:
+    return await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def _csrf_exempt(view):
+    # DRF enforces CSRF itself for session-authenticated requests. Django's
+    # csrf_exempt() hides async views behind a sync wrapper before 5.0.
+    view.csrf_exempt = True
+    return view
+
+
+def _drf_view(name):
+    return next(pattern.callback for pattern in api.router.urls if pattern.name == name)
+
+
+_node_detail = _drf_view('api-node-detail')
+_node_batch = _drf_view('api-node-batch')
+_sync_list = _drf_view('api-sync-list')
+
+
+@replica_reads
+@_csrf_exempt
+async def node_detail(request, version, slug):
+    if _for_drf(request) or not await _signed_in(request):
+        return await sync_to_async(_node_detail)(request, version=version, slug=slug)
+    node = await api.NodeViewSet.queryset.filter(slug=slug).afirst()
+    if node is None:
+        return _api_response(request, {'detail': 'Not found.'}, status=404)
+    return _api_response(request, NodeSerializer(node).data)
+
+
+@replica_reads
+@_csrf_exempt
+async def node_batch(request, version):
+    if _for_drf(request, params=('slugs',)) or not await _signed_in(request):
+        return await sync_to_async(_node_batch)(request, version=version)
+    try:
+        slugs = api.batch_slugs(request.GET.get('slugs', ''))
+    except ValidationError as exc:
+        return _api_response(request, exc.detail, status=400)
+    return _api_response(request, api.batch_data(await search.alookup_batch(slugs)))
+
+
+@replica_reads
+@_csrf_exempt
+async def sync_list(request, version):
+    if _for_drf(request, params=('since', 'limit')) or not await _signed_in(request):
+        return await sync_to_async(_sync_list)(request, version=version)
+    try:
+        since, limit = api.sync_params(request.GET)
+    except ValidationError as exc:
+        return _api_response(request, exc.detail, status=400)
+    return _api_response(request, api.sync_data(await changes.achanges_since(since, limit)))
+
+
+# Media
+
+async def _read_chunks(path, start, length):
+    # Reads need no thread affinity; any executor thread will do.
+    read = lambda f: f.read(min(media.CHUNK_SIZE, length))  # noqa: E731
+    f = await sync_to_async(open, thread_sensitive=False)(path, 'rb')
+    try:
+        await sync_to_async(f.seek, thread_sensitive=False)(start)
+        while length > 0 and (chunk := await sync_to_async(read, thread_sensitive=False)(f)):
+            length -= len(chunk)
+            yield chunk
+    finally:
+        await sync_to_async(f.close, thread_sensitive=False)()
+
+
+async def serve_media(request, path):
+    """Stream an uploaded file without tying up a thread for the whole download.
+
+    Same answers as views.serve_media (login, ranges, caching, sendfile); see locator.media.
+    """
+    await sync_to_async(media.check_access)(request.user)
+    fullpath = media.locate(path)
+    try:
+        info = await sync_to_async(os.stat, thread_sensitive=False)(fullpath)
+    except OSError:
+        raise Http404('No such file')
+    media.check_file(info)
+    return media.response(request, path, fullpath, info, _read_chunks)
@@ -0,0 +1,8 @@
+"""Load testing: synthetic towers (generator), a URL benchmark (runner) and a query plan check (plans).
+
+Run them against a scratch database, never the plant's one:
+
+    python manage.py generate_tower --substations 50 --mccs 1000 --nodes 500000 --clear
+    python manage.py benchmark --workers 8 --duration 60 --output before.json
+    python manage.py check_query_plans
+"""
@@ -0,0 +1,110 @@
+"""Synthetic tower generator.
+
+Rows are written with bulk_create and cleared with raw deletes, so the caches,
+summaries and change log that the model signals normally maintain are
+refreshed explicitly at the end.
+"""
+import random
+from decimal import Decimal
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from PIL import Image, ImageDraw
+
+from locator import changes, hierarchy, search, summaries, utils
+from locator.models import (Change,
+                            DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node,
+                            PhotoJob)
+
+
+NODE_TITLES = ['Pump', 'Fan', 'Conveyor', 'Mixer', 'Crusher', 'Feeder', 'Valve',
+               'Compressor', 'Blower', 'Elevator', 'Screw', 'Agitator']
+LEVELS = [value for value, _ in utils.LEVELS]
+
+
+def make_photo(rng: random.Random, index: int) -> ContentFile:
+    """A small JPEG that differs per index, so content addressing keeps them apart."""
+    color = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.new('RGB', (640, 480), color)
+    ImageDraw.Draw(image).text((20, 20), f'node photo {index}', fill=(255, 255, 255))
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=80)
+    return ContentFile(buffer.getvalue(), name=f'bench_{index}.jpg')
+
+
+def clear():
+    """Empty the tower tables with one DELETE each.
+
+    QuerySet.delete() would fetch every node and send its signals (summaries,
+    change log tombstones, photo release, MCC touch), which takes hours at 500k
+    nodes. Children go first for the foreign keys and the change log last.
+    Photo files are left alone: MEDIA_ROOT is shared with any other copy of
+    the database.
+    """
+    with transaction.atomic():
+        for model in (Node, PhotoJob, MCC, DS, Change):
+            queryset = model.objects.all()
+            queryset._raw_delete(queryset.db)
+        summaries.rebuild()
+    hierarchy.invalidate()
+    search.index.invalidate()
+
+
+def _create(model, objects, batch_size) -> list[int]:
+    created = []
+    for start in range(0, len(objects), batch_size):
+        with transaction.atomic():
+            created += [obj.pk for obj in model.objects.bulk_create(objects[start:start + batch_size])]
+    return created
+
+
+def generate_tower(substations=5, mccs=11, nodes=141, photos=0, photo_share=1.0,
+                   seed=0, batch_size=5000, progress=None) -> dict:
+    """Write substations, MCCs spread over them and nodes spread over the MCCs.
+
+    Expects empty tables (see clear()); slugs are numbered from 1. `photos` distinct images are stored once and shared by `photo_share` of the
+    nodes, which keeps a 500k node tower within reach of a laptop disk.
+    """
+    rng = random.Random(seed)
+    progress = progress or (lambda message: None)
+    storage = Node._meta.get_field('label').storage
+
+    ds_ids = _create(DS, [DS(title=f'РП-{i}', slug=f'rp-{i}', level=rng.choice(LEVELS))
+                          for i in range(1, substations + 1)], batch_size)
+    progress(f'{len(ds_ids)} substations')
+
+    mcc_ids = _create(MCC, [MCC(title=f'MCC-{i}', slug=f'mcc-{i}',
+                                substation_id=ds_ids[(i - 1) % len(ds_ids)])
+                            for i in range(1, mccs + 1)], batch_size)
+    progress(f'{len(mcc_ids)} MCCs')
+
+    labels = [storage.save(f'photos/bench_{i}.jpg', make_photo(rng, i)) for i in range(photos)]
+    progress(f'{len(labels)} photos')
+
+    node_ids = []
+    for start in range(0, nodes, batch_size):
+        batch = []
+        for i in range(start, min(start + batch_size, nodes)):
+            batch.append(Node(
+                title=f'{rng.choice(NODE_TITLES)} {i % 1000}',
+                slug=f'{i % substations + 1}_{i}',
+                level=rng.choice(LEVELS),
+                round_per_minute=rng.randrange(0, 3001, 50),
+                power=Decimal(rng.randrange(1, 10000)) / 10,
+                mcc_id=mcc_ids[i % len(mcc_ids)],
+                substation_id=ds_ids[i % len(mcc_ids) % len(ds_ids)],
+                label=labels[i % len(labels)] if labels and rng.random() < photo_share else None,
+            ))
+        node_ids += _create(Node, batch, batch_size)
+        progress(f'{len(node_ids)} nodes')
+
+    for kind, ids in [(Change.SUBSTATION, ds_ids), (Change.MCC, mcc_ids), (Change.NODE, node_ids)]:
+        for start in range(0, len(ids), batch_size):
+            changes.record(kind, ids[start:start + batch_size])
+    summaries.rebuild()
+    hierarchy.invalidate()
+    search.index.invalidate()
+    return {'substations': len(ds_ids), 'mccs': len(mcc_ids), 'nodes': len(node_ids), 'photos': len(labels)}
@@ -0,0 +1,117 @@
+"""Query plan check.
+
+Every URL the benchmark requests (plus the API filters the clients use) is
+fetched once per sample; each filtered SELECT it sends is then run through
+EXPLAIN, and any plan that reads all of a large table (SQLite ``SCAN``,
+PostgreSQL ``Seq Scan``) is reported. Statements without a WHERE clause read
+the whole table on purpose (the search index build, first API pages) and are
+not checked. Run it against a synthetic tower, never the plant's database.
+"""
+import random
+import re
+from dataclasses import dataclass
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import Client
+
+from locator.queries import QueryRecorder, fingerprint
+
+from .runner import Samples, _host
+
+
+# Filters the API clients send, on top of each route's plain URL.
+FILTERS = {
+    'api-node-list': ['mcc={mcc}', 'substation={substation}', 'level={level}'],
+    'api-mcc-list': ['substation={substation}'],
+}
+MIN_ROWS = 1000
+
+_SCAN_RES = {
+    'sqlite': re.compile(r'^SCAN (\w+)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+@dataclass(frozen=True)
+class FullScan:
+    url: str
+    table: str
+    sql: str
+    plan: str
+
+
+class SelectRecorder(QueryRecorder):
+    """QueryRecorder that keeps each SELECT with its parameters, to EXPLAIN afterwards."""
+
+    def __init__(self):
+        super().__init__()
+        self.selects = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.selects.append((context['connection'].alias, sql, params))
+        return super().__call__(execute, sql, params, many, context)
+
+
+def explain(alias: str, sql: str, params) -> list[str]:
+    """The plan of one statement, a line per step."""
+    connection = connections[alias]
+    if connection.vendor not in _SCAN_RES:
+        raise ValueError(f'EXPLAIN output of {connection.vendor} is not understood.')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute('EXPLAIN ' + sql, params)
+        return [row[0].strip().lstrip('-> ') for row in cursor.fetchall()]
+
+
+def scanned_tables(alias: str, plan: list[str]) -> set[str]:
+    scan_re = _SCAN_RES[connections[alias].vendor]
+    return {match.group(1) for match in map(scan_re.search, plan) if match}
+
+
+def large_tables(min_rows: int = MIN_ROWS) -> set[str]:
+    """Tables of the locator app holding at least `min_rows` rows."""
+    return {model._meta.db_table for model in apps.get_app_config('locator').get_models()
+            if model.objects.count() >= min_rows}
+
+
+def urls(targets, samples: Samples, per_target: int = 3) -> list[str]:
+    result = []
+    for target in targets:
+        for _ in range(per_target):
+            url = samples.url(target)
+            result.append(url)
+            for query in FILTERS.get(target.name, []):
+                result.append(url + '?' + query.format(mcc=samples.rng.choice(samples.mccs),
+                                                       substation=samples.rng.choice(samples.substations),
+                                                       level=samples.rng.choice(samples.levels)))
+    return list(dict.fromkeys(result))
+
+
+def check(targets, username=None, per_target: int = 3, min_rows: int = MIN_ROWS, seed: int = 0) -> list[FullScan]:
+    """Full scans of large tables in the filtered queries behind `targets`, one per statement shape."""
+    samples = Samples(random.Random(seed))
+    if not samples.nodes:
+        raise ValueError('The database has no nodes; run generate_tower first.')
+    large = large_tables(min_rows)
+    client = Client(HTTP_HOST=_host())
+    if username:
+        client.force_login(User.objects.get(username=username))
+
+    found, seen = [], set()
+    for url in urls(targets, samples, per_target):
+        recorder = SelectRecorder()
+        with recorder.record():
+            client.get(url)
+        for alias, sql, params in recorder.selects:
+            if ' WHERE ' not in sql or fingerprint(sql) in seen:
+                continue
+            seen.add(fingerprint(sql))
+            plan = explain(alias, sql, params)
+            for table in sorted(scanned_tables(alias, plan) & large):
+                found.append(FullScan(url, table, sql, '\n'.join(plan)))
+    return found
@@ -0,0 +1,234 @@
+"""URL benchmark.
+
+Every named route in locator/urls.py (the API router included) is requested
+through django.test.Client, i.e. the full middleware and template stack without
+a web server in front. Requests are spread over worker processes; each one
+records latency and SQL query count per request.
+"""
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.test import Client
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+
+from locator import urls as locator_urls, utils
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+from locator.queries import QueryRecorder
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Logging out would end the worker's session for every following request;
+# profile downloads need the id of an earlier profiled request.
+SKIPPED = {'logout_user', 'profile_download'}
+SAMPLE_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Target:
+    name: str
+    route: str
+    kwargs: tuple
+
+
+def discover_targets(patterns=None, prefix='', parent_kwargs=()) -> list[Target]:
+    """Named routes of locator/urls.py, without DRF's format-suffix variants."""
+    targets = []
+    for pattern in locator_urls.urlpatterns if patterns is None else patterns:
+        route = prefix + str(pattern.pattern)
+        kwargs = parent_kwargs + tuple(pattern.pattern.regex.groupindex)
+        if isinstance(pattern, URLResolver):
+            targets += discover_targets(pattern.url_patterns, route, kwargs)
+        elif isinstance(pattern, URLPattern) and pattern.name and pattern.name not in SKIPPED:
+            if 'format' not in kwargs:
+                targets.append(Target(pattern.name, route, kwargs))
+    seen = set()
+    return [target for target in targets if not (target.name in seen or seen.add(target.name))]
+
+
+class Samples:
+    """Random existing rows to fill URL parameters with, so caches see realistic spread."""
+
+    def __init__(self, rng: random.Random, size: int = SAMPLE_SIZE):
+        self.rng = rng
+        self.substations = self._pick(DS, 'pk', size)
+        self.mccs = self._pick(MCC, 'slug', size)
+        self.nodes = self._pick(Node, 'slug', size)
+        self.levels = [level for level, _ in utils.LEVELS]
+
+    def _pick(self, model, field, size):
+        bounds = model.objects.order_by('pk').values_list('pk', flat=True)
+        low, high = bounds.first(), bounds.last()
+        if low is None:
+            return []
+        ids = self.rng.sample(range(low, high + 1), min(size, high - low + 1))
+        return list(model.objects.filter(pk__in=ids).values_list(field, flat=True))
+
+    def kwargs(self, target: Target) -> dict:
+        values = {}
+        for name in target.kwargs:
+            if name == 'version':
+                values[name] = 'v1'
+            elif name in ('sub_num', 'pk'):
+                values[name] = self.rng.choice(self.substations)
+            elif name == 'level':
+                values[name] = self.rng.choice(self.levels)
+            elif name == 'mcc_slug' or 'mcc' in target.name:
+                values[name] = self.rng.choice(self.mccs)
+            else:
+                values[name] = self.rng.choice(self.nodes)
+        return values
+
+    def query(self, target: Target) -> str:
+        if target.name == 'autocomplete_node':
+            return '?q=' + self.rng.choice(self.nodes)[:3]
+        if target.name == 'search_node':
+            return '?slug=' + self.rng.choice(self.nodes)
+        if target.name == 'api-node-batch':
+            return '?slugs=' + ','.join(self.rng.sample(self.nodes, min(20, len(self.nodes))))
+        return ''
+
+    def url(self, target: Target) -> str:
+        return reverse(target.name, kwargs=self.kwargs(target)) + self.query(target)
+
+
+def percentile(values: list, p: float):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def _host() -> str:
+    hosts = [host.lstrip('.') for host in settings.ALLOWED_HOSTS if host != '*']
+    return hosts[0] if hosts else 'localhost'
+
+
+def _init_worker():
+    django.setup()
+
+
+def run_worker(jobs, warmup_urls, username) -> dict:
+    """Request `jobs` [(name, url), ...] after the warm-up URLs; returns raw timings."""
+    client = Client(HTTP_HOST=_host())
+    if username:
+        client.force_login(User.objects.get(username=username))
+    for url in warmup_urls:
+        client.get(url)
+
+    timings = []
+    started = time.perf_counter()
+    for name, url in jobs:
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recorder.record():
+            response = client.get(url)
+        timings.append((name, response.status_code, time.perf_counter() - start, recorder.count))
+    finished = time.perf_counter()
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+    if rss is not None and sys.platform == 'darwin':
+        rss //= 1024  # bytes there, kilobytes on Linux
+    return {'timings': timings, 'seconds': finished - started, 'max_rss_kb': rss}
+
+
+def summarise(timings: list, seconds: float) -> dict:
+    durations = sorted(duration for _, _, duration, _ in timings)
+    queries = [count for _, _, _, count in timings]
+    ms = lambda value: round(value * 1000, 2) if value is not None else None  # noqa: E731
+    return {
+        'requests': len(timings),
+        'errors': sum(1 for _, status, _, _ in timings if status >= 400),
+        'p50_ms': ms(percentile(durations, 50)),
+        'p95_ms': ms(percentile(durations, 95)),
+        'p99_ms': ms(percentile(durations, 99)),
+        'mean_ms': ms(sum(durations) / len(durations)) if durations else None,
+        'throughput_rps': round(len(timings) / seconds, 1) if seconds else None,
+        'queries_mean': round(sum(queries) / len(queries), 1) if queries else None,
+        'queries_max': max(queries, default=None),
+    }
+
+
+def revision():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=settings.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(targets, workers=1, requests=50, warmup=2, username=None, seed=0) -> dict:
+    """Request every target `requests` times over `workers` processes and summarise."""
+    rng = random.Random(seed)
+    samples = Samples(rng)
+    if not samples.nodes:
+        raise ValueError('The database has no nodes; run generate_tower first.')
+
+    jobs = [(target.name, samples.url(target)) for target in targets for _ in range(requests)]
+    rng.shuffle(jobs)
+    warmup_urls = [samples.url(target) for target in targets for _ in range(warmup)]
+    chunks = [jobs[i::workers] for i in range(workers)]
+
+    if workers > 1:
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            results = list(executor.map(run_worker, chunks, [warmup_urls] * workers, [username] * workers))
+    else:
+        results = [run_worker(chunks[0], warmup_urls, username)]
+
+    timings = [timing for result in results for timing in result['timings']]
+    seconds = max(result['seconds'] for result in results)
+    routes = {target.name: target.route for target in targets}
+    return {
+        'revision': revision(),
+        'created': timezone.now().isoformat(),
+        'environment': {
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'workers': workers,
+            'requests_per_url': requests,
+            'warmup_per_url': warmup,
+            'cpus': os.cpu_count(),
+        },
+        'dataset': {
+            'substations': DS.objects.count(),
+            'mccs': MCC.objects.count(),
+            'nodes': Node.objects.count(),
+        },
+        'total': summarise(timings, seconds),
+        'urls': {name: {'route': routes[name],
+                        **summarise([t for t in timings if t[0] == name], seconds)} for name in routes},
+        'memory': {'max_rss_kb': max((r['max_rss_kb'] for r in results if r['max_rss_kb']), default=None)},
+    }
+
+
+def compare(before: dict, after: dict) -> list[str]:
+    """p95 latency and query count changes per URL between two result files."""
+    lines = []
+    for name, new in after['urls'].items():
+        old = before.get('urls', {}).get(name)
+        if not old or not old.get('p95_ms') or new.get('p95_ms') is None:
+            continue
+        change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+        lines.append(f"{name:<28} p95 {old['p95_ms']:>8.1f} -> {new['p95_ms']:>8.1f} ms ({change:+.0f}%)"
+                     f"  queries {old['queries_mean']} -> {new['queries_mean']}")
+    return lines
@@ -0,0 +1,159 @@
+import hashlib
+import inspect
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from . import hierarchy
+
+
+# Set by finish_page() for every response, so not part of the cached copy.
+PAGE_HEADERS = {'etag', 'last-modified', 'cache-control'}
+
+
+def permission_class(user) -> str:
+    """What a page can show differently: sidebar for users, edit links for superusers.
+
+    The templates branch on nothing else (no ``perms`` checks), so all users of
+    one class share a cached page.
+    """
+    if user.is_superuser:
+        return 'superuser'
+    if user.is_authenticated:
+        return 'user'
+    return 'anonymous'
+
+
+def cache_entry(response):
+    """Body and headers of a rendered page, or None when it can't be shared."""
+    # Cookies belong to the user the page was rendered for.
+    if response.status_code != 200 or response.cookies:
+        return None
+    headers = [(name, value) for name, value in response.items() if name.lower() not in PAGE_HEADERS]
+    return response.content, headers
+
+
+def from_cache_entry(entry) -> HttpResponse:
+    content, headers = entry
+    response = HttpResponse(content)
+    for name, value in headers:
+        response[name] = value
+    return response
+
+
+class ConditionalPageMixin:
+    """Conditional GET and full-page caching keyed by a cheap data version.
+
+    Views implement ``get_data_version()`` returning ``(version, last_modified)``,
+    or None to fall through to normal rendering (e.g. for a 404). A request whose
+    If-None-Match/If-Modified-Since still matches gets a 304 without touching the
+    view; otherwise the rendered page, with its headers, is served from the cache
+    when one exists for this version and permission class. Changing the data
+    changes the version, so nothing needs to be purged.
+    """
+
+    page_cache_timeout = 60 * 60 * 24
+
+    def get_data_version(self):
+        raise NotImplementedError
+
+    def get_etag(self, version) -> str:
+        key = ':'.join([type(self).__name__, str(version), permission_class(self.request.user),
+                        hierarchy.navigation_version()])
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def page_etag(self, version, last_modified) -> tuple[str, int]:
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return self.get_etag(f'{version}:{last_modified.isoformat() if last_modified else ""}'), timestamp
+
+    def page_cache_key(self, etag) -> str:
+        return f'locator:page:{etag}'
+
+    def finish_page(self, response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Cookie'])
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'LOCATOR_PAGE_CACHE', True):
+            return super().dispatch(request, *args, **kwargs)
+        data = self.get_data_version()
+        if data is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        etag, timestamp = self.page_etag(*data)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = self.cached_response(etag, request, *args, **kwargs)
+        return self.finish_page(response, etag, timestamp)
+
+    def cached_response(self, etag, request, *args, **kwargs):
+        key = self.page_cache_key(etag)
+        cached = cache.get(key)
+        if cached is not None:
+            return from_cache_entry(cached)
+
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        entry = cache_entry(response)
+        if entry is not None:
+            cache.set(key, entry, self.page_cache_timeout)
+        return response
+
+
+class AsyncConditionalPageMixin(ConditionalPageMixin):
+    """ConditionalPageMixin for async views.
+
+    Views implement ``aget_data_version()``. The version lookup and the cache run
+    on the event loop; rendering, which touches request.user and template tags
+    backed by the sync ORM, runs in a worker thread.
+    """
+
+    view_is_async = True
+
+    async def aget_data_version(self):
+        raise NotImplementedError
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not getattr(settings, 'LOCATOR_PAGE_CACHE', True):
+            return await self.render_page(request, *args, **kwargs)
+        data = await self.aget_data_version()
+        if data is None:
+            return await self.render_page(request, *args, **kwargs)
+
+        etag, timestamp = await sync_to_async(self.page_etag)(*data)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            key = self.page_cache_key(etag)
+            cached = await cache.aget(key)
+            if cached is not None:
+                response = from_cache_entry(cached)
+            else:
+                response = await self.render_page(request, *args, **kwargs)
+                entry = cache_entry(response)
+                if entry is not None:
+                    await cache.aset(key, entry, self.page_cache_timeout)
+        return self.finish_page(response, etag, timestamp)
+
+    async def render_page(self, request, *args, **kwargs):
+        response = await sync_to_async(self._render_page)(request, *args, **kwargs)
+        if inspect.iscoroutine(response):
+            # View.options() and http_method_not_allowed() answer async views with a coroutine.
+            response = await response
+        return response
+
+    def _render_page(self, request, *args, **kwargs):
+        response = View.dispatch(self, request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
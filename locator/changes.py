@@ -0,0 +1,126 @@
+"""Change feed for the delta sync API.
+
+Saves and deletes of substations, MCCs and nodes are recorded in the Change log
+(from signals, and explicitly by bulk writers such as import_nodes). A sync
+token is the highest ``seq`` a client has applied; the feed returns the
+current state of everything changed after it, plus tombstones for deletions.
+
+That only works if sequence numbers become visible in order: a change
+committed with a lower ``seq`` than a token already handed out would never
+reach that client. SQLite serialises writers, so this holds there. On
+PostgreSQL record() takes a transaction-level advisory lock first, so
+transactions that record changes allocate their ``seq`` values and commit
+one at a time. Writers of nodes, MCCs and substations wait for each other
+until commit; readers, including the feed, are not blocked.
+"""
+from dataclasses import dataclass, field
+
+from asgiref.sync import sync_to_async
+from django.db import connections, router, transaction
+
+from .models import (Change,
+                     DistributiveSubstation as DS,
+                     MotorControlCenter as MCC,
+                     Node)
+
+MAX_LIMIT = 5000
+
+# pg_advisory_xact_lock() key serialising the writers of the log ('loc' + 1).
+FEED_LOCK_ID = 0x6c6f6301
+
+# kind -> (feed key, queryset for the current rows); parents before children.
+KINDS = {
+    Change.SUBSTATION: ('substations', lambda: DS.objects.prefetch_related('motor_centers')),
+    Change.MCC: ('mccs', lambda: MCC.objects.select_related('substation')),
+    Change.NODE: ('nodes', lambda: Node.objects.select_related('mcc', 'substation')),
+}
+MODEL_KINDS = {DS: Change.SUBSTATION, MCC: Change.MCC, Node: Change.NODE}
+
+
+def record(kind: str, ids, deleted: bool = False, using: str = None) -> None:
+    """Move the objects to the head of the log; one row per object is kept."""
+    ids = set(ids) - {None}
+    if not ids:
+        return
+    using = using or router.db_for_write(Change)
+    changes = Change.objects.db_manager(using)
+    with transaction.atomic(using=using):
+        _serialize_writers(using)
+        changes.filter(kind=kind, object_id__in=ids).delete()
+        changes.bulk_create([Change(kind=kind, object_id=pk, deleted=deleted) for pk in sorted(ids)],
+                            batch_size=2000)
+
+
+def _serialize_writers(using: str) -> None:
+    # Held until the outermost transaction ends, i.e. past the commit of the row change too.
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [FEED_LOCK_ID])
+
+
+def record_nodes_of(using: str = None, **lookup) -> None:
+    """Nodes embed their MCC slug and substation title, so renames re-send them."""
+    record(Change.NODE, Node.objects.db_manager(using).filter(**lookup).values_list('pk', flat=True), using=using)
+
+
+def latest_token() -> int:
+    return Change.objects.order_by('-seq').values_list('seq', flat=True).first() or 0
+
+
+@dataclass
+class Feed:
+    token: int
+    more: bool
+    objects: dict = field(default_factory=dict)
+    deleted: dict = field(default_factory=dict)
+
+
+def changes_since(token: int, limit: int = 1000) -> Feed:
+    """Up to `limit` changes after `token`, with the rows they refer to."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    entries = list(Change.objects.filter(seq__gt=token).order_by('seq')[:limit + 1])
+    feed, entries = _feed(token, limit, entries)
+    for kind, (key, queryset) in KINDS.items():
+        saved, deleted = _split(entries, kind)
+        objects = list(queryset().filter(pk__in=saved).order_by('pk')) if saved else []
+        _fill(feed, key, saved, deleted, objects)
+    return feed
+
+
+async def achanges_since(token: int, limit: int = 1000) -> Feed:
+    """changes_since() for async views."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    entries = [entry async for entry in Change.objects.filter(seq__gt=token).order_by('seq')[:limit + 1]]
+    feed, entries = _feed(token, limit, entries)
+    for kind, (key, queryset) in KINDS.items():
+        saved, deleted = _split(entries, kind)
+        objects = []
+        if saved:
+            queryset = queryset().filter(pk__in=saved).order_by('pk')
+            if queryset._prefetch_related_lookups:
+                # Async iteration does not run prefetch_related() before Django 5.0.
+                objects = await sync_to_async(list)(queryset)
+            else:
+                objects = [obj async for obj in queryset]
+        _fill(feed, key, saved, deleted, objects)
+    return feed
+
+
+def _feed(token, limit, entries):
+    more = len(entries) > limit
+    entries = entries[:limit]
+    return Feed(token=entries[-1].seq if entries else token, more=more), entries
+
+
+def _split(entries, kind):
+    saved = [entry.object_id for entry in entries if entry.kind == kind and not entry.deleted]
+    deleted = [entry.object_id for entry in entries if entry.kind == kind and entry.deleted]
+    return saved, deleted
+
+
+def _fill(feed, key, saved, deleted, objects):
+    feed.objects[key] = objects
+    # A row deleted after its change was read only shows up as missing here.
+    found = {obj.pk for obj in objects}
+    feed.deleted[key] = sorted(set(deleted) | (set(saved) - found))
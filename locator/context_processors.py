@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Timeout of the {% cache %} fragments in the locator templates; 0 disables them."""
+    return {'fragment_cache_timeout': getattr(settings, 'LOCATOR_FRAGMENT_CACHE_TIMEOUT', 0)}
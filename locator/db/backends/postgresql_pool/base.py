@@ -0,0 +1,118 @@
+"""PostgreSQL backend that borrows connections from an in-process pool.
+
+Django 4.2 opens a connection per thread and, under ASGI, per request, so
+CONN_MAX_AGE does not help the async path. This backend keeps a
+psycopg2 ThreadedConnectionPool per database alias and process. Its
+connections are PooledConnections: when Django closes one, it goes back to the
+pool, rolled back if needed, instead of disconnecting.
+
+When all max_size connections are in use, a thread asking for one waits up to
+`timeout` seconds for another to be returned and then fails with an
+OperationalError naming the pool size, which shows as a 500 for that
+request. Size max_size for the web threads of a process (and stay within the
+server's max_connections across processes) rather than relying on the wait.
+
+    'ENGINE': 'locator.db.backends.postgresql_pool',
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {'pool': {'min_size': 1, 'max_size': 20, 'timeout': 10}},
+"""
+import os
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql import base
+from django.db.utils import OperationalError
+from django.utils.asyncio import async_unsafe
+
+try:
+    from psycopg2 import extensions, extras, pool
+except ImportError as exc:  # pragma: no cover
+    raise ImproperlyConfigured(f'Error loading psycopg2 module: {exc}')
+
+
+_pools = {}
+_lock = threading.Lock()
+
+
+class PooledConnection(extensions.connection):
+    """psycopg2 connection that close() returns to the pool it was borrowed from."""
+
+    pool = None
+
+    def close(self):
+        pool, self.pool = self.pool, None
+        if pool is None:
+            super().close()
+        else:
+            # The pool rolls back an open transaction and drops broken connections.
+            pool.putconn(self, close=bool(self.closed))
+
+
+class WaitingConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool whose getconn() waits for a free connection.
+
+    psycopg2's pool raises PoolError as soon as it is exhausted.
+    """
+
+    def __init__(self, minconn, maxconn, *args, timeout: float = 10, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self._free = threading.BoundedSemaphore(maxconn)
+
+    def getconn(self, key=None):
+        if not self._free.acquire(timeout=self.timeout):
+            raise OperationalError(f'All {self.maxconn} pooled database connections stayed in use '
+                                   f'for {self.timeout} seconds')
+        try:
+            connection = super().getconn(key)
+        except BaseException:
+            self._free.release()
+            raise
+        connection.pool = self
+        return connection
+
+    def putconn(self, conn=None, key=None, close=False):
+        super().putconn(conn, key, close)
+        self._free.release()
+
+
+def get_pool(alias: str, conn_params: dict, min_size: int, max_size: int, timeout: float) -> WaitingConnectionPool:
+    # Keyed by pid as well: a forked worker must not reuse its parent's sockets.
+    key = (alias, os.getpid())
+    with _lock:
+        if key not in _pools:
+            _pools[key] = WaitingConnectionPool(min_size, max_size, timeout=timeout,
+                                                connection_factory=PooledConnection, **conn_params)
+        return _pools[key]
+
+
+def close_pools() -> None:
+    with _lock:
+        for key in [key for key in _pools if key[1] == os.getpid()]:
+            _pools.pop(key).closeall()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pool', None)
+        return params
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS'].get('pool', {})
+        connections = get_pool(self.alias, conn_params, options.get('min_size', 1), options.get('max_size', 20),
+                               options.get('timeout', 10))
+        with self.wrap_database_errors:
+            connection = connections.getconn()
+        if connection.closed:
+            connection.close()
+            with self.wrap_database_errors:
+                connection = connections.getconn()
+        self.isolation_level = base.IsolationLevel.READ_COMMITTED
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is not None:
+            self.isolation_level = base.IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
@@ -0,0 +1,106 @@
+"""SQLite backend tuned for many readers and an occasional writer.
+
+Every connection switches to WAL journaling (readers no longer block on a
+writer), relaxes fsyncs to synchronous=NORMAL and enlarges the page cache and
+memory map. Transactions opened by atomic() start with BEGIN IMMEDIATE, so a
+transaction takes the write lock up front instead of failing with
+"database is locked" when it tries to upgrade from a read lock. SQLITE_BUSY
+is retried with backoff where that is safe: when starting a transaction and
+for statements running outside one.
+
+    'ENGINE': 'locator.db.backends.sqlite_tuned',
+    'OPTIONS': {'timeout': 20, 'busy_retries': 3, 'pragmas': {'cache_size': -64000}},
+
+`timeout` is SQLite's busy timeout in seconds; `pragmas` override PRAGMAS.
+
+BEGIN IMMEDIATE relies on Django's private
+DatabaseWrapper._start_transaction_under_autocommit(), which is checked at
+import. It is written against Django 4.2 as pinned in requirements.txt. From
+Django 5.1, OPTIONS['transaction_mode'] = 'IMMEDIATE' does the same
+publicly and should replace the override.
+"""
+import random
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+from django.utils.asyncio import async_unsafe
+
+
+if not hasattr(base.DatabaseWrapper, '_start_transaction_under_autocommit'):  # pragma: no cover
+    raise ImproperlyConfigured("This Django version has no sqlite3 DatabaseWrapper."
+                               "_start_transaction_under_autocommit(); use OPTIONS['transaction_mode'] = "
+                               "'IMMEDIATE' with django.db.backends.sqlite3 instead.")
+
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,      # KiB, i.e. 20 MB of page cache per connection
+    'mmap_size': 268435456,    # 256 MB
+    'temp_store': 'MEMORY',
+}
+BUSY_CODES = {5, 6}  # SQLITE_BUSY, SQLITE_LOCKED
+BACKOFF = 0.05
+
+
+def is_busy(exc: Exception) -> bool:
+    return (getattr(exc, 'sqlite_errorcode', None) in BUSY_CODES
+            or 'database is locked' in str(exc) or 'database table is locked' in str(exc))
+
+
+def retry_busy(func, retries: int):
+    """Call func, sleeping with jittered exponential backoff between busy failures."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except base.Database.OperationalError as exc:
+            if attempt == retries or not is_busy(exc):
+                raise
+            time.sleep(BACKOFF * 2 ** attempt * (1 + random.random()))
+
+
+class CursorWrapper(base.SQLiteCursorWrapper):
+    busy_retries = 0
+
+    def execute(self, query, params=None):
+        if self.connection.in_transaction:
+            # Retrying one statement of a transaction would not redo the earlier ones.
+            return super().execute(query, params)
+        return retry_busy(lambda: super(CursorWrapper, self).execute(query, params), self.busy_retries)
+
+    def executemany(self, query, param_list):
+        if self.connection.in_transaction:
+            return super().executemany(query, param_list)
+        param_list = list(param_list)
+        return retry_busy(lambda: super(CursorWrapper, self).executemany(query, param_list), self.busy_retries)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        params.pop('busy_retries', None)
+        return params
+
+    @property
+    def busy_retries(self) -> int:
+        return self.settings_dict['OPTIONS'].get('busy_retries', 3)
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=CursorWrapper)
+        cursor.busy_retries = self.busy_retries
+        return cursor
+
+    # Private Django API (4.2): how atomic() opens a transaction on SQLite.
+    @async_unsafe
+    def _start_transaction_under_autocommit(self):
+        retry_busy(lambda: self.cursor().execute('BEGIN IMMEDIATE'), self.busy_retries)
@@ -0,0 +1,33 @@
+"""Node.substation, a copy of node.mcc.substation.
+
+Per-substation node queries and displays read it from the node row instead of
+joining through the MCC. Node.save() copies it from the MCC and
+MotorControlCenter.save() passes a move to another substation on to the MCC's
+nodes. Writes that bypass save() (QuerySet.update(mcc=...), raw SQL, restored
+dumps) are put right by repair(), also available as
+``manage.py repair_node_substations``.
+"""
+from django.apps import apps as global_apps
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+
+BATCH_SIZE = 2000
+
+
+def stale(using: str = None, apps=global_apps):
+    """Nodes whose substation is not their MCC's."""
+    Node = apps.get_model('locator', 'Node')
+    return Node.objects.using(using).exclude(substation_id=F('mcc__substation_id'))
+
+
+def repair(using: str = None, apps=global_apps) -> list[int]:
+    """Copy each stale node's substation from its MCC; returns the ids of the repaired nodes."""
+    Node = apps.get_model('locator', 'Node')
+    MCC = apps.get_model('locator', 'MotorControlCenter')
+    ids = list(stale(using, apps).order_by('pk').values_list('pk', flat=True))
+    substation = Subquery(MCC.objects.using(using).filter(pk=OuterRef('mcc_id')).values('substation_id')[:1])
+    for start in range(0, len(ids), BATCH_SIZE):
+        (Node.objects.using(using).filter(pk__in=ids[start:start + BATCH_SIZE])
+         .update(substation_id=substation, updated_at=timezone.now()))
+    return ids
@@ -1,10 +1,62 @@
 import django_filters
-from .models import Node
+from django.db.models import Case, IntegerField, When
+
+from .models import (DistributiveSubstation as DS,
+                     MotorControlCenter as MCC,
+                     Node,
+                     NodeSummary)
+from . import search, utils
 
 class NodeFilter(django_filters.FilterSet):
+    q = django_filters.CharFilter(method='search', label='Номер або назва')
 
     class Meta:
         model = Node
         fields = {
             'slug': ['exact']
          }
+
+    def search(self, queryset, name, value):
+        """Prefix, substring and typo tolerant match, best matches first"""
+        pks = [match.entry.pk for match in search.index.search(value, limit=50)]
+        rank = Case(*[When(pk=pk, then=position) for position, pk in enumerate(pks)],
+                    output_field=IntegerField())
+        return queryset.filter(pk__in=pks).order_by(rank) if pks else queryset.none()
+
+
+class SubstationApiFilter(django_filters.FilterSet):
+    level = django_filters.ChoiceFilter(choices=utils.LEVELS)
+
+    class Meta:
+        model = DS
+        fields = ['level']
+
+
+class MCCApiFilter(django_filters.FilterSet):
+    substation = django_filters.NumberFilter(field_name='substation_id')
+
+    class Meta:
+        model = MCC
+        fields = ['substation']
+
+
+class NodeApiFilter(django_filters.FilterSet):
+    level = django_filters.ChoiceFilter(choices=utils.LEVELS)
+    mcc = django_filters.CharFilter(field_name='mcc__slug')
+    substation = django_filters.NumberFilter(field_name='substation_id')
+    power_min = django_filters.NumberFilter(field_name='power', lookup_expr='gte')
+    power_max = django_filters.NumberFilter(field_name='power', lookup_expr='lte')
+    rpm_min = django_filters.NumberFilter(field_name='round_per_minute', lookup_expr='gte')
+    rpm_max = django_filters.NumberFilter(field_name='round_per_minute', lookup_expr='lte')
+
+    class Meta:
+        model = Node
+        fields = ['level', 'mcc', 'substation']
+
+
+class SummaryApiFilter(django_filters.FilterSet):
+    scope = django_filters.ChoiceFilter(choices=NodeSummary.SCOPES)
+
+    class Meta:
+        model = NodeSummary
+        fields = ['scope', 'key']
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 
+from . import search
 from .models import Node
 
 class NodeForm(forms.ModelForm):
@@ -25,3 +26,21 @@ class NodeForm(forms.ModelForm):
 class LoginUserForm(AuthenticationForm):
     username = forms.CharField(label='Логін', widget=forms.TextInput(attrs={'class': 'form-input'}))
     password = forms.CharField(label='Пароль', widget=forms.PasswordInput(attrs={'class': 'form-input'}))
+
+
+class BatchSearchForm(forms.Form):
+    slugs = forms.CharField(label='Номери вузлів', required=False,
+                            widget=forms.Textarea(attrs={'class': 'form-input', 'rows': 4}))
+    file = forms.FileField(label='Або файл зі списком', required=False)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        text = cleaned_data.get('slugs') or ''
+        upload = cleaned_data.get('file')
+        if upload:
+            text += '\n' + upload.read().decode('utf-8-sig', errors='replace')
+        cleaned_data['slug_list'] = search.parse_slugs(text)
+        if len(cleaned_data['slug_list']) > search.MAX_BATCH:
+            raise forms.ValidationError(f"Отримано {len(cleaned_data['slug_list'])} номерів; "
+                                        f"за один раз можна шукати не більше {search.MAX_BATCH}.")
+        return cleaned_data
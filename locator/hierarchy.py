@@ -0,0 +1,96 @@
+"""Process-level cache of the substation -> MCC tree with its node summaries.
+
+The tree changes a few times a week but is needed on every authenticated page
+(sidebar) and by HomeView/SubstationView, so it is built once with two queries
+and kept in memory until a DistributiveSubstation, MotorControlCenter or Node
+signal invalidates it. When ``LOCATOR_SHARED_CACHE`` names a cache alias,
+invalidations are broadcast to every process through a version counter there.
+It is always built from the primary: a lagging read replica would cache the
+tree from before the latest edit for every user.
+"""
+import hashlib
+import threading
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Prefetch
+
+from .utils import SharedVersion
+
+shared_version = SharedVersion('locator:hierarchy:version')
+
+_lock = threading.Lock()
+_state = {'version': None, 'substations': None, 'by_id': None, 'mccs': None, 'navigation_version': None}
+
+
+def _build():
+    from .models import DistributiveSubstation as DS, MotorControlCenter as MCC, NodeSummary
+
+    substations = list(DS.objects.using(DEFAULT_DB_ALIAS).order_by('pk').prefetch_related(
+        Prefetch('motor_centers', queryset=MCC.objects.using(DEFAULT_DB_ALIAS).order_by('title'))))
+    # Counts come from the summaries rather than a COUNT over every node.
+    summaries = {(summary.scope, summary.key): summary for summary in
+                 NodeSummary.objects.using(DEFAULT_DB_ALIAS).filter(scope__in=[NodeSummary.MCC, NodeSummary.SUBSTATION])}
+    for substation in substations:
+        substation.summary = summaries.get((NodeSummary.SUBSTATION, str(substation.pk)))
+        substation.node_count = substation.summary.node_count if substation.summary else 0
+        for mcc in substation.motor_centers.all():
+            mcc.summary = summaries.get((NodeSummary.MCC, str(mcc.pk)))
+            mcc.node_count = mcc.summary.node_count if mcc.summary else 0
+    return substations
+
+
+def _digest(items) -> str:
+    return hashlib.md5(repr(list(items)).encode()).hexdigest()
+
+
+def _snapshot() -> dict:
+    version = shared_version.get()
+    snapshot = dict(_state)
+    if snapshot['substations'] is None or snapshot['version'] != version:
+        with _lock:
+            if _state['substations'] is None or _state['version'] != version:
+                built = _build()
+                _state.update(version=version, substations=built,
+                              by_id={substation.pk: substation for substation in built},
+                              mccs={mcc.pk: mcc for substation in built for mcc in substation.motor_centers.all()},
+                              navigation_version=_digest((s.pk, s.title) for s in built))
+            snapshot = dict(_state)
+    return snapshot
+
+
+def substations() -> list:
+    """All substations with `motor_centers` prefetched, and `node_count` and `summary` set on both levels."""
+    return _snapshot()['substations']
+
+
+def substation(pk):
+    """Cached substation by primary key, or None."""
+    return _snapshot()['by_id'].get(int(pk))
+
+
+def motor_center(pk):
+    """Cached MCC by primary key, with its `summary`, or None."""
+    return _snapshot()['mccs'].get(int(pk))
+
+
+def navigation_version() -> str:
+    """Changes whenever the sidebar substation list would render differently."""
+    return _snapshot()['navigation_version']
+
+
+def substation_version(substation) -> str:
+    """Changes whenever the substation's MCC list or their summaries change."""
+    return _digest((mcc.pk, mcc.title, *_summary_values(mcc.summary)) for mcc in substation.motor_centers.all())
+
+
+def _summary_values(summary) -> tuple:
+    if summary is None:
+        return ()
+    return (summary.node_count, summary.total_power, summary.max_power,
+            summary.rpm_750, summary.rpm_1000, summary.rpm_1500, summary.rpm_3000)
+
+
+def invalidate() -> None:
+    with _lock:
+        _state.update(version=None, substations=None, by_id=None, mccs=None, navigation_version=None)
+    shared_version.bump()
@@ -0,0 +1,143 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from PIL import Image, ImageOps
+
+
+# Longest side in pixels of every derivative rendered from a node photo.
+RENDITIONS = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+
+# format -> (file extension, Pillow format, save options)
+FORMATS = {
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+}
+
+DERIVATIVES_DIR = 'derivatives'
+
+# Pillow format -> (file extension, save options) of normalized originals; other formats become JPEG.
+ORIGINAL_FORMATS = {
+    'JPEG': ('jpg', {'quality': 90, 'optimize': True}),
+    'PNG': ('png', {'optimize': True}),
+    'WEBP': ('webp', {'quality': 90}),
+}
+
+
+def derivative_name(name: str, rendition: str, fmt: str) -> str:
+    """Storage name of a derivative, e.g. derivatives/photos/2_6/card.webp"""
+    stem, _ = os.path.splitext(name)
+    return f'{DERIVATIVES_DIR}/{stem}/{rendition}.{FORMATS[fmt][0]}'
+
+
+def derivative_names(name: str) -> list[str]:
+    return [derivative_name(name, rendition, fmt) for rendition in RENDITIONS for fmt in FORMATS]
+
+
+def _render(image: Image.Image, size: int, fmt: str) -> ContentFile:
+    rendition = image.copy()
+    rendition.thumbnail((size, size), Image.LANCZOS)
+    _, pil_format, options = FORMATS[fmt]
+    buffer = BytesIO()
+    rendition.save(buffer, pil_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(name: str, storage=None, force: bool = False) -> list[str]:
+    """Render every missing derivative of the photo stored as `name`.
+
+    The source is read from `storage` (the Node.label storage) while the
+    derivatives always go to the default storage, so they keep predictable names.
+    """
+    storage = storage or default_storage
+    missing = [(rendition, fmt) for rendition in RENDITIONS for fmt in FORMATS
+               if force or not default_storage.exists(derivative_name(name, rendition, fmt))]
+    if not missing:
+        return []
+
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGB')
+
+    created = []
+    for rendition, fmt in missing:
+        target = derivative_name(name, rendition, fmt)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, _render(image, RENDITIONS[rendition], fmt))
+        created.append(target)
+    return created
+
+
+def normalized(name: str, storage=None):
+    """The photo upright, without EXIF/XMP metadata and within LOCATOR_PHOTO_MAX_SIZE.
+
+    Returns a ContentFile named with the right extension, or None when the
+    stored photo already is all of that.
+    """
+    storage = storage or default_storage
+    max_size = getattr(settings, 'LOCATOR_PHOTO_MAX_SIZE', 2560)
+    with storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.load()
+    metadata = bool(image.getexif()) or any(key in image.info for key in ('xmp', 'XML:com.adobe.xmp'))
+    if not metadata and max(image.size) <= max_size:
+        return None
+
+    pil_format = image.format if image.format in ORIGINAL_FORMATS else 'JPEG'
+    icc_profile = image.info.get('icc_profile')
+    # exif_transpose() keeps the other tags in image.info; save() only writes what it is given.
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+    if pil_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    ext, options = ORIGINAL_FORMATS[pil_format]
+    buffer = BytesIO()
+    image.save(buffer, pil_format, icc_profile=icc_profile, **options)
+    return ContentFile(buffer.getvalue(), name=f'photo.{ext}')
+
+
+def delete_derivatives(name: str) -> None:
+    for target in derivative_names(name):
+        if default_storage.exists(target):
+            default_storage.delete(target)
+
+
+def derivative_url(fieldfile, rendition: str, fmt: str = 'jpeg') -> str:
+    """URL of a derivative, generating the derivatives on first request.
+
+    Falls back to the original photo when the source can not be decoded, and
+    while the photo waits for the worker with LOCATOR_PHOTO_JOBS on.
+    """
+    target = derivative_name(fieldfile.name, rendition, fmt)
+    if not default_storage.exists(target):
+        if getattr(settings, 'LOCATOR_PHOTO_JOBS', False):
+            return fieldfile.url
+        try:
+            generate_derivatives(fieldfile.name, fieldfile.storage)
+        except (OSError, ValueError):
+            return fieldfile.url
+    return default_storage.url(target)
+
+
+def derivative_width(name: str, rendition: str, fmt: str) -> int:
+    """Width in pixels of a stored derivative; only the image header is read."""
+    with default_storage.open(derivative_name(name, rendition, fmt), 'rb') as f:
+        return Image.open(f).width
+
+
+def srcset(fieldfile, fmt: str = 'jpeg') -> str:
+    """Derivatives with their real widths: portrait and small photos are narrower than the rendition box."""
+    urls = {rendition: derivative_url(fieldfile, rendition, fmt) for rendition in RENDITIONS}
+    if fieldfile.url in urls.values():
+        # Derivatives are missing; the original is the only candidate.
+        return fieldfile.url
+    return ', '.join(f'{url} {derivative_width(fieldfile.name, rendition, fmt)}w' for rendition, url in urls.items())
@@ -0,0 +1,125 @@
+"""Background processing of uploaded node photos.
+
+With LOCATOR_PHOTO_JOBS on, saving a node with a new photo queues a PhotoJob
+in the transaction that writes the node, and the request returns once the
+upload is stored. ``manage.py photo_worker`` claims due jobs and runs
+photos.process() on them: EXIF orientation, metadata stripping, resizing to
+LOCATOR_PHOTO_MAX_SIZE and the derivatives. A failed job is retried after
+LOCATOR_PHOTO_JOB_RETRY_DELAY seconds, doubling each time, until
+LOCATOR_PHOTO_JOB_ATTEMPTS runs have failed. Jobs are listed in the admin.
+Without LOCATOR_PHOTO_JOBS the same processing runs right after the commit on
+a small thread pool of the web worker (in_background()), so neither the
+upload request nor, under ASGI, the thread shared by all sync views waits for
+it. The pool has LOCATOR_PHOTO_THREADS threads; 0 processes the photo inline.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import photos
+from .models import Node, PhotoJob
+from .utils import closing_thread_connections
+
+
+logger = logging.getLogger('locator.jobs')
+
+# A job running for longer belongs to a worker that died; it is queued again.
+STALE_AFTER = timedelta(minutes=15)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return getattr(settings, 'LOCATOR_PHOTO_JOBS', False)
+
+
+def enqueue(name: str, using: str = None):
+    """Queue the photo unless a job for it is already waiting or running."""
+    jobs = PhotoJob.objects.db_manager(using)
+    if jobs.filter(name=name, status__in=[PhotoJob.PENDING, PhotoJob.RUNNING]).exists():
+        return None
+    return jobs.create(name=name)
+
+
+def claim():
+    """Mark the next due job as running and return it, or None."""
+    now = timezone.now()
+    due = PhotoJob.objects.filter(status=PhotoJob.PENDING, run_after__lte=now).order_by('run_after', 'pk')
+    for pk in due.values_list('pk', flat=True)[:10]:
+        # A conditional update, so two workers never get the same job.
+        if PhotoJob.objects.filter(pk=pk, status=PhotoJob.PENDING).update(
+                status=PhotoJob.RUNNING, attempts=F('attempts') + 1, started_at=now):
+            return PhotoJob.objects.get(pk=pk)
+    return None
+
+
+def run(job: PhotoJob) -> PhotoJob:
+    storage = Node._meta.get_field('label').storage
+    try:
+        if storage.exists(job.name):
+            job.result = photos.process(job.name, storage)
+        else:
+            # Replaced and released before its turn came.
+            job.result = ''
+    except Exception as exc:
+        logger.warning('Photo job %s (%s) failed: %s', job.pk, job.name, exc)
+        return fail(job, exc)
+    job.status = PhotoJob.DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'finished_at'])
+    return job
+
+
+def fail(job: PhotoJob, exc: Exception) -> PhotoJob:
+    job.error = f'{type(exc).__name__}: {exc}'
+    job.finished_at = timezone.now()
+    if job.attempts >= getattr(settings, 'LOCATOR_PHOTO_JOB_ATTEMPTS', 5):
+        job.status = PhotoJob.FAILED
+    else:
+        job.status = PhotoJob.PENDING
+        delay = getattr(settings, 'LOCATOR_PHOTO_JOB_RETRY_DELAY', 30) * 2 ** (job.attempts - 1)
+        job.run_after = job.finished_at + timedelta(seconds=delay)
+    job.save(update_fields=['status', 'error', 'finished_at', 'run_after'])
+    return job
+
+
+def requeue_stale() -> int:
+    return (PhotoJob.objects.filter(status=PhotoJob.RUNNING, started_at__lt=timezone.now() - STALE_AFTER)
+            .update(status=PhotoJob.PENDING, run_after=timezone.now()))
+
+
+def retry(queryset) -> int:
+    """Queue the jobs again with a fresh set of attempts."""
+    return queryset.exclude(status=PhotoJob.RUNNING).update(
+        status=PhotoJob.PENDING, attempts=0, run_after=timezone.now(), error='')
+
+
+# Without the queue
+
+def in_background(task) -> Future:
+    """Run task on the photo thread pool, or right here with LOCATOR_PHOTO_THREADS = 0."""
+    global _executor
+    threads = getattr(settings, 'LOCATOR_PHOTO_THREADS', 1)
+    if not threads:
+        future = Future()
+        future.set_result(_run_background(task))
+        return future
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='locator-photos')
+    return _executor.submit(_run_background, task)
+
+
+def _run_background(task):
+    with closing_thread_connections():
+        try:
+            return task()
+        except Exception:
+            logger.exception('Background photo processing failed')
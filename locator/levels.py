@@ -0,0 +1,45 @@
+"""Nodes of one floor level across all substations.
+
+A level page is one query: the nodes on the level with their MCC and substation
+joined in, ordered by substation and MCC so the page can be grouped as it is
+read, and cut to one page (node_level_substation_idx covers the filter and the
+order). The node count for the paginator comes from the level's NodeSummary row
+instead of a COUNT over the nodes.
+"""
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+from . import utils
+from .models import Node, NodeSummary
+
+
+PAGE_SIZE = 200
+
+
+def nodes_on(level: str):
+    return (Node.objects.filter(level=level)
+            .select_related('mcc', 'substation')
+            .order_by('substation_id', 'mcc_id', 'slug'))
+
+
+def summary(level: str):
+    return NodeSummary.objects.filter(scope=NodeSummary.LEVEL, key=level).first()
+
+
+def is_known(level: str, summary=None) -> bool:
+    """A level from the choices, or one that nodes were imported with."""
+    return level in dict(utils.LEVELS) or summary is not None
+
+
+class LevelPaginator(Paginator):
+    """Paginator that takes the object count, when known, instead of counting."""
+
+    def __init__(self, object_list, per_page, node_count=None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.node_count = node_count
+
+    @cached_property
+    def count(self):
+        if self.node_count is None:
+            return super().count
+        return self.node_count
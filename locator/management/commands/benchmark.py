@@ -0,0 +1,71 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+
+from locator.benchmark import runner
+
+
+class Command(BaseCommand):
+    help = ('Request every locator URL with concurrent workers and report latency '
+            'percentiles, throughput, SQL queries and memory.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes sending requests at the same time.')
+        parser.add_argument('--requests', type=int, default=50, help='Measured requests per URL.')
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests per URL and worker.')
+        parser.add_argument('--urls', nargs='*', metavar='NAME', help='Only these URL names.')
+        parser.add_argument('--user', default='benchmark',
+                            help='User the workers log in as; created as a superuser if missing. '
+                                 "Pass '' to browse anonymously.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Earlier results file to compare against.')
+
+    def handle(self, *args, **options):
+        targets = runner.discover_targets()
+        if options['urls']:
+            unknown = set(options['urls']) - {target.name for target in targets}
+            if unknown:
+                raise CommandError(f"Unknown URL names: {', '.join(sorted(unknown))}")
+            targets = [target for target in targets if target.name in options['urls']]
+        if options['user'] and not User.objects.filter(username=options['user']).exists():
+            User.objects.create_superuser(options['user'], password=None)
+
+        try:
+            results = runner.run(targets, workers=max(options['workers'], 1), requests=options['requests'],
+                                 warmup=options['warmup'], username=options['user'] or None, seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        self._report(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as f:
+                    before = json.load(f)
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Can not read {options['compare']}: {exc}")
+            self.stdout.write(f"\nCompared with {options['compare']} ({before.get('revision')}):")
+            for line in runner.compare(before, results):
+                self.stdout.write(line)
+
+    def _report(self, results):
+        env, data = results['environment'], results['dataset']
+        self.stdout.write(f"{data['substations']} substations, {data['mccs']} MCCs, {data['nodes']} nodes; "
+                          f"{env['workers']} workers, {env['database']}, DEBUG={env['debug']}")
+        if env['debug']:
+            self.stdout.write(self.style.WARNING('DEBUG is on: numbers include debug-only overhead.'))
+        header = f"{'url':<28} {'reqs':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>7} {'queries':>8}"
+        self.stdout.write(header)
+        for name, stats in [*results['urls'].items(), ('TOTAL', results['total'])]:
+            self.stdout.write(f"{name:<28} {stats['requests']:>5} {stats['errors']:>4} {stats['p50_ms']:>8} "
+                              f"{stats['p95_ms']:>8} {stats['p99_ms']:>8} {stats['throughput_rps']:>7} "
+                              f"{stats['queries_mean']:>8}")
+        if results['memory']['max_rss_kb']:
+            self.stdout.write(f"Peak worker memory: {results['memory']['max_rss_kb'] / 1024:.0f} MiB")
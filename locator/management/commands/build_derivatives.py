@@ -0,0 +1,43 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from locator import images
+from locator.models import Node
+
+
+def _build(name: str, force: bool) -> tuple[str, int, str]:
+    try:
+        created = images.generate_derivatives(name, Node._meta.get_field('label').storage, force=force)
+    except (OSError, ValueError) as exc:
+        return name, 0, str(exc)
+    return name, len(created), ''
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail/card/full JPEG and WebP derivatives for existing node photos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes (default: number of CPUs).')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render derivatives that already exist.')
+
+    def handle(self, *args, **options):
+        names = list(Node.objects.exclude(label='').exclude(label__isnull=True)
+                     .values_list('label', flat=True).distinct())
+        created = failed = 0
+
+        with ProcessPoolExecutor(max_workers=max(options['workers'], 1)) as executor:
+            futures = [executor.submit(_build, name, options['force']) for name in names]
+            for future in as_completed(futures):
+                name, count, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                else:
+                    created += count
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(names)} photos processed, {created} derivatives written, {failed} failed.'))
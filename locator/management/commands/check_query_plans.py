@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from locator.benchmark import plans, runner
+
+
+class Command(BaseCommand):
+    help = ('EXPLAIN the filtered queries behind every locator URL and fail if one reads '
+            'a large table in full. Run it after generate_tower on a scratch database.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=3, help='Sampled URLs per route.')
+        parser.add_argument('--min-rows', type=int, default=plans.MIN_ROWS,
+                            help='Tables with fewer rows may be scanned.')
+        parser.add_argument('--user', default='benchmark',
+                            help='User to log in as; created as a superuser if missing.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options['user'] and not User.objects.filter(username=options['user']).exists():
+            User.objects.create_superuser(options['user'], password=None)
+        try:
+            scans = plans.check(runner.discover_targets(), username=options['user'] or None,
+                                per_target=options['samples'], min_rows=options['min_rows'], seed=options['seed'])
+        except ValueError as exc:
+            raise CommandError(exc)
+
+        for scan in scans:
+            self.stdout.write(f'{scan.url}: full scan of {scan.table}\n  {scan.sql}\n  {scan.plan}')
+        if scans:
+            raise CommandError(f'{len(scans)} queries scan a whole table.')
+        self.stdout.write(self.style.SUCCESS('No full table scans.'))
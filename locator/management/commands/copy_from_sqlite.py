@@ -0,0 +1,125 @@
+import os
+
+from django.apps import apps
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.migrations.executor import MigrationExecutor
+
+from locator import hierarchy, search
+
+
+SOURCE = 'copy_source'
+# Rows that `migrate` creates on the target by itself; they are replaced by the source's.
+REGENERATED = {ContentType, Permission}
+
+
+class Command(BaseCommand):
+    help = ('Copy every table of an existing SQLite database (e.g. db.sqlite3) into the '
+            'configured database, typically a fresh PostgreSQL one, in batches.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Path of the SQLite database file to copy from.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Target database alias.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--migrate-source', action='store_true',
+                            help='Apply missing migrations to the SQLite file before copying.')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete the rows already in the target instead of refusing to copy.')
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['source']):
+            raise CommandError(f"{options['source']} does not exist.")
+        self.target = options['database']
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+
+        self._open_source(options['source'])
+        try:
+            if options['migrate_source']:
+                call_command('migrate', database=SOURCE, verbosity=0)
+            self._check_migrations()
+            call_command('migrate', database=self.target, verbosity=0)
+
+            models = [model for model in apps.get_models(include_auto_created=True)
+                      if model._meta.managed and not model._meta.proxy
+                      and router.allow_migrate_model(self.target, model)]
+            self._check_target(models, options['replace'])
+
+            # FK constraints are deferred until commit, so the table order does not matter.
+            with transaction.atomic(using=self.target):
+                self._flush(models)
+                total = sum(self._copy(model) for model in models)
+                self._reset_sequences(models)
+        finally:
+            connections[SOURCE].close()
+            del connections[SOURCE]
+            del connections.settings[SOURCE]
+
+        hierarchy.invalidate()
+        search.index.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'{total} rows in {len(models)} tables copied.'))
+
+    def _open_source(self, path):
+        settings_dict = connections.configure_settings({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}})[DEFAULT_DB_ALIAS]
+        connections.settings[SOURCE] = settings_dict
+
+    def _check_migrations(self):
+        source = MigrationExecutor(connections[SOURCE])
+        pending = source.migration_plan(source.loader.graph.leaf_nodes())
+        if pending:
+            names = ', '.join(f'{migration.app_label}.{migration.name}' for migration, _ in pending[:5])
+            raise CommandError(f'The SQLite database lacks migrations ({names}...); '
+                               'rerun with --migrate-source or migrate a copy of it first.')
+
+    def _check_target(self, models, replace):
+        filled = [model._meta.db_table for model in models
+                  if model not in REGENERATED and model._base_manager.using(self.target).exists()]
+        if filled and not replace:
+            raise CommandError(f"The target already has data in {', '.join(filled[:5])}; "
+                               'pass --replace to overwrite it.')
+
+    def _flush(self, models):
+        connection = connections[self.target]
+        tables = [model._meta.db_table for model in models]
+        statements = connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+        connection.ops.execute_sql_flush(statements)
+
+    def _copy(self, model) -> int:
+        """Copy one table in primary key order, batch by batch, bypassing save() and signals."""
+        fields = [field for field in model._meta.concrete_fields]
+        connection = connections[self.target]
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)))
+
+        queryset = model._base_manager.using(SOURCE).order_by('pk')
+        copied, last = 0, None
+        while True:
+            batch = queryset if last is None else queryset.filter(pk__gt=last)
+            rows = list(batch.values_list(*[field.attname for field in fields])[:self.batch_size])
+            if not rows:
+                break
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, [
+                    [field.get_db_prep_save(value, connection) for field, value in zip(fields, row)]
+                    for row in rows])
+            copied += len(rows)
+            last = rows[-1][[field.primary_key for field in fields].index(True)]
+            if self.verbosity > 1:
+                self.stdout.write(f'{model._meta.db_table}: {copied}')
+        return copied
+
+    def _reset_sequences(self, models):
+        connection = connections[self.target]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
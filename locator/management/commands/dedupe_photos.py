@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from locator import changes, photos
+from locator.models import Change, Node
+
+
+class Command(BaseCommand):
+    help = ('Move node photos to content-addressed names, merging byte-identical '
+            'duplicates, and delete photo files no node references.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without touching anything.')
+
+    def handle(self, *args, **options):
+        storage = Node._meta.get_field('label').storage
+        dry_run = options['dry_run']
+        moved = 0
+
+        for node in Node.objects.exclude(label='').exclude(label__isnull=True).only('pk', 'label').iterator():
+            name = node.label.name
+            if storage.is_hashed(name) or not storage.exists(name):
+                continue
+            with storage.open(name, 'rb') as f:
+                target = storage.hashed_name(name, f)
+                if not dry_run and not storage.exists(target):
+                    storage.save(name, f)
+            moved += 1
+            self.stdout.write(f'{name} -> {target}')
+            if not dry_run:
+                with transaction.atomic():
+                    Node.objects.filter(pk=node.pk).update(label=target, updated_at=timezone.now())
+                    changes.record(Change.NODE, [node.pk])
+
+        referenced = set(Node.objects.exclude(label='').exclude(label__isnull=True)
+                         .values_list('label', flat=True))
+        removed = 0
+        for name in self._stored_photos(storage, Node._meta.get_field('label').upload_to):
+            if name in referenced:
+                continue
+            removed += 1
+            self.stdout.write(f'orphan {name}')
+            if not dry_run:
+                photos.release(name, storage)
+
+        prefix = '[dry run] ' if dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f'{prefix}{moved} photos rehashed, {removed} orphaned files removed.'))
+
+    def _stored_photos(self, storage, directory):
+        directory = directory.rstrip('/')
+        if not storage.exists(directory):
+            return
+        dirs, files = storage.listdir(directory)
+        for name in files:
+            yield f'{directory}/{name}'
+        for sub in dirs:
+            yield from self._stored_photos(storage, f'{directory}/{sub}')
@@ -0,0 +1,235 @@
+import json
+import os
+import posixpath
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, unquote, urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from locator import hierarchy, views
+from locator.utils import LEVELS, closing_thread_connections
+from locator.models import MotorControlCenter as MCC, Node
+
+
+MANIFEST = '.export-manifest.json'
+ATTR_RE = re.compile(r'\b(href|src|srcset|data-url)="([^"]*)"')
+CHUNK = 50
+
+
+class WholeLevelView(views.LevelView):
+    # One file per level: ?page= links can't be followed offline.
+    paginate_by = None
+
+
+class Command(BaseCommand):
+    help = ('Render the tower guide (hierarchy, node cards, photo derivatives) into a '
+            'self-contained static directory for offline tablets.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory to write the site to.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Threads rendering pages in parallel; 1 renders in the main thread.')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every page, e.g. after a template change.')
+
+    def handle(self, *args, **options):
+        self.output = os.path.abspath(options['output'])
+        os.makedirs(self.output, exist_ok=True)
+        self.factory = RequestFactory()
+        # An unsaved, permissionless user: pages render with the sidebar but no edit links.
+        self.user = User(username='export')
+        self.static_prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.media_prefix = '/' + settings.MEDIA_URL.lstrip('/')
+        self.exported = {'/', reverse('search_node')}
+
+        previous = self._load_manifest()
+        pages = self._pages()
+        self.exported.update(pages)
+        stale = {path: version for path, version in pages.items()
+                 if options['force'] or previous.get('pages', {}).get(path) != version
+                 or not os.path.exists(self._file(path))}
+
+        paths = sorted(stale)
+        chunks = [paths[i:i + CHUNK] for i in range(0, len(paths), CHUNK)]
+        media = set(previous.get('media', []))
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                for referenced in executor.map(self._render_chunk, chunks):
+                    media.update(referenced)
+        else:
+            for chunk in chunks:
+                media.update(self._render_chunk(chunk))
+        media.update(self._write_page(reverse('search_node'), self._render_search()))
+
+        removed = set(previous.get('pages', {})) - set(pages)
+        for path in removed:
+            if os.path.exists(self._file(path)):
+                os.remove(self._file(path))
+
+        self._copy_static()
+        self._copy_media(media)
+        self._write_search_index()
+        self._save_manifest({'pages': pages, 'media': sorted(media)})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(stale)} of {len(pages)} pages rendered, {len(removed)} removed, '
+            f'{len(media)} media files into {self.output}'))
+
+    # Page versions: one query per model instead of one per page.
+
+    def _pages(self) -> dict:
+        navigation = hierarchy.navigation_version()
+        pages = {'/': navigation}
+        for substation in hierarchy.substations():
+            pages[substation.get_absolute_url()] = f'{navigation}:{hierarchy.substation_version(substation)}'
+        for slug, updated_at in MCC.objects.values_list('slug', 'updated_at'):
+            pages[reverse('mcc', kwargs={'mcc_slug': slug})] = f'{navigation}:{updated_at.isoformat()}'
+        for slug, updated_at, mcc_title in (Node.objects.values_list('slug', 'updated_at', 'mcc__title')
+                                            .iterator(chunk_size=2000)):
+            pages[reverse('node-detail', args=(slug,))] = f'{navigation}:{updated_at.isoformat()}:{mcc_title}'
+        # Every level the sidebar links to, plus any other level nodes were imported with.
+        on_levels = {level: (count, last) for level, count, last in
+                     Node.objects.values_list('level').annotate(Count('pk'), Max('updated_at')).order_by()}
+        for level in {level for level, _ in LEVELS} | set(on_levels):
+            count, last = on_levels.get(level, (0, None))
+            version = f"{navigation}:{count}:{last.isoformat() if last else ''}"
+            pages[unquote(reverse('level', args=(level,)))] = version
+        return pages
+
+    # Rendering
+
+    def _render_chunk(self, paths) -> set:
+        media = set()
+        with closing_thread_connections():
+            for path in paths:
+                media.update(self._write_page(path, self._render(path)))
+        return media
+
+    def _render(self, path) -> str:
+        request = self.factory.get(path)
+        request.user = self.user
+        match = resolve(path)
+        if match.url_name == 'level':
+            view = WholeLevelView.as_view()
+        else:
+            view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        if response.status_code != 200:
+            raise CommandError(f'{path} answered {response.status_code}')
+        return response.content.decode(response.charset)
+
+    def _render_search(self) -> str:
+        request = self.factory.get(reverse('search_node'))
+        request.user = self.user
+        return render_to_string('locator/export_search.html', {'title': 'Пошук'}, request=request)
+
+    def _write_page(self, path, html) -> set:
+        media = set()
+        page_dir = posixpath.dirname(self._relative_file(path))
+
+        def relative(url):
+            parts = urlsplit(url)
+            if parts.scheme or parts.netloc or not parts.path.startswith('/'):
+                return url
+            target = unquote(parts.path)
+            if target.startswith(self.media_prefix):
+                media.add(target[len(self.media_prefix):])
+            elif not target.startswith(self.static_prefix):
+                if target not in self.exported:
+                    return '#'
+                target = target + 'index.html'
+            result = quote(posixpath.relpath(target.lstrip('/'), page_dir or '.'))
+            return result + (f'#{parts.fragment}' if parts.fragment else '')
+
+        def rewrite(match):
+            attr, value = match.groups()
+            if attr == 'srcset':
+                value = ', '.join(' '.join([relative(item.split()[0])] + item.split()[1:])
+                                  for item in value.split(',') if item.strip())
+            else:
+                value = relative(value)
+            return f'{attr}="{value}"'
+
+        target = self._file(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'w', encoding='utf-8') as f:
+            f.write(ATTR_RE.sub(rewrite, html))
+        return media
+
+    # Assets
+
+    def _copy_static(self):
+        static_dir = os.path.join(self.output, settings.STATIC_URL.strip('/'))
+        # With DEBUG off the pages link the fingerprinted copies collectstatic wrote.
+        stored_name = getattr(staticfiles_storage, 'stored_name', None)
+        for finder in finders.get_finders():
+            for path, storage in finder.list(['CVS', '.*', '*~']):
+                if not path.startswith('locator/'):
+                    continue
+                self._copy(storage.path(path), os.path.join(static_dir, path))
+                if stored_name is not None:
+                    hashed = stored_name(path)
+                    self._copy(staticfiles_storage.path(hashed), os.path.join(static_dir, hashed))
+
+    def _copy_media(self, names):
+        for name in names:
+            source = os.path.join(settings.MEDIA_ROOT, name)
+            if os.path.exists(source):
+                self._copy(source, os.path.join(self.output, settings.MEDIA_URL.strip('/'), name))
+
+    def _copy(self, source, target):
+        if os.path.exists(target) and os.path.getsize(target) == os.path.getsize(source) \
+                and os.path.getmtime(target) >= os.path.getmtime(source):
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(source, target)
+
+    def _write_search_index(self):
+        entries = [{
+            'slug': slug,
+            'title': title,
+            'level': level,
+            'power': str(power),
+            'mcc': mcc,
+            'substation': substation,
+            'url': self._relative_file(reverse('node-detail', args=(slug,))),
+        } for slug, title, level, power, mcc, substation in Node.objects.order_by('slug').values_list(
+            'slug', 'title', 'level', 'power', 'mcc__title', 'substation__title').iterator(chunk_size=2000)]
+        data = json.dumps(entries, ensure_ascii=False)
+        with open(os.path.join(self.output, 'search-index.json'), 'w', encoding='utf-8') as f:
+            f.write(data)
+        # Browsers refuse fetch() on file:// pages; a script tag still loads.
+        with open(os.path.join(self.output, 'search-index.js'), 'w', encoding='utf-8') as f:
+            f.write(f'window.NODE_INDEX = {data};\n')
+
+    # Paths and manifest
+
+    def _relative_file(self, path) -> str:
+        return path.lstrip('/') + 'index.html'
+
+    def _file(self, path) -> str:
+        return os.path.join(self.output, self._relative_file(path))
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.output, MANIFEST), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest):
+        with open(os.path.join(self.output, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
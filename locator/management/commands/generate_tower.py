@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from locator.benchmark import generator
+from locator.models import DistributiveSubstation as DS, Node
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with a synthetic tower for load testing, e.g. '
+            '--substations 50 --mccs 1000 --nodes 500000 --photos 200.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--substations', type=int, default=5)
+        parser.add_argument('--mccs', type=int, default=11)
+        parser.add_argument('--nodes', type=int, default=141)
+        parser.add_argument('--photos', type=int, default=0, help='Distinct photos shared by the nodes.')
+        parser.add_argument('--photo-share', type=float, default=1.0,
+                            help='Fraction of nodes that get a photo (default: all, when --photos is set).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete every substation, MCC and node first. Never use on the plant database.')
+
+    def handle(self, *args, **options):
+        if min(options['substations'], options['mccs']) < 1 or options['nodes'] < 0:
+            raise CommandError('Need at least one substation and one MCC.')
+        if options['clear']:
+            generator.clear()
+        elif DS.objects.exists() or Node.objects.exists():
+            raise CommandError('The database already holds a tower; pass --clear to replace it.')
+
+        counts = generator.generate_tower(
+            substations=options['substations'], mccs=options['mccs'], nodes=options['nodes'],
+            photos=options['photos'], photo_share=options['photo_share'], seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=(lambda message: self.stdout.write(message)) if options['verbosity'] > 1 else None)
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['substations']} substations, {counts['mccs']} MCCs, {counts['nodes']} nodes "
+            f"and {counts['photos']} photos generated."))
@@ -0,0 +1,175 @@
+import csv
+import json
+import sys
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from locator import changes, hierarchy, search, summaries
+from locator.models import Change, MotorControlCenter as MCC, Node
+
+
+FIELDS = ['title', 'slug', 'level', 'round_per_minute', 'power', 'mcc']
+# Fields with a small value domain; their cleaned values are memoised across rows.
+MEMOISED = {'level', 'round_per_minute', 'power'}
+UPDATED = ['title', 'level', 'round_per_minute', 'power', 'mcc_id', 'substation_id']
+
+
+class Command(BaseCommand):
+    help = ('Import nodes from a CSV or JSON Lines file. Rows need title, slug, level, '
+            'round_per_minute, power and mcc (the MCC slug).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, or '-' for standard input.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help='Input format (default: guessed from the file extension).')
+        parser.add_argument('--upsert', action='store_true',
+                            help='Update nodes whose slug already exists instead of rejecting the row.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and report without writing.')
+        parser.add_argument('--max-errors', type=int, default=50, help='Number of row errors to print.')
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.json')) else 'csv')
+        self.mccs = {slug: (pk, substation_id) for slug, pk, substation_id in
+                     MCC.objects.values_list('slug', 'id', 'substation_id')}
+        self.fields = {name: Node._meta.get_field(name) for name in FIELDS if name != 'mcc'}
+        self.seen = set()
+        self.cleaned = {}
+        self.touched_mccs = set()
+        self.stats = {'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+        self.errors_shown = 0
+        self.options = options
+
+        stream = self._open(options['path'])
+        try:
+            rows = self._read(stream, fmt)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                self._import_batch(batch)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if not options['dry_run'] and (self.stats['created'] or self.stats['updated']):
+            # bulk writes send no model signals
+            summaries.rebuild()
+            hierarchy.invalidate()
+            search.index.invalidate()
+            MCC.objects.filter(pk__in=self.touched_mccs).update(updated_at=timezone.now())
+
+        prefix = '[dry run] ' if options['dry_run'] else ''
+        summary = (f"{prefix}{self.stats['rows']} rows: {self.stats['created']} created, "
+                   f"{self.stats['updated']} updated, {self.stats['unchanged']} unchanged, "
+                   f"{self.stats['invalid']} invalid.")
+        self.stdout.write(self.style.SUCCESS(summary) if not self.stats['invalid'] else self.style.WARNING(summary))
+
+    def _open(self, path):
+        if path == '-':
+            return sys.stdin
+        try:
+            return open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(exc)
+
+    def _read(self, stream, fmt):
+        if fmt == 'csv':
+            for line_no, row in enumerate(csv.DictReader(stream), start=2):
+                yield line_no, row
+            return
+        for line_no, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield line_no, exc
+
+    def _clean(self, row) -> dict:
+        """Apply the NodeForm/model rules to one row without touching the database."""
+        if isinstance(row, Exception):
+            raise ValidationError(str(row))
+        if not isinstance(row, dict):
+            raise ValidationError('row must be an object')
+        missing = [name for name in FIELDS if row.get(name) in (None, '')]
+        if missing:
+            raise ValidationError(f"missing {', '.join(missing)}")
+
+        errors = []
+        values = {}
+        for name, field in self.fields.items():
+            raw = str(row[name]).strip()
+            if name in MEMOISED and (name, raw) in self.cleaned:
+                values[name] = self.cleaned[name, raw]
+                continue
+            try:
+                values[name] = field.clean(raw, None)
+            except ValidationError as exc:
+                errors.extend(f'{name}: {message}' for message in exc.messages)
+                continue
+            if name in MEMOISED:
+                self.cleaned[name, raw] = values[name]
+
+        mcc_slug = str(row['mcc']).strip()
+        if mcc_slug not in self.mccs:
+            errors.append(f'unknown mcc {mcc_slug!r}')
+        else:
+            values['mcc_id'], values['substation_id'] = self.mccs[mcc_slug]
+
+        if values.get('slug') in self.seen:
+            errors.append(f"duplicate slug {values['slug']!r} in input")
+
+        if errors:
+            raise ValidationError(errors)
+        self.seen.add(values['slug'])
+        return values
+
+    def _error(self, line_no, exc: ValidationError):
+        self.stats['invalid'] += 1
+        if self.errors_shown < self.options['max_errors']:
+            self.errors_shown += 1
+            self.stderr.write(f"line {line_no}: {'; '.join(exc.messages)}")
+
+    def _import_batch(self, batch):
+        valid = []
+        for line_no, row in batch:
+            self.stats['rows'] += 1
+            try:
+                valid.append((line_no, self._clean(row)))
+            except ValidationError as exc:
+                self._error(line_no, exc)
+
+        existing = {row['slug']: row for row in Node.objects
+                    .filter(slug__in=[values['slug'] for _, values in valid])
+                    .values('id', *UPDATED, 'slug')}
+        to_create, to_update = [], []
+        for line_no, values in valid:
+            current = existing.get(values['slug'])
+            if current is None:
+                to_create.append(Node(**values))
+            elif not self.options['upsert']:
+                self._error(line_no, ValidationError(f"node {values['slug']!r} already exists"))
+            elif any(current[name] != values[name] for name in UPDATED):
+                to_update.append(Node(pk=current['id'], **values))
+            else:
+                self.stats['unchanged'] += 1
+
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
+        if self.options['dry_run']:
+            return
+        self.touched_mccs.update(node.mcc_id for node in to_create + to_update)
+        self.touched_mccs.update(existing[node.slug]['mcc_id'] for node in to_update)
+        with transaction.atomic():
+            Node.objects.bulk_create(to_create)
+            # INSERT .. ON CONFLICT (slug) DO UPDATE; far cheaper than bulk_update's CASE chains.
+            Node.objects.bulk_create(to_update, update_conflicts=True, unique_fields=['slug'],
+                                     update_fields=[name.removesuffix('_id') for name in UPDATED] + ['updated_at'])
+            # bulk writes send no signals; feed the delta sync log directly
+            written = [node.slug for node in to_create + to_update]
+            changes.record(Change.NODE, Node.objects.filter(slug__in=written).values_list('pk', flat=True))
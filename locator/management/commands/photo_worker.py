@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from locator import jobs
+from locator.models import PhotoJob
+from locator.utils import closing_thread_connections
+
+
+class Command(BaseCommand):
+    help = ('Process queued node photos (orientation, metadata, resizing, derivatives); '
+            'see locator/jobs.py. Runs until interrupted unless --once is given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=os.cpu_count() or 1,
+                            help='Photos processed at the same time; 1 processes in the main thread.')
+        parser.add_argument('--poll', type=float, default=2.0, help='Seconds between looks at an empty queue.')
+        parser.add_argument('--once', action='store_true', help='Exit once no job is due.')
+
+    def handle(self, *args, **options):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f'{requeued} interrupted jobs queued again.')
+        threads = max(options['threads'], 1)
+        if threads == 1:
+            self._serve_inline(options)
+            return
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            running = set()
+            while True:
+                while len(running) < threads and (job := jobs.claim()):
+                    running.add(executor.submit(self._run, job))
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll'])
+                    continue
+                done, running = wait(running, timeout=options['poll'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._report(future.result())
+
+    def _serve_inline(self, options):
+        while True:
+            job = jobs.claim()
+            if job is not None:
+                self._report(self._run(job))
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['poll'])
+
+    def _run(self, job: PhotoJob) -> PhotoJob:
+        with closing_thread_connections():
+            return jobs.run(job)
+
+    def _report(self, job: PhotoJob):
+        if job.status == PhotoJob.DONE:
+            self.stdout.write(f'{job.name}: done' + (f' as {job.result}' if job.result != job.name else ''))
+        else:
+            self.stderr.write(f'{job.name}: {job.status} after {job.attempts} attempts: {job.error}')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from locator import changes, denormalized
+from locator.models import Change
+
+
+class Command(BaseCommand):
+    help = ("Set every node's substation to its MCC's, after writes that bypassed "
+            'Node.save() (QuerySet.update, raw SQL, restored dumps).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--check', action='store_true',
+                            help='Only count the nodes out of step and fail if there are any.')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if options['check']:
+            count = denormalized.stale(using).count()
+            if count:
+                raise CommandError(f'{count} nodes have a substation other than their MCC\'s.')
+            self.stdout.write(self.style.SUCCESS('Every node matches its MCC.'))
+            return
+
+        with transaction.atomic(using=using):
+            ids = denormalized.repair(using)
+            # update() sends no signals; the repaired nodes serialize differently.
+            changes.record(Change.NODE, ids, using=using)
+        self.stdout.write(self.style.SUCCESS(f'{len(ids)} nodes repaired.'))
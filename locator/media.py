@@ -0,0 +1,134 @@
+"""Serving uploaded photos (Node.label and its derivatives) to signed-in users.
+
+Used by views.serve_media under WSGI and async_views.serve_media under ASGI,
+in production as well as with DEBUG. Photos are stored under the SHA-256 of
+their content (storage.ContentAddressedStorage; dedupe_photos renames older
+uploads) and derivatives under the hashed name of their source, so such URLs
+never change content and are sent with a year-long immutable Cache-Control.
+Other files are revalidated with If-Modified-Since on every use. Single byte
+ranges are answered with 206, which lets browsers resume large downloads.
+
+With LOCATOR_MEDIA_SENDFILE the app only checks the login and the file and
+leaves the transfer (and ranges) to the front web server:
+'x-sendfile' (Apache mod_xsendfile, lighttpd) sends the absolute path,
+'x-accel-redirect' (nginx) sends LOCATOR_MEDIA_ACCEL_PREFIX plus the media
+path, which needs an internal location aliased to MEDIA_ROOT.
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.http import Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+
+CHUNK_SIZE = 64 * 1024
+
+# photos/ab/<sha256>.jpg and derivatives/photos/ab/<sha256>/card.webp
+IMMUTABLE_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.[^/]+|/[^/]+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def check_access(user):
+    if not user.is_authenticated:
+        raise PermissionDenied
+
+
+def locate(path: str, root: str = None) -> str:
+    try:
+        return safe_join(root or settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('No such file')
+
+
+def check_file(info: os.stat_result):
+    if not stat.S_ISREG(info.st_mode):
+        raise Http404('No such file')
+
+
+def cache_control(path: str) -> str:
+    # private: only signed-in users may see the photos, so shared caches must not keep them.
+    if IMMUTABLE_RE.search(path):
+        return f"private, max-age={getattr(settings, 'LOCATOR_MEDIA_MAX_AGE', 60 * 60 * 24 * 365)}, immutable"
+    return 'private, no-cache'
+
+
+def byte_range(request, size: int, last_modified: str):
+    """(start, end) of a satisfiable single range, None for the whole file.
+
+    Raises ValueError for a range that starts past the end of the file.
+    Multiple ranges, malformed headers and ranges of a changed file
+    (If-Range) get the whole file, as RFC 9110 allows.
+    """
+    match = RANGE_RE.match(request.headers.get('Range', '').replace(' ', ''))
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range is not None and if_range != last_modified:
+        return None
+    first, last = match.groups()
+    if not first:
+        # bytes=-500: the last 500 bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    if start >= size or size == 0:
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def response(request, path: str, fullpath: str, info: os.stat_result, read_chunks):
+    """The response for a located media file; read_chunks(fullpath, start, length) gives the body."""
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), info.st_mtime):
+        return _with_headers(HttpResponseNotModified(), path, info)
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    sendfile = getattr(settings, 'LOCATOR_MEDIA_SENDFILE', None)
+    if sendfile:
+        result = HttpResponse(content_type=content_type or 'application/octet-stream')
+        if sendfile == 'x-accel-redirect':
+            relative = os.path.relpath(fullpath, settings.MEDIA_ROOT).replace(os.sep, '/')
+            result['X-Accel-Redirect'] = settings.LOCATOR_MEDIA_ACCEL_PREFIX + quote(relative)
+        else:
+            result['X-Sendfile'] = fullpath
+    else:
+        last_modified = http_date(info.st_mtime)
+        try:
+            requested = byte_range(request, info.st_size, last_modified)
+        except ValueError:
+            result = HttpResponse(status=416)
+            result['Content-Range'] = f'bytes */{info.st_size}'
+            return _with_headers(result, path, info)
+        start, end = requested or (0, info.st_size - 1)
+        result = StreamingHttpResponse(read_chunks(fullpath, start, end - start + 1),
+                                       content_type=content_type or 'application/octet-stream')
+        result['Content-Length'] = str(end - start + 1)
+        if requested:
+            result.status_code = 206
+            result['Content-Range'] = f'bytes {start}-{end}/{info.st_size}'
+    if encoding:
+        result['Content-Encoding'] = encoding
+    return _with_headers(result, path, info)
+
+
+def _with_headers(result, path: str, info: os.stat_result):
+    result['Last-Modified'] = http_date(info.st_mtime)
+    result['Cache-Control'] = cache_control(path)
+    result['Accept-Ranges'] = 'bytes'
+    return result
+
+
+def read_chunks(fullpath: str, start: int, length: int):
+    with open(fullpath, 'rb') as f:
+        f.seek(start)
+        while length > 0 and (chunk := f.read(min(CHUNK_SIZE, length))):
+            length -= len(chunk)
+            yield chunk
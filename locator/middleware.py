@@ -0,0 +1,153 @@
+import cProfile
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.urls import reverse
+
+from . import profiling
+from .queries import QueryRecorder
+
+
+logger = logging.getLogger('locator.queries')
+
+
+class QueryInspectorMiddleware:
+    """Record query count, DB time and repeated SQL for every request.
+
+    Adds X-Query-Count / X-Query-Time headers and logs a warning when one SQL
+    fingerprint repeats LOCATOR_N_PLUS_ONE_THRESHOLD times or more, which is
+    almost always a relation fetched per row instead of with select_related.
+    Enabled by LOCATOR_QUERY_INSPECTOR (defaults to DEBUG).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LOCATOR_QUERY_INSPECTOR', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'LOCATOR_N_PLUS_ONE_THRESHOLD', 3)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time'] = f'{recorder.total_time * 1000:.1f}ms'
+
+        view = request.resolver_match.view_name if request.resolver_match else request.path
+        repeated = recorder.duplicates(self.threshold)
+        if repeated:
+            sql, n = repeated[0]
+            logger.warning('Possible N+1 in %s: %d queries, %d runs of %s',
+                           view, recorder.count, n, sql)
+        else:
+            logger.debug('%s: %d queries in %.1f ms', view, recorder.count, recorder.total_time * 1000)
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile one request on demand: X-Profile header or ?_profile= from staff users.
+
+    Stores the profile and SQL timeline (see locator.profiling) and points to them
+    with X-Profile-Id / X-Profile-Url headers. Other requests only pay for one
+    header lookup. Must follow AuthenticationMiddleware; enabled by LOCATOR_PROFILING.
+
+    Under ASGI the event loop thread is profiled: code an async view hands to
+    sync_to_async shows up as time spent waiting, and concurrent requests on the
+    same loop show up too. Profile the WSGI deployment for sync views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'LOCATOR_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.interval = getattr(settings, 'LOCATOR_PROFILE_INTERVAL', 0.001)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        mode = self.requested_mode(request)
+        if mode is None or not request.user.is_staff:
+            return self.get_response(request)
+        with self.profile(request, mode) as result:
+            result['response'] = self.get_response(request)
+        return self.save(request, result)
+
+    async def __acall__(self, request):
+        mode = self.requested_mode(request)
+        if mode is None or not await sync_to_async(lambda: request.user.is_staff)():
+            return await self.get_response(request)
+        with self.profile(request, mode) as result:
+            result['response'] = await self.get_response(request)
+        # Saving writes files; keep it off the event loop.
+        return await sync_to_async(self.save, thread_sensitive=False)(request, result)
+
+    def requested_mode(self, request):
+        flag = request.META.get('HTTP_X_PROFILE') or ('_profile' in request.META.get('QUERY_STRING', '')
+                                                      and request.GET.get('_profile'))
+        return profiling.MODES.get(flag) if flag else None
+
+    @contextmanager
+    def profile(self, request, mode):
+        """Profile the block in this thread; it stores its response in the yielded dict."""
+        result = {'mode': mode, 'recorder': profiling.TimelineRecorder(), 'folded': None, 'profiler': None}
+        start = time.perf_counter()
+        with result['recorder'].record():
+            if mode == 'cprofile':
+                result['profiler'] = cProfile.Profile()
+                result['profiler'].enable()
+                try:
+                    yield result
+                finally:
+                    result['profiler'].disable()
+            else:
+                with profiling.Sampler(threading.get_ident(), self.interval) as sampler:
+                    yield result
+                result['folded'] = sampler.folded()
+        result['duration'] = time.perf_counter() - start
+
+    def save(self, request, result):
+        response, recorder, folded = result['response'], result['recorder'], result['folded']
+        profile_id = profiling.new_id()
+        profiling.save(profile_id, {
+            'id': profile_id,
+            'mode': result['mode'],
+            'method': request.method,
+            'path': request.get_full_path(),
+            'view': request.resolver_match.view_name if request.resolver_match else None,
+            'user': request.user.get_username(),
+            'status': response.status_code,
+            'duration_ms': round(result['duration'] * 1000, 2),
+            'query_count': recorder.count,
+            'query_time_ms': round(recorder.total_time * 1000, 2),
+            'queries': recorder.timeline(),
+        }, folded=folded, profiler=result['profiler'])
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Url'] = reverse('profile_download',
+                                            args=(profile_id, 'folded' if folded is not None else 'prof'))
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:41
+
+from django.db import migrations, models
+import locator.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0003_alter_distributivesubstation_level_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='node',
+            name='label',
+            field=models.ImageField(blank=True, default=None, null=True, storage=locator.storage.ContentAddressedStorage(), upload_to='photos/'),
+        ),
+    ]
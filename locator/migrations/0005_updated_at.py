@@ -0,0 +1,28 @@
+# Generated by Django 4.2.9 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0004_node_label_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='distributivesubstation',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='motorcontrolcenter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='node',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+def seed_changes(apps, schema_editor):
+    # Token 0 must return the whole inventory, parents before children.
+    db = schema_editor.connection.alias
+    Change = apps.get_model('locator', 'Change')
+    for kind, model in [('substation', 'DistributiveSubstation'), ('mcc', 'MotorControlCenter'), ('node', 'Node')]:
+        ids = apps.get_model('locator', model).objects.using(db).order_by('pk').values_list('pk', flat=True)
+        Change.objects.using(db).bulk_create([Change(kind=kind, object_id=pk) for pk in ids.iterator()],
+                                             batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('seq', models.BigAutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('substation', 'Substation'), ('mcc', 'Motor control center'), ('node', 'Node')], max_length=16)),
+                ('object_id', models.IntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='change',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_change_per_object'),
+        ),
+        migrations.RunPython(seed_changes, migrations.RunPython.noop),
+    ]
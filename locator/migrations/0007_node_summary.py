@@ -0,0 +1,39 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:35
+
+from django.db import migrations, models
+
+
+def build_summaries(apps, schema_editor):
+    from locator import summaries
+
+    summaries.rebuild(using=schema_editor.connection.alias, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0006_change'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NodeSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('mcc', 'Motor control center'), ('substation', 'Substation'), ('level', 'Level')], max_length=16)),
+                ('key', models.CharField(max_length=25)),
+                ('node_count', models.PositiveIntegerField(default=0)),
+                ('total_power', models.DecimalField(decimal_places=1, default=0, max_digits=12)),
+                ('max_power', models.DecimalField(decimal_places=1, max_digits=4, null=True)),
+                ('rpm_750', models.PositiveIntegerField(default=0)),
+                ('rpm_1000', models.PositiveIntegerField(default=0)),
+                ('rpm_1500', models.PositiveIntegerField(default=0)),
+                ('rpm_3000', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='nodesummary',
+            constraint=models.UniqueConstraint(fields=('scope', 'key'), name='unique_summary_per_group'),
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
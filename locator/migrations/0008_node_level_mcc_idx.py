@@ -0,0 +1,17 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0007_node_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['level', 'mcc'], name='node_level_mcc_idx'),
+        ),
+    ]
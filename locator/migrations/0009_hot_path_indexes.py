@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 08:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0008_node_level_mcc_idx'),
+    ]
+
+    # The composite indexes are built before the single-column ones they replace are dropped.
+    operations = [
+        migrations.AddIndex(
+            model_name='motorcontrolcenter',
+            index=models.Index(fields=['substation', 'id'], name='mcc_substation_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['mcc', 'id'], name='node_mcc_id_idx'),
+        ),
+        migrations.AlterField(
+            model_name='motorcontrolcenter',
+            name='substation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='motor_centers', to='locator.distributivesubstation'),
+        ),
+        migrations.AlterField(
+            model_name='node',
+            name='mcc',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='nodes', to='locator.motorcontrolcenter'),
+        ),
+    ]
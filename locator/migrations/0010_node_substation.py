@@ -0,0 +1,43 @@
+# Generated by Django 4.2.9 on 2026-10-18 09:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_substations(apps, schema_editor):
+    from locator import denormalized
+
+    denormalized.repair(using=schema_editor.connection.alias, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locator', '0009_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='node',
+            name='substation',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='nodes', to='locator.distributivesubstation'),
+        ),
+        migrations.RunPython(copy_substations, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='node',
+            name='substation',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='nodes', to='locator.distributivesubstation'),
+        ),
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['level', 'substation', 'mcc', 'slug'], name='node_level_substation_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='node',
+            name='node_level_mcc_idx',
+        ),
+        migrations.AddIndex(
+            model_name='node',
+            index=models.Index(fields=['substation', 'id'], name='node_substation_id_idx'),
+        ),
+    ]
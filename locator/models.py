@@ -1,16 +1,19 @@
-from django.db import models
+from django.db import models, router, transaction
 from django.urls import reverse
+from django.utils import timezone
 
 from django.template.defaultfilters import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from locator import utils
+from locator.storage import photo_storage
 
 
 class DistributiveSubstation(models.Model):
     title = models.CharField(max_length=25, choices=utils.DS_CHOICES)
     slug = models.SlugField(unique=True, db_index=True)
     level = models.CharField(max_length=25, choices=utils.LEVELS)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -22,12 +25,25 @@ class DistributiveSubstation(models.Model):
 class MotorControlCenter(models.Model):
     title = models.CharField(max_length=25, choices=utils.MCC_CHOICES)
     slug = models.SlugField(unique=True, db_index=True, blank=True)
-    substation = models.ForeignKey('DistributiveSubstation', on_delete=models.PROTECT, related_name='motor_centers')
+    # Indexed by mcc_substation_id_idx below.
+    substation = models.ForeignKey('DistributiveSubstation', on_delete=models.PROTECT, related_name='motor_centers',
+                                   db_index=False)
+    # Also touched whenever one of its nodes is added, edited or deleted.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # A substation's MCCs in id order: the hierarchy prefetch and ?substation= cursor pages of the API.
+        indexes = [models.Index(fields=['substation', 'id'], name='mcc_substation_id_idx')]
 
 
     def save(self, *args, **kwargs) -> None:
         self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(MotorControlCenter, instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+            # Its nodes carry a copy of the substation (Node.substation).
+            (Node.objects.using(using).filter(mcc_id=self.pk).exclude(substation_id=self.substation_id)
+             .update(substation_id=self.substation_id, updated_at=timezone.now()))
 
     def __str__(self):
         return self.title
@@ -39,14 +55,123 @@ class MotorControlCenter(models.Model):
 class Node(models.Model):
     title = models.CharField(max_length=25)
     slug = models.SlugField(unique=True, db_index=True)
-    label = models.ImageField(upload_to="photos/", default=None, blank=True, null=True,)
+    label = models.ImageField(upload_to="photos/", storage=photo_storage, default=None, blank=True, null=True,)
     level = models.CharField(max_length=25, choices=utils.LEVELS)
     round_per_minute = models.IntegerField(validators=[MinValueValidator(0), MaxValueValidator(3100)])
     power = models.DecimalField(max_digits=4, decimal_places=1,)
-    mcc = models.ForeignKey('MotorControlCenter', on_delete=models.PROTECT, related_name='nodes')
+    # Indexed by node_mcc_id_idx below.
+    mcc = models.ForeignKey('MotorControlCenter', on_delete=models.PROTECT, related_name='nodes', db_index=False)
+    # mcc.substation, copied by save() so per-substation reads need no join; see locator/denormalized.py.
+    substation = models.ForeignKey('DistributiveSubstation', on_delete=models.PROTECT, related_name='nodes',
+                                   editable=False, db_index=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Level pages filter on the level and read in substation, MCC and slug order.
+            models.Index(fields=['level', 'substation', 'mcc', 'slug'], name='node_level_substation_idx'),
+            # An MCC's nodes in id order: MCC pages and ?mcc= cursor pages of the API.
+            models.Index(fields=['mcc', 'id'], name='node_mcc_id_idx'),
+            # A substation's nodes in id order: ?substation= cursor pages of the API.
+            models.Index(fields=['substation', 'id'], name='node_substation_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, so signal handlers can tell what a save changed.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'mcc', 'mcc_id'} & set(update_fields):
+            kwargs['update_fields'] = [*update_fields, 'substation']
+        # post_save adjusts NodeSummary; run it in the transaction that writes the row.
+        using = kwargs.get('using') or router.db_for_write(Node, instance=self)
+        with transaction.atomic(using=using):
+            # Read in the transaction rather than from a cached, possibly since moved, self.mcc.
+            self.substation_id = (MotorControlCenter.objects.using(using).filter(pk=self.mcc_id)
+                                  .values_list('substation_id', flat=True).first())
+            super().save(*args, **kwargs)
+        # The next save of this instance compares against what was just written.
+        self._loaded_values = {field.attname: field.value_from_object(self) for field in self._meta.concrete_fields}
+        self._loaded_values['label'] = self.label.name
 
     def __str__(self):
         return f'{self.title}_{self.slug}'
     
     def get_absolute_url(self):
         return reverse('node-detail', args=(self.slug,))
+
+
+class Change(models.Model):
+    """Latest change of one substation, MCC or node, for the delta sync feed.
+
+    Every save or delete replaces the object's row, so `seq` only grows and the
+    log holds one row per object (deletions stay as tombstones).
+    """
+    SUBSTATION, MCC, NODE = 'substation', 'mcc', 'node'
+    KINDS = [(SUBSTATION, 'Substation'), (MCC, 'Motor control center'), (NODE, 'Node')]
+
+    seq = models.BigAutoField(primary_key=True)
+    kind = models.CharField(max_length=16, choices=KINDS)
+    object_id = models.IntegerField()
+    deleted = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_change_per_object')]
+
+    def __str__(self):
+        return f"{self.seq}: {'deleted' if self.deleted else 'saved'} {self.kind} {self.object_id}"
+
+
+class NodeSummary(models.Model):
+    """Node count, installed power and speed classes of one MCC, substation or level.
+
+    Kept current by locator.summaries, so totals never need a scan of the nodes.
+    `key` is the MCC or substation id, or the level.
+    """
+    MCC, SUBSTATION, LEVEL = 'mcc', 'substation', 'level'
+    SCOPES = [(MCC, 'Motor control center'), (SUBSTATION, 'Substation'), (LEVEL, 'Level')]
+
+    scope = models.CharField(max_length=16, choices=SCOPES)
+    key = models.CharField(max_length=25)
+    node_count = models.PositiveIntegerField(default=0)
+    total_power = models.DecimalField(max_digits=12, decimal_places=1, default=0)
+    max_power = models.DecimalField(max_digits=4, decimal_places=1, null=True)
+    # Nodes per synchronous speed class (8, 6, 4 and 2 pole motors); see summaries.RPM_CLASSES.
+    rpm_750 = models.PositiveIntegerField(default=0)
+    rpm_1000 = models.PositiveIntegerField(default=0)
+    rpm_1500 = models.PositiveIntegerField(default=0)
+    rpm_3000 = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['scope', 'key'], name='unique_summary_per_group')]
+
+    def __str__(self):
+        return f'{self.scope} {self.key}: {self.node_count} nodes, {self.total_power} kW'
+
+
+class PhotoJob(models.Model):
+    """Background processing of one stored node photo; see locator.jobs."""
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUSES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    # Storage name of the photo; Node.label names are shared by identical uploads.
+    name = models.CharField(max_length=255, db_index=True)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # The name the nodes use afterwards: a new one when the photo was normalized.
+    result = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'], name='photojob_due_idx')]
+
+    def __str__(self):
+        return f'{self.name}: {self.status}'
@@ -0,0 +1,61 @@
+import posixpath
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import images
+
+
+def reference_count(name: str) -> int:
+    """Number of nodes whose label points at the stored file `name`."""
+    from .models import Node
+    return Node.objects.filter(label=name).count()
+
+
+def release(name: str, storage) -> bool:
+    """Delete the file and its derivatives once no node references it."""
+    if not name or reference_count(name):
+        return False
+    if storage.exists(name):
+        storage.delete(name)
+    images.delete_derivatives(name)
+    return True
+
+
+def release_on_commit(name: str, storage) -> None:
+    # The row change may still be rolled back, so the file goes only after commit.
+    transaction.on_commit(lambda: release(name, storage))
+
+
+def process(name: str, storage) -> str:
+    """Normalize the stored photo and render its derivatives; returns the name the nodes use afterwards.
+
+    A normalized photo has other bytes, hence another content-addressed name:
+    its nodes are moved to it and the original is released.
+    """
+    from .models import Node
+
+    content = images.normalized(name, storage)
+    if content is not None:
+        new_name = storage.save(posixpath.join(Node._meta.get_field('label').upload_to, content.name), content)
+        if new_name != name:
+            relabel(name, new_name)
+            release(name, storage)
+            name = new_name
+    images.generate_derivatives(name, storage)
+    # Pages and fragments are versioned by Node.updated_at; they now show the derivatives.
+    Node.objects.filter(label=name).update(updated_at=timezone.now())
+    return name
+
+
+def relabel(old_name: str, new_name: str) -> list[int]:
+    """Point the nodes using one stored photo at another."""
+    from . import changes
+    from .models import Change, Node
+
+    with transaction.atomic():
+        pks = list(Node.objects.filter(label=old_name).values_list('pk', flat=True))
+        Node.objects.filter(pk__in=pks).update(label=new_name, updated_at=timezone.now())
+        # update() sends no signals; the nodes serialize with the new label URL.
+        changes.record(Change.NODE, pks)
+    return pks
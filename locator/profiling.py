@@ -0,0 +1,122 @@
+"""On-demand profiling of single requests.
+
+A staff user adds ``X-Profile: sample`` (or ``?_profile=sample``) to a request
+to have it profiled; ``cprofile`` instead of ``sample`` uses cProfile. The
+result is stored under LOCATOR_PROFILE_DIR:
+
+- ``<id>.folded``: sampled stacks in the collapsed format read by flamegraph.pl
+  and speedscope (sample mode),
+- ``<id>.prof``: pstats data for snakeviz or gprof2dot (cprofile mode),
+- ``<id>.json``: request details and the SQL timeline.
+"""
+import cProfile
+import json
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.utils import timezone
+
+from .queries import QueryRecorder
+
+
+MODES = {'1': 'sample', 'sample': 'sample', 'cprofile': 'cprofile'}
+FILES = {'folded': '.folded', 'prof': '.prof', 'json': '.json'}
+_ID_RE = re.compile(r'^\d{8}-\d{6}-[0-9a-f]{8}$')
+
+
+def profile_dir() -> str:
+    return str(getattr(settings, 'LOCATOR_PROFILE_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+def file_path(profile_id: str, kind: str):
+    """Path of a stored profile file, or None for unknown ids and kinds."""
+    if not _ID_RE.match(profile_id) or kind not in FILES:
+        return None
+    path = os.path.join(profile_dir(), profile_id + FILES[kind])
+    return path if os.path.exists(path) else None
+
+
+class Sampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class TimelineRecorder(QueryRecorder):
+    """QueryRecorder that also notes when each statement started."""
+
+    def __init__(self):
+        super().__init__()
+        self.origin = time.perf_counter()
+        self.starts = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.starts.append(time.perf_counter() - self.origin)
+        return super().__call__(execute, sql, params, many, context)
+
+    def timeline(self) -> list[dict]:
+        return [{'start_ms': round(start * 1000, 2), 'duration_ms': round(duration * 1000, 2),
+                 'alias': alias, 'sql': sql}
+                for start, (alias, sql, duration) in zip(self.starts, self.queries)]
+
+
+def new_id() -> str:
+    return f"{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}"
+
+
+def save(profile_id: str, meta: dict, folded: str = None, profiler: cProfile.Profile = None) -> None:
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, profile_id)
+    if folded is not None:
+        with open(base + FILES['folded'], 'w', encoding='utf-8') as f:
+            f.write(folded)
+    if profiler is not None:
+        profiler.dump_stats(base + FILES['prof'])
+    with open(base + FILES['json'], 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    prune(getattr(settings, 'LOCATOR_PROFILE_KEEP', 100))
+
+
+def prune(keep: int) -> None:
+    """Keep only the newest `keep` profiles."""
+    directory = profile_dir()
+    ids = sorted({name.split('.')[0] for name in os.listdir(directory) if _ID_RE.match(name.split('.')[0])})
+    for profile_id in ids[:max(len(ids) - keep, 0)]:
+        for suffix in FILES.values():
+            path = os.path.join(directory, profile_id + suffix)
+            if os.path.exists(path):
+                os.remove(path)
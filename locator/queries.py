@@ -0,0 +1,55 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+
+
+def fingerprint(sql: str) -> str:
+    """SQL with the parameter list collapsed, so repeats of one query compare equal."""
+    return _IN_LIST_RE.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """Execute wrapper recording every SQL statement and its duration on all connections."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((context['connection'].alias, sql, time.perf_counter() - start))
+
+    @contextmanager
+    def record(self):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def total_time(self) -> float:
+        return sum(duration for _, _, duration in self.queries)
+
+    def duplicates(self, threshold: int = 2) -> list[tuple[str, int]]:
+        """Fingerprints executed at least `threshold` times, most repeated first."""
+        counts = Counter(fingerprint(sql) for _, sql, _ in self.queries)
+        return [(sql, n) for sql, n in counts.most_common() if n >= threshold]
+
+    def report(self) -> str:
+        lines = [f'{self.count} queries in {self.total_time * 1000:.1f} ms']
+        lines += [f'  [{alias}] {duration * 1000:.2f} ms  {sql}' for alias, sql, duration in self.queries]
+        for sql, n in self.duplicates():
+            lines.append(f'  repeated {n}x: {sql}')
+        return '\n'.join(lines)
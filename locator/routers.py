@@ -0,0 +1,166 @@
+"""Read replica routing.
+
+Views marked with ``read_replica = True`` (or the ``replica_reads`` decorator)
+read from one of LOCATOR_READ_REPLICAS for GET/HEAD requests; everything else,
+and all reads outside requests (commands, shells), stays on the primary.
+A request that writes pins its client to the primary for
+LOCATOR_REPLICA_PIN_SECONDS through a cookie, so users see their own edits.
+Replicas that are down or lag more than LOCATOR_REPLICA_MAX_LAG seconds are
+skipped until the next check.
+"""
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger('locator.routers')
+
+PIN_COOKIE = 'locator_primary'
+# None outside requests; otherwise {'replica': alias or None, 'wrote': bool}
+_request = ContextVar('locator_replica_request', default=None)
+
+_health_lock = threading.Lock()
+_health = {}  # alias -> (checked_at, healthy)
+
+# Seconds behind the primary; 0 when every received WAL record is replayed.
+PG_LAG_SQL = ('SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+              'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END')
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, 'LOCATOR_READ_REPLICAS', []))
+
+
+def replica_reads(view):
+    """Mark a function view as safe to serve from a replica."""
+    view.read_replica = True
+    return view
+
+
+def check_replica(alias: str) -> bool:
+    """Whether the replica answers and is within LOCATOR_REPLICA_MAX_LAG of the primary."""
+    max_lag = getattr(settings, 'LOCATOR_REPLICA_MAX_LAG', 5)
+    try:
+        with connections[alias].cursor() as cursor:
+            if connections[alias].vendor == 'postgresql':
+                cursor.execute(PG_LAG_SQL)
+                lag = cursor.fetchone()[0]
+                if lag is not None and lag > max_lag:
+                    logger.warning('Replica %s is %.1fs behind, reading from the primary', alias, lag)
+                    return False
+            else:
+                cursor.execute('SELECT 1')
+    except DatabaseError as exc:
+        logger.warning('Replica %s is unavailable (%s), reading from the primary', alias, exc)
+        connections[alias].close()
+        return False
+    return True
+
+
+def healthy_replicas() -> list[str]:
+    """Replicas that passed their last check; checks are repeated every LOCATOR_REPLICA_CHECK_INTERVAL."""
+    interval = getattr(settings, 'LOCATOR_REPLICA_CHECK_INTERVAL', 5)
+    now = time.monotonic()
+    healthy = []
+    for alias in replicas():
+        checked_at, ok = _health.get(alias, (None, False))
+        if checked_at is None or now - checked_at > interval:
+            ok = check_replica(alias)
+            with _health_lock:
+                _health[alias] = (now, ok)
+        if ok:
+            healthy.append(alias)
+    return healthy
+
+
+def is_pinned(request) -> bool:
+    try:
+        return time.time() < float(request.COOKIES.get(PIN_COOKIE, 0))
+    except ValueError:
+        return False
+
+
+class ReplicaRouter:
+    # None leaves the choice to Django: the instance's database, else the primary.
+
+    def db_for_read(self, model, **hints):
+        state = _request.get()
+        if state is None or state['replica'] is None or state['wrote']:
+            return None
+        return state['replica']
+
+    def db_for_write(self, model, **hints):
+        state = _request.get()
+        if state is not None:
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema through replication.
+        return db not in replicas()
+
+
+class ReplicaRoutingMiddleware:
+    """Choose the database for each request; see the module docstring."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'LOCATOR_REPLICA_PIN_SECONDS', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = {'replica': None, 'wrote': False}
+        token = _request.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        # sync_to_async copies the context, so ORM calls in worker threads see this state.
+        state = {'replica': None, 'wrote': False}
+        token = _request.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request.reset(token)
+        return self.pin(response, state)
+
+    def pin(self, response, state):
+        if state['wrote']:
+            response.set_cookie(PIN_COOKIE, str(time.time() + self.pin_seconds),
+                                max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None) or view_func
+        if request.method not in ('GET', 'HEAD') or not getattr(view, 'read_replica', False) or is_pinned(request):
+            return None
+        healthy = healthy_replicas()
+        if healthy:
+            # One replica per request keeps its reads consistent with each other.
+            _request.get()['replica'] = random.choice(healthy)
+        return None
@@ -0,0 +1,296 @@
+"""In-memory node search index.
+
+Node numbers are short strings like ``2_109``, so the whole inventory fits in a
+sorted slug list and a sorted title word list (prefix lookups by bisection)
+plus a trigram posting map (substring and typo-tolerant candidates). The index is built with one query on
+first use, from the primary rather than a possibly lagging replica, and kept
+current by the Node post_save/post_delete signals; other processes rebuild
+when the LOCATOR_SHARED_CACHE version moves.
+"""
+import bisect
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from itertools import groupby
+
+from django.db import DEFAULT_DB_ALIAS
+
+from .utils import SharedVersion
+
+
+EXACT, PREFIX, TITLE_PREFIX, SUBSTRING, FUZZY = 100, 80, 60, 50, 30
+
+# Letters commonly typed for digits in node numbers ("2_4O" for "2_40").
+CONFUSABLES = str.maketrans('oil', '011')
+
+
+@dataclass(frozen=True)
+class Entry:
+    pk: int
+    slug: str
+    title: str
+
+
+@dataclass(frozen=True)
+class Match:
+    entry: Entry
+    score: float
+
+
+def normalize(value: str) -> str:
+    return value.strip().lower()
+
+
+def trigrams(value: str) -> set[str]:
+    padded = f'  {value} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up with limit + 1 once it can not stay within limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NodeIndex:
+    max_fuzzy_candidates = 200
+    max_posting_scan = 5000
+
+    def __init__(self):
+        self.shared_version = SharedVersion('locator:search:version')
+        self._lock = threading.RLock()
+        self._version = None
+        self._loaded = False
+        self._entries = {}
+        self._slugs = []
+        self._by_slug = {}
+        self._words = []
+        self._word_postings = defaultdict(set)
+        self._postings = defaultdict(set)
+
+    # maintenance
+
+    def _ensure_loaded(self):
+        version = self.shared_version.get()
+        if self._loaded and self._version == version:
+            return
+        from .models import Node
+
+        with self._lock:
+            if self._loaded and self._version == version:
+                return
+            self._entries, self._slugs, self._by_slug = {}, [], {}
+            self._words, self._word_postings = [], defaultdict(set)
+            self._postings = defaultdict(set)
+            for pk, slug, title in Node.objects.using(DEFAULT_DB_ALIAS).values_list('pk', 'slug', 'title').iterator():
+                self._add(Entry(pk, slug, title))
+            self._slugs.sort()
+            self._words = sorted(self._word_postings)
+            self._loaded, self._version = True, version
+
+    def _keys(self, entry: Entry) -> set[str]:
+        return trigrams(normalize(entry.slug)) | trigrams(normalize(entry.title))
+
+    def _add(self, entry: Entry, keep_sorted=False):
+        self._entries[entry.pk] = entry
+        key = normalize(entry.slug)
+        self._by_slug[key] = entry.pk
+        if keep_sorted:
+            bisect.insort(self._slugs, key)
+        else:
+            self._slugs.append(key)
+        for gram in self._keys(entry):
+            self._postings[gram].add(entry.pk)
+        for word in set(normalize(entry.title).split()):
+            if keep_sorted and word not in self._word_postings:
+                bisect.insort(self._words, word)
+            self._word_postings[word].add(entry.pk)
+
+    def _remove(self, pk):
+        entry = self._entries.pop(pk, None)
+        if entry is None:
+            return
+        key = normalize(entry.slug)
+        self._by_slug.pop(key, None)
+        i = bisect.bisect_left(self._slugs, key)
+        if i < len(self._slugs) and self._slugs[i] == key:
+            del self._slugs[i]
+        for gram in self._keys(entry):
+            self._postings[gram].discard(pk)
+        for word in set(normalize(entry.title).split()):
+            self._word_postings[word].discard(pk)
+
+    def update(self, pk, slug, title):
+        with self._lock:
+            if self._loaded:
+                self._remove(pk)
+                self._add(Entry(pk, slug, title), keep_sorted=True)
+            self._changed()
+
+    def remove(self, pk):
+        with self._lock:
+            if self._loaded:
+                self._remove(pk)
+            self._changed()
+
+    def _changed(self):
+        # Bumped even when not loaded here: other processes must see the change.
+        # The in-place edit only makes this copy current when nobody else
+        # changed the index since it was last seen; otherwise it rebuilds.
+        version = self.shared_version.bump()
+        if version is None:
+            return
+        if self._loaded and self._version is not None and version == self._version + 1:
+            self._version = version
+        else:
+            self._loaded = False
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+        self.shared_version.bump()
+
+    # lookups
+
+    def search(self, query: str, limit: int = 20) -> list[Match]:
+        """Ranked matches: exact number, number prefix, title word prefix, substring, then typos."""
+        query = normalize(query)
+        if not query:
+            return []
+        self._ensure_loaded()
+        with self._lock:
+            scores = {}
+
+            def offer(pk, score):
+                if score > scores.get(pk, 0):
+                    scores[pk] = score
+
+            variants = [(query, 0)]
+            if any(ch.isdigit() for ch in query) and query.translate(CONFUSABLES) != query:
+                variants.append((query.translate(CONFUSABLES), 5))
+            for variant, penalty in variants:
+                if variant in self._by_slug:
+                    offer(self._by_slug[variant], EXACT - penalty)
+                start = bisect.bisect_left(self._slugs, variant)
+                for key in self._slugs[start:start + limit * 4]:
+                    if not key.startswith(variant):
+                        break
+                    # shorter numbers first: 2_1 before 2_10 before 2_109
+                    offer(self._by_slug[key], PREFIX - penalty - min(len(key) - len(variant), 19))
+
+            start = bisect.bisect_left(self._words, query)
+            for word in self._words[start:start + limit * 4]:
+                if not word.startswith(query):
+                    break
+                for pk in list(self._word_postings[word])[:limit * 4]:
+                    offer(pk, TITLE_PREFIX)
+
+            # Substring and typo candidates come from the trigram postings; they can
+            # not outrank prefix matches, so skip the scan once those fill the page.
+            if len(scores) < limit:
+                self._scan_trigrams(query, offer)
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], self._entries[item[0]].slug))
+            return [Match(self._entries[pk], score) for pk, score in ranked[:limit]]
+
+    def _scan_trigrams(self, query, offer):
+        grams = trigrams(query)
+        shared = Counter()
+        # Rarest grams first; very common ones ("  2") only add noise and time.
+        for gram in sorted(grams, key=lambda gram: len(self._postings.get(gram, ()))):
+            postings = self._postings.get(gram, ())
+            if shared and len(postings) > self.max_posting_scan:
+                break
+            shared.update(postings)
+
+        limit_distance = 1 if len(query) <= 4 else 2
+        for pk, common in shared.most_common(self.max_fuzzy_candidates):
+            entry = self._entries[pk]
+            slug, title = normalize(entry.slug), normalize(entry.title)
+            if len(query) >= 2 and (query in slug or query in title):
+                offer(pk, SUBSTRING)
+                continue
+            distance = edit_distance(query, slug, limit_distance)
+            if distance <= limit_distance:
+                offer(pk, FUZZY - 5 * distance - abs(len(slug) - len(query)))
+            elif common / len(grams | self._keys(entry)) >= 0.3:
+                offer(pk, FUZZY - 15)
+
+
+index = NodeIndex()
+
+
+# Batch lookup of many node numbers, e.g. an isolation list for a shutdown.
+
+MAX_BATCH = 1000
+_SEPARATORS_RE = re.compile(r'[\s,;]+')
+
+
+@dataclass
+class BatchResult:
+    requested: list
+    nodes: list
+    missing: list
+
+    @property
+    def groups(self):
+        return group_nodes(self.nodes)
+
+
+def group_nodes(nodes) -> list:
+    """[(substation, [(mcc, [node, ...]), ...]), ...] of nodes ordered by substation and MCC."""
+    return [(substation, [(mcc, list(nodes)) for mcc, nodes in groupby(group, key=lambda node: node.mcc)])
+            for substation, group in groupby(nodes, key=lambda node: node.substation)]
+
+
+def parse_slugs(text: str) -> list[str]:
+    """Node numbers separated by whitespace, commas or semicolons, duplicates dropped."""
+    return list(dict.fromkeys(slug for slug in _SEPARATORS_RE.split(text or '') if slug))
+
+
+def lookup_batch(slugs) -> BatchResult:
+    """Resolve node numbers with one query, grouped by substation and MCC.
+
+    Raises ValueError for more than MAX_BATCH distinct numbers; callers check
+    the size of user input first rather than drop part of a list.
+    """
+    slugs = _distinct_slugs(slugs)
+    nodes = list(_batch_queryset(slugs))
+    return _batch_result(slugs, nodes)
+
+
+async def alookup_batch(slugs) -> BatchResult:
+    """lookup_batch() for async views."""
+    slugs = _distinct_slugs(slugs)
+    nodes = [node async for node in _batch_queryset(slugs)]
+    return _batch_result(slugs, nodes)
+
+
+def _distinct_slugs(slugs) -> list:
+    slugs = list(dict.fromkeys(slugs))
+    if len(slugs) > MAX_BATCH:
+        raise ValueError(f'{len(slugs)} node numbers given, at most {MAX_BATCH} can be looked up at once')
+    return slugs
+
+
+def _batch_queryset(slugs):
+    from .models import Node
+
+    return (Node.objects.filter(slug__in=slugs)
+            .select_related('mcc', 'substation')
+            .order_by('substation__title', 'substation_id', 'mcc__title', 'mcc_id', 'slug'))
+
+
+def _batch_result(slugs, nodes) -> BatchResult:
+    found = {node.slug for node in nodes}
+    return BatchResult(requested=slugs, nodes=nodes, missing=[slug for slug in slugs if slug not in found])
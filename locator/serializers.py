@@ -0,0 +1,57 @@
+from rest_framework import serializers
+
+from .models import (DistributiveSubstation as DS,
+                     MotorControlCenter as MCC,
+                     Node,
+                     NodeSummary)
+from .summaries import RPM_FIELDS
+
+
+class MCCBriefSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MCC
+        fields = ['id', 'title', 'slug']
+
+
+class SubstationSerializer(serializers.ModelSerializer):
+    motor_centers = MCCBriefSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = DS
+        fields = ['id', 'title', 'slug', 'level', 'motor_centers']
+
+
+class MCCSerializer(serializers.ModelSerializer):
+    substation = serializers.PrimaryKeyRelatedField(read_only=True)
+    substation_title = serializers.CharField(source='substation.title', read_only=True)
+
+    class Meta:
+        model = MCC
+        fields = ['id', 'title', 'slug', 'substation', 'substation_title']
+
+
+class NodeSerializer(serializers.ModelSerializer):
+    mcc = serializers.SlugRelatedField(slug_field='slug', read_only=True)
+    substation = serializers.IntegerField(source='substation_id', read_only=True)
+    substation_title = serializers.CharField(source='substation.title', read_only=True)
+    label = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Node
+        fields = ['id', 'title', 'slug', 'level', 'round_per_minute', 'power',
+                  'mcc', 'substation', 'substation_title', 'label']
+
+    def get_label(self, node: Node):
+        return node.label.url if node.label else None
+
+
+class NodeSummarySerializer(serializers.ModelSerializer):
+    rpm = serializers.SerializerMethodField()
+
+    class Meta:
+        model = NodeSummary
+        fields = ['scope', 'key', 'node_count', 'total_power', 'max_power', 'rpm']
+
+    def get_rpm(self, summary: NodeSummary):
+        """Nodes per synchronous speed class, e.g. {"1500": 12}"""
+        return {name.removeprefix('rpm_'): getattr(summary, name) for name in RPM_FIELDS}
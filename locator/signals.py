@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import (DistributiveSubstation as DS,
+                     MotorControlCenter as MCC,
+                     Node)
+from . import changes, hierarchy, jobs, photos, search, summaries
+
+
+@receiver(post_save, sender=Node)
+def process_label(sender, instance: Node, raw=False, using=None, **kwargs):
+    name = instance.label.name if instance.label else None
+    if raw or not name or getattr(instance, '_loaded_values', {}).get('label') == name:
+        return
+    if jobs.enabled():
+        jobs.enqueue(name, using=using)
+    else:
+        storage = instance.label.storage
+        transaction.on_commit(lambda: jobs.in_background(lambda: _process_label(name, storage)), using=using)
+
+
+def _process_label(name, storage):
+    try:
+        photos.process(name, storage)
+    except (OSError, ValueError):
+        # An unreadable upload keeps the original; derivatives are retried lazily.
+        pass
+
+
+@receiver(pre_save, sender=Node)
+def release_replaced_label(sender, instance: Node, raw=False, **kwargs):
+    loaded = getattr(instance, '_loaded_values', {})
+    old_name = loaded.get('label')
+    if raw or not old_name or old_name == instance.label.name:
+        return
+    photos.release_on_commit(old_name, instance.label.storage)
+
+
+@receiver(post_delete, sender=Node)
+def release_deleted_label(sender, instance: Node, **kwargs):
+    if instance.label:
+        photos.release_on_commit(instance.label.name, instance.label.storage)
+
+
+@receiver(post_save, sender=DS)
+@receiver(post_delete, sender=DS)
+@receiver(post_save, sender=MCC)
+@receiver(post_delete, sender=MCC)
+@receiver(post_delete, sender=Node)
+def invalidate_hierarchy(sender, using=None, **kwargs):
+    # After the commit: a reader rebuilding before it would cache the old rows.
+    transaction.on_commit(hierarchy.invalidate, using=using)
+
+
+@receiver(post_save, sender=Node)
+def update_summaries(sender, instance: Node, created=False, raw=False, using=None, **kwargs):
+    if not raw:
+        summaries.node_saved(instance, created, using)
+
+
+@receiver(post_delete, sender=Node)
+def remove_from_summaries(sender, instance: Node, using=None, **kwargs):
+    summaries.node_deleted(instance, using)
+
+
+@receiver(post_save, sender=MCC)
+@receiver(post_delete, sender=MCC)
+def refresh_substation_summaries(sender, raw=False, using=None, **kwargs):
+    # An MCC moved to another substation takes its nodes along.
+    if not raw:
+        summaries.refresh_substations(using)
+
+
+@receiver(post_save, sender=Node)
+def invalidate_hierarchy_node_counts(sender, instance: Node, created=False, using=None, **kwargs):
+    # The tree carries the MCC and substation summaries: counts, power and speeds.
+    loaded = getattr(instance, '_loaded_values', {})
+    if created or any(loaded.get(name) != getattr(instance, name)
+                      for name in ('mcc_id', 'power', 'round_per_minute')):
+        transaction.on_commit(hierarchy.invalidate, using=using)
+
+
+@receiver(post_save, sender=Node)
+def update_search_index(sender, instance: Node, using=None, **kwargs):
+    # After the commit, so a rolled back save leaves no entry behind.
+    pk, slug, title = instance.pk, instance.slug, instance.title
+    transaction.on_commit(lambda: search.index.update(pk, slug, title), using=using)
+
+
+@receiver(post_delete, sender=Node)
+def remove_from_search_index(sender, instance: Node, using=None, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: search.index.remove(pk), using=using)
+
+
+@receiver(post_save, sender=Node)
+@receiver(post_delete, sender=Node)
+def touch_mcc(sender, instance: Node, **kwargs):
+    # MCC pages are versioned by MotorControlCenter.updated_at.
+    mcc_ids = {instance.mcc_id, getattr(instance, '_loaded_values', {}).get('mcc_id')} - {None}
+    MCC.objects.filter(pk__in=mcc_ids).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=DS)
+@receiver(post_save, sender=MCC)
+@receiver(post_save, sender=Node)
+def record_change(sender, instance, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    changes.record(changes.MODEL_KINDS[sender], [instance.pk], using=using)
+    # Titles and slugs of parents are embedded in the serialized children.
+    if sender is DS:
+        changes.record(changes.Change.MCC, instance.motor_centers.values_list('pk', flat=True), using=using)
+        changes.record_nodes_of(using=using, substation=instance)
+    elif sender is MCC:
+        changes.record_nodes_of(using=using, mcc=instance)
+
+
+@receiver(post_delete, sender=DS)
+@receiver(post_delete, sender=MCC)
+@receiver(post_delete, sender=Node)
+def record_deletion(sender, instance, using=None, **kwargs):
+    changes.record(changes.MODEL_KINDS[sender], [instance.pk], deleted=True, using=using)
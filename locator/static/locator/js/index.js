@@ -12,3 +12,29 @@ function doVisible() {
       myElement.style.display = 'block';
   });
 }
+
+function nodeAutocomplete(inputId, listId) {
+    var input = document.getElementById(inputId);
+    var list = document.getElementById(listId);
+    if (!input || !list) {
+        return;
+    }
+    input.setAttribute('list', listId);
+    input.setAttribute('autocomplete', 'off');
+    input.addEventListener('input', function() {
+        if (!input.value.trim()) {
+            return;
+        }
+        fetch(list.dataset.url + '?q=' + encodeURIComponent(input.value))
+            .then(function(response) { return response.json(); })
+            .then(function(data) {
+                list.innerHTML = '';
+                data.results.forEach(function(item) {
+                    var option = document.createElement('option');
+                    option.value = item.slug;
+                    option.label = item.title;
+                    list.appendChild(option);
+                });
+            });
+    });
+}
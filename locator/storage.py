@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import os
+import re
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+HASHED_NAME_RE = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}\.[^/]+$')
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names files after the SHA-256 of their content.
+
+    Uploading bytes that are already stored returns the existing name instead of
+    writing a suffixed copy, so every distinct photo exists on disk exactly once.
+    Files are shared between nodes; see `release` for reference counted removal.
+    """
+
+    chunk_size = 64 * 1024
+
+    def content_hash(self, content) -> str:
+        digest = hashlib.sha256()
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks(self.chunk_size):
+            digest.update(chunk)
+        content.seek(0)
+        return digest.hexdigest()
+
+    def hashed_name(self, name: str, content) -> str:
+        directory = os.path.dirname(name)
+        ext = os.path.splitext(name)[1].lower()
+        digest = self.content_hash(content)
+        return os.path.join(directory, digest[:2], f'{digest}{ext}').replace('\\', '/')
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
+
+    @staticmethod
+    def is_hashed(name: str) -> bool:
+        return bool(HASHED_NAME_RE.search(name or ''))
+
+
+photo_storage = ContentAddressedStorage()
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with .gz (and, with the brotli package, .br) copies.
+
+    collectstatic writes name.<hash>.css as usual and then a compressed copy of
+    every text asset next to it, so neither views.serve_static nor a front
+    server (nginx gzip_static/brotli_static) compresses per request.
+    """
+
+    # Only url() and @import are rewritten: no source maps are shipped, but
+    # bootstrap.min.css still names its own, which would fail the manifest.
+    patterns = (
+        ('*.css', tuple(pattern for pattern in ManifestStaticFilesStorage.patterns[0][1]
+                        if 'sourceMappingURL' not in str(pattern))),
+    )
+    compressible = ('.css', '.js', '.json', '.map', '.svg', '.txt', '.html', '.xml')
+    # Copies that don't save at least this much are left out.
+    min_saving = 0.05
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(self.compressible):
+                self.compress(name)
+
+    def compress(self, name: str) -> list[str]:
+        with self.open(name) as f:
+            content = f.read()
+        variants = {'.gz': gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(content)
+        written = []
+        for ext, compressed in variants.items():
+            if len(compressed) > len(content) * (1 - self.min_saving):
+                continue
+            if self.exists(name + ext):
+                self.delete(name + ext)
+            written.append(self._save(name + ext, ContentFile(compressed)))
+        return written
@@ -0,0 +1,143 @@
+"""Node count, installed power and speed class totals per MCC, substation and level.
+
+NodeSummary rows are adjusted by the Node post_save/post_delete signals, inside
+the transaction that writes the node (Node.save() is atomic for this), so
+totals are read from a handful of rows instead of a scan of the nodes. Counts
+and sums move by the node's own contribution; the maximum power is recomputed
+for one group, with an indexed query, only when its largest motor leaves.
+Substation rows are the sum of their MCCs' rows. Bulk writers call rebuild().
+"""
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db.models import Case, Count, DecimalField, F, Max, Q, Sum, Value, When
+
+# (highest rpm, field): synchronous speed classes of 8, 6, 4 and 2 pole motors.
+RPM_CLASSES = [(800, 'rpm_750'), (1100, 'rpm_1000'), (1600, 'rpm_1500'), (None, 'rpm_3000')]
+RPM_FIELDS = [name for _, name in RPM_CLASSES]
+TRACKED = ['mcc_id', 'level', 'power', 'round_per_minute']
+
+
+def rpm_class(rpm: int) -> str:
+    for limit, name in RPM_CLASSES:
+        if limit is None or rpm <= limit:
+            return name
+
+
+def _models(apps=global_apps):
+    return (apps.get_model('locator', 'NodeSummary'), apps.get_model('locator', 'Node'),
+            apps.get_model('locator', 'MotorControlCenter'))
+
+
+def _values(source) -> dict:
+    """The tracked fields of a node, normalised as the database returns them."""
+    values = {name: source[name] for name in TRACKED}
+    values['power'] = Decimal(str(values['power'])).quantize(Decimal('0.1'))
+    values['round_per_minute'] = int(values['round_per_minute'])
+    return values
+
+
+def _groups(values) -> list[tuple[str, str, dict]]:
+    """(scope, key, node lookup) of the summaries a node counts towards, substations aside."""
+    return [('mcc', str(values['mcc_id']), {'mcc_id': values['mcc_id']}),
+            ('level', values['level'], {'level': values['level']})]
+
+
+def node_saved(instance, created: bool, using: str) -> None:
+    new = _values({name: getattr(instance, name) for name in TRACKED})
+    loaded = getattr(instance, '_loaded_values', {})
+    if created:
+        old = None
+    elif all(name in loaded for name in TRACKED):
+        old = _values(loaded)
+    else:
+        # An instance saved without being loaded: its previous values are unknown.
+        rebuild(using)
+        return
+    if old == new:
+        return
+    if old is not None:
+        _apply(old, -1, using)
+    _apply(new, 1, using)
+    refresh_substations(using, mcc_ids={new['mcc_id'], old and old['mcc_id']} - {None})
+
+
+def node_deleted(instance, using: str) -> None:
+    loaded = getattr(instance, '_loaded_values', {})
+    values = _values(loaded if all(name in loaded for name in TRACKED)
+                     else {name: getattr(instance, name) for name in TRACKED})
+    _apply(values, -1, using)
+    refresh_substations(using, mcc_ids={values['mcc_id']})
+
+
+def _apply(values, sign: int, using: str) -> None:
+    NodeSummary, Node, _ = _models()
+    power = values['power']
+    for scope, key, lookup in _groups(values):
+        rows = NodeSummary.objects.using(using).filter(scope=scope, key=key)
+        if sign > 0:
+            NodeSummary.objects.using(using).get_or_create(scope=scope, key=key)
+            rows.update(node_count=F('node_count') + 1, total_power=F('total_power') + power,
+                        max_power=Case(When(Q(max_power__isnull=True) | Q(max_power__lt=power), then=Value(power)),
+                                       default=F('max_power'), output_field=DecimalField()),
+                        **{rpm_class(values['round_per_minute']): F(rpm_class(values['round_per_minute'])) + 1})
+            continue
+        if not rows.update(node_count=F('node_count') - 1, total_power=F('total_power') - power,
+                           **{rpm_class(values['round_per_minute']): F(rpm_class(values['round_per_minute'])) - 1}):
+            continue
+        rows.filter(node_count=0).delete()
+        if rows.filter(max_power__lte=power).exists():
+            # The node was (one of) the largest; the row is already written, so the group's rest is current.
+            rows.update(max_power=Node.objects.using(using).filter(**lookup).aggregate(Max('power'))['power__max'])
+
+
+def refresh_substations(using: str = None, mcc_ids=None, apps=global_apps) -> None:
+    """Recompute substation rows from their MCCs' rows: of the MCCs' substations, or all of them."""
+    NodeSummary, _, MCC = _models(apps)
+    mccs = MCC.objects.using(using)
+    if mcc_ids is not None:
+        mccs = mccs.filter(substation__in=mccs.filter(pk__in=mcc_ids).values('substation_id'))
+    substation_of = dict(mccs.values_list('pk', 'substation_id'))
+    totals = {}
+    for row in NodeSummary.objects.using(using).filter(scope='mcc', key__in=[str(pk) for pk in substation_of]):
+        total = totals.setdefault(substation_of[int(row.key)], {
+            'node_count': 0, 'total_power': Decimal(0), 'max_power': None, **{name: 0 for name in RPM_FIELDS}})
+        for name in ['node_count', 'total_power', *RPM_FIELDS]:
+            total[name] += getattr(row, name)
+        if row.max_power is not None and (total['max_power'] is None or row.max_power > total['max_power']):
+            total['max_power'] = row.max_power
+
+    substations = NodeSummary.objects.using(using).filter(scope='substation')
+    if mcc_ids is not None:
+        substations = substations.filter(key__in=[str(pk) for pk in set(substation_of.values())])
+    substations.exclude(key__in=[str(pk) for pk in totals]).delete()
+    for pk, total in totals.items():
+        NodeSummary.objects.using(using).update_or_create(scope='substation', key=str(pk), defaults=total)
+
+
+def rebuild(using: str = None, apps=global_apps) -> None:
+    """Recompute every summary from the nodes, e.g. after bulk_create() or a raw import."""
+    NodeSummary, Node, _ = _models(apps)
+    aggregates = {
+        'node_count': Count('pk'),
+        'total_power': Sum('power'),
+        'max_power': Max('power'),
+        **{name: Count('pk', filter=_rpm_filter(name)) for name in RPM_FIELDS},
+    }
+    rows = []
+    for scope, field in [('mcc', 'mcc_id'), ('level', 'level')]:
+        for group in Node.objects.using(using).order_by().values(field).annotate(**aggregates):
+            rows.append(NodeSummary(scope=scope, key=str(group.pop(field)), **group))
+    NodeSummary.objects.using(using).all().delete()
+    NodeSummary.objects.using(using).bulk_create(rows, batch_size=2000)
+    refresh_substations(using, apps=apps)
+
+
+def _rpm_filter(name: str) -> Q:
+    lower = None
+    for limit, field in RPM_CLASSES:
+        if field == name:
+            q = Q() if lower is None else Q(round_per_minute__gt=lower)
+            return q & Q(round_per_minute__lte=limit) if limit is not None else q
+        lower = limit
+
@@ -1,11 +1,32 @@
 from django import template
+from django.conf import settings
 
-from locator.models import (DistributiveSubstation as DS,
-                            MotorControlCenter as MCC)
+from locator import hierarchy, images, utils
 
 register = template.Library()
 
 
 @register.inclusion_tag('locator/room_list.html')
 def show_substations():
-    return {'rooms': DS.objects.all(),}
+    return {
+        'rooms': hierarchy.substations(),
+        'version': hierarchy.navigation_version(),
+        'levels': [level for level, _ in utils.LEVELS],
+        'fragment_cache_timeout': getattr(settings, 'LOCATOR_FRAGMENT_CACHE_TIMEOUT', 0),
+    }
+
+
+@register.inclusion_tag('locator/node_photo.html')
+def node_photo(node, rendition='card', sizes='15em', css_class='node-image'):
+    """<picture> with WebP/JPEG srcsets so the browser picks the smallest fitting derivative."""
+    if not node.label:
+        return {'photo': None}
+    return {
+        'photo': node.label,
+        'src': images.derivative_url(node.label, rendition),
+        'webp_srcset': images.srcset(node.label, 'webp'),
+        'jpeg_srcset': images.srcset(node.label, 'jpeg'),
+        'sizes': sizes,
+        'css_class': css_class,
+        'alt': f'{node.title} {node.slug}',
+    }
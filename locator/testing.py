@@ -0,0 +1,29 @@
+from .queries import QueryRecorder
+
+
+class QueryBudgetMixin:
+    """TestCase mixin failing a test when a URL needs more queries than budgeted.
+
+    Declare budgets as ``query_budgets = {url: max_queries}`` and call
+    ``assertQueryBudgets()``, or check one URL with ``assertQueryBudget``.
+    Repeated SQL (N+1) fails as well unless ``allow_repeats`` is set.
+    """
+
+    query_budgets = {}
+    n_plus_one_threshold = 3
+
+    def assertQueryBudget(self, url, budget, method='get', allow_repeats=False, **kwargs):
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = getattr(self.client, method)(url, **kwargs)
+        if recorder.count > budget:
+            self.fail(f'{url} ran {recorder.count} queries, budget is {budget}\n{recorder.report()}')
+        repeated = recorder.duplicates(self.n_plus_one_threshold)
+        if repeated and not allow_repeats:
+            self.fail(f'{url} repeats SQL {repeated[0][1]} times (N+1)\n{recorder.report()}')
+        return response
+
+    def assertQueryBudgets(self, **kwargs):
+        for url, budget in self.query_budgets.items():
+            with self.subTest(url=url):
+                self.assertQueryBudget(url, budget, **kwargs)
@@ -0,0 +1,75 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        """Create two substations with an MCC and three nodes each"""
+        for i in (1, 2):
+            substation = DS.objects.create(title=f'РП-{i}', slug=f'rp-{i}', level='4.8')
+            mcc = MCC.objects.create(title=f'MCC-{i}', substation=substation)
+            for j in range(3):
+                Node.objects.create(title=f'Node {j}', slug=f'{i}_{j}', level='21.0' if j else '4.8',
+                                    round_per_minute=1000 * j, power=5 * (j + 1), mcc=mcc)
+        cls.user = User.objects.create_user('technician', password='password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_requires_sign_in(self):
+        self.client.logout()
+        for url in [reverse('api-node-list', kwargs={'version': 'v1'}),
+                    reverse('api-node-batch', kwargs={'version': 'v1'}) + '?slugs=1_1',
+                    reverse('api-sync-list', kwargs={'version': 'v1'})]:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_node_list_query_count_is_constant(self):
+        """The node list costs one query regardless of how many rows it returns"""
+        # plus the session and the user
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('api-node-list', kwargs={'version': 'v1'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 6)
+        self.assertEqual(response.json()['results'][0]['substation_title'], 'РП-1')
+
+    def test_substation_list_prefetches_mccs(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('api-substation-list', kwargs={'version': 'v1'}))
+        self.assertEqual(response.json()['results'][0]['motor_centers'][0]['slug'], 'mcc-1')
+
+    def test_node_filters(self):
+        url = reverse('api-node-list', kwargs={'version': 'v1'})
+        response = self.client.get(url, {'mcc': 'mcc-2', 'level': '21.0', 'power_min': 12})
+        self.assertEqual([n['slug'] for n in response.json()['results']], ['2_2'])
+        response = self.client.get(url, {'substation': DS.objects.get(slug='rp-1').pk, 'rpm_max': 1000})
+        self.assertEqual([n['slug'] for n in response.json()['results']], ['1_0', '1_1'])
+
+    def test_cursor_pagination(self):
+        url = reverse('api-node-list', kwargs={'version': 'v1'})
+        first = self.client.get(url, {'page_size': 4}).json()
+        self.assertEqual(len(first['results']), 4)
+        second = self.client.get(first['next']).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+
+    def test_node_detail_by_slug(self):
+        response = self.client.get(reverse('api-node-detail', kwargs={'version': 'v1', 'slug': '1_2'}))
+        self.assertEqual(response.json()['mcc'], 'mcc-1')
+
+    def test_etag_not_modified(self):
+        url = reverse('api-mcc-list', kwargs={'version': 'v1'})
+        response = self.client.get(url)
+        self.assertIn('ETag', response)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_version(self):
+        response = self.client.get('/api/v2/nodes/')
+        self.assertEqual(response.status_code, 404)
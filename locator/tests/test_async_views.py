@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import tempfile
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import re_path, reverse
+
+from locator import async_urls, hierarchy, search, urls as locator_urls
+from locator.async_views import serve_media
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+# What ROOT_URLCONF amounts to with LOCATOR_ASYNC_VIEWS=1.
+urlpatterns = async_urls.urlpatterns + locator_urls.urlpatterns + [
+    re_path(r'^media/(?P<path>.*)$', serve_media),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        hierarchy.invalidate()
+        search.index.invalidate()
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title='MCC-1', substation=self.substation)
+        for i in range(3):
+            Node.objects.create(title=f'Node {i}', slug=f'1_{i}', level='4.8', round_per_minute=1000,
+                                power=7.5, mcc=self.mcc)
+        hierarchy.substations()
+        user = User.objects.create_user('technician', password='password')
+        self.client.force_login(user)
+        self.async_client.force_login(user)
+        self.pages = [
+            reverse('home'),
+            reverse('substation', kwargs={'sub_num': self.substation.pk}),
+            reverse('mcc', kwargs={'mcc_slug': self.mcc.slug}),
+            reverse('node-detail', kwargs={'slug': '1_1'}),
+        ]
+
+    def sync_json(self, url):
+        with override_settings(ROOT_URLCONF='config.urls'):
+            return self.client.get(url).json()
+
+    async def test_pages_match_sync_etags(self):
+        """The async pages render with the same ETag as the sync views and answer 304 to it."""
+        for url in self.pages:
+            with self.subTest(url=url):
+                with override_settings(ROOT_URLCONF='config.urls'):
+                    expected = (await self.async_client.get(url))['ETag']
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['ETag'], expected)
+                self.assertIn('Last-Modified', response)
+                revalidated = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual(revalidated.status_code, 304)
+
+    async def test_missing_page(self):
+        """Unknown slugs fall through to the view's 404."""
+        response = await self.async_client.get(reverse('node-detail', kwargs={'slug': '9_9'}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_page_served_from_cache(self):
+        """The second request is answered from the page cache."""
+        url = self.pages[2]
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertTrue(await cache.aget(f"locator:page:{first['ETag']}"))
+
+    def test_api_matches_drf(self):
+        """Node, batch and sync responses are the ones the DRF views send."""
+        urls = [
+            reverse('api-node-detail', kwargs={'version': 'v1', 'slug': '1_1'}),
+            reverse('api-node-batch', kwargs={'version': 'v1'}) + '?slugs=1_0,1_2,9_9',
+            reverse('api-sync-list', kwargs={'version': 'v1'}) + '?limit=2',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.json(), self.sync_json(url))
+
+    async def test_api_not_modified(self):
+        """API responses carry a content ETag and answer If-None-Match with 304."""
+        url = reverse('api-node-detail', kwargs={'version': 'v1', 'slug': '1_1'})
+        response = await self.async_client.get(url)
+        self.assertIn('ETag', response)
+        revalidated = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_api_errors(self):
+        """Unknown nodes and bad parameters get DRF's error bodies."""
+        response = await self.async_client.get(reverse('api-node-detail', kwargs={'version': 'v1', 'slug': '9_9'}))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content), {'detail': 'Not found.'})
+        response = await self.async_client.get(reverse('api-sync-list', kwargs={'version': 'v1'}), {'since': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', json.loads(response.content))
+        response = await self.async_client.get(reverse('api-node-batch', kwargs={'version': 'v1'}))
+        self.assertEqual(response.status_code, 400)
+
+    async def test_api_requires_sign_in(self):
+        """Requests without a session user are left to DRF, which refuses them."""
+        await sync_to_async(self.async_client.logout)()
+        for url in [reverse('api-node-detail', kwargs={'version': 'v1', 'slug': '1_1'}),
+                    reverse('api-node-batch', kwargs={'version': 'v1'}) + '?slugs=1_1',
+                    reverse('api-sync-list', kwargs={'version': 'v1'})]:
+            with self.subTest(url=url):
+                self.assertEqual((await self.async_client.get(url)).status_code, 403)
+
+    def test_other_requests_go_to_drf(self):
+        """POST, the browsable API and filters are handled by the DRF views."""
+        url = reverse('api-node-batch', kwargs={'version': 'v1'})
+        response = self.client.post(url, {'slugs': ['1_0']}, content_type='application/json')
+        self.assertEqual(response.json()['found'], 1)
+        response = self.client.get(url, {'slugs': '1_0'}, HTTP_ACCEPT='text/html')
+        self.assertIn('text/html', response['Content-Type'])
+
+    async def test_autocomplete_requires_permission(self):
+        """Autocomplete keeps the view_node permission check."""
+        url = reverse('autocomplete_node')
+        self.assertEqual((await self.async_client.get(url, {'q': '1_'})).status_code, 403)
+
+        user = await User.objects.acreate(username='viewer')
+        await user.user_permissions.aadd(await Permission.objects.aget(codename='view_node'))
+        await sync_to_async(self.async_client.force_login)(user)
+        response = await self.async_client.get(url, {'q': '1_1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content)['results'][0]['slug'], '1_1')
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ServeMediaTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        os.makedirs(os.path.join(self.media_root, 'photos'))
+        self.content = os.urandom(200 * 1024)
+        with open(os.path.join(self.media_root, 'photos', 'pump.jpg'), 'wb') as f:
+            f.write(self.content)
+        self.async_client.force_login(User.objects.create_user('operator', password='password'))
+
+    async def test_streams_file(self):
+        """Files are streamed in chunks with their size, type and modification time."""
+        response = await self.async_client.get('/media/photos/pump.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content)
+
+        revalidated = await self.async_client.get('/media/photos/pump.jpg',
+                                                  headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    async def test_range(self):
+        response = await self.async_client.get('/media/photos/pump.jpg', headers={'Range': 'bytes=1000-70999'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 1000-70999/{len(self.content)}')
+        self.assertEqual(b''.join([chunk async for chunk in response.streaming_content]), self.content[1000:71000])
+
+    async def test_login_required(self):
+        await sync_to_async(self.async_client.logout)()
+        self.assertEqual((await self.async_client.get('/media/photos/pump.jpg')).status_code, 403)
+
+    async def test_missing_and_outside_files(self):
+        """Missing files, directories and paths outside MEDIA_ROOT are 404s."""
+        for path in ('/media/photos/none.jpg', '/media/photos/', '/media/../manage.py'):
+            with self.subTest(path=path):
+                self.assertEqual((await self.async_client.get(path)).status_code, 404)
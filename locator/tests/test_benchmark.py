@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from locator import denormalized
+from locator.benchmark import generator
+from locator.benchmark import plans, runner
+from locator.models import (Change,
+                            DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node,
+                            NodeSummary,
+                            PhotoJob)
+
+
+class GenerateTowerTestCase(TestCase):
+    def test_generates_requested_scale(self):
+        call_command('generate_tower', substations=3, mccs=7, nodes=250, batch_size=100, stdout=StringIO())
+        self.assertEqual((DS.objects.count(), MCC.objects.count(), Node.objects.count()), (3, 7, 250))
+        self.assertEqual(MCC.objects.filter(nodes__isnull=True).count(), 0)
+        self.assertEqual(Change.objects.filter(kind=Change.NODE).count(), 250)
+        self.assertFalse(denormalized.stale().exists())
+
+    def test_refuses_existing_tower(self):
+        DS.objects.create(title='РП-4', slug='rp-4', level='4.8')
+        with self.assertRaises(CommandError):
+            call_command('generate_tower', stdout=StringIO())
+        call_command('generate_tower', substations=1, mccs=1, nodes=5, clear=True, stdout=StringIO())
+        self.assertFalse(DS.objects.filter(slug='rp-4', title='РП-4').exists())
+
+
+    def test_clear_empties_every_table(self):
+        """clear() leaves no change log tombstones, summaries or photo jobs behind"""
+        generator.generate_tower(substations=2, mccs=3, nodes=40)
+        PhotoJob.objects.create(name='photos/bench_0.jpg')
+        with self.assertNumQueries(12):
+            generator.clear()
+        for model in (DS, MCC, Node, Change, NodeSummary, PhotoJob):
+            self.assertFalse(model.objects.exists(), model.__name__)
+
+
+class BenchmarkTestCase(TestCase):
+    def setUp(self):
+        call_command('generate_tower', substations=2, mccs=3, nodes=30, stdout=StringIO())
+
+    def test_every_url_is_targeted(self):
+        names = {target.name for target in runner.discover_targets()}
+        self.assertTrue({'home', 'substation', 'mcc', 'node-detail', 'search_node',
+                         'api-node-list', 'api-node-detail', 'api-sync-list'} <= names)
+        self.assertNotIn('logout_user', names)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 50), 50)
+        self.assertEqual(runner.percentile(values, 99), 99)
+        self.assertIsNone(runner.percentile([], 95))
+
+    def test_results_file(self):
+        output = os.path.join(tempfile.mkdtemp(), 'results.json')
+        self.addCleanup(os.remove, output)
+        call_command('benchmark', workers=1, requests=2, warmup=0, output=output, stdout=StringIO())
+        with open(output, encoding='utf-8') as f:
+            results = json.load(f)
+        self.assertEqual(results['dataset']['nodes'], 30)
+        self.assertEqual(results['total']['errors'], 0)
+        self.assertEqual(results['urls']['node-detail']['requests'], 2)
+        self.assertGreater(results['urls']['node-detail']['queries_mean'], 0)
+
+        out = StringIO()
+        call_command('benchmark', workers=1, requests=2, warmup=0, urls=['home'], compare=output, stdout=out)
+        self.assertIn('home', out.getvalue().split('Compared with')[1])
+
+
+class QueryPlanTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_tower', substations=5, mccs=60, nodes=3000, stdout=StringIO())
+
+    def test_no_full_table_scans(self):
+        out = StringIO()
+        call_command('check_query_plans', samples=2, stdout=out)
+        self.assertIn('No full table scans', out.getvalue())
+
+    def test_detects_full_scan(self):
+        sql, params = Node.objects.filter(title='Pump').query.sql_with_params()
+        plan = plans.explain('default', sql, params)
+        self.assertIn('locator_node', plans.scanned_tables('default', plan))
+        self.assertEqual(plans.large_tables(), {'locator_node', 'locator_change'})
+
+        sql, params = Node.objects.filter(mcc__slug='mcc-1').order_by('id').query.sql_with_params()
+        self.assertEqual(plans.scanned_tables('default', plans.explain('default', sql, params)), set())
@@ -0,0 +1,188 @@
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache, caches
+from django.template import engines
+from django.template.loaders import cached
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils.cache import patch_vary_headers
+
+from locator import hierarchy, views
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class ConditionalPageTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        hierarchy.invalidate()
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=self.substation)
+        self.node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc)
+        hierarchy.substations()
+        self.urls = [
+            reverse('home'),
+            reverse('substation', kwargs={'sub_num': self.substation.pk}),
+            reverse('mcc', kwargs={'mcc_slug': self.mcc.slug}),
+            reverse('node-detail', kwargs={'slug': self.node.slug}),
+        ]
+
+    def test_headers(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                self.assertIn('Last-Modified', response)
+                self.assertIn('no-cache', response['Cache-Control'])
+                self.assertIn('private', response['Cache-Control'])
+
+    def test_not_modified(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_since(self):
+        url = reverse('node-detail', kwargs={'slug': self.node.slug})
+        last_modified = self.client.get(url)['Last-Modified']
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_hierarchy_pages_revalidate_without_queries(self):
+        for url in self.urls[:2]:
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(0):
+                self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_page_served_from_cache(self):
+        url = reverse('mcc', kwargs={'mcc_slug': self.mcc.slug})
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(first.content, second.content)
+
+    def test_node_edit_invalidates_mcc_and_node_pages(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls[2:]]
+        self.node.title = 'Pump'
+        self.node.save()
+        for url, etag in zip(self.urls[2:], etags):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, 'Pump')
+
+    def test_node_added_invalidates_substation_page(self):
+        url = self.urls[1]
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Node.objects.create(title="Node 2", slug="1_2", level="4.8", round_per_minute=1000, power=7.5,
+                                mcc=self.mcc)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_depends_on_permission_class(self):
+        url = self.urls[2]
+        anonymous = self.client.get(url)['ETag']
+        User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Вийти')
+
+    def test_signed_in_users_share_pages(self):
+        """Users with different permissions see the same markup, so they share the ETag and the cached page"""
+        url = self.urls[2]
+        technician = User.objects.create_user(username='technician', password='password')
+        self.client.force_login(technician)
+        etag = self.client.get(url)['ETag']
+        editor = User.objects.create_user(username='editor', password='password')
+        editor.user_permissions.add(Permission.objects.get(codename='change_node'))
+        self.client.force_login(editor)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_cached_page_keeps_headers(self):
+        url = self.urls[2]
+        render = views.MCCView.render_to_response
+
+        def with_headers(view, context, **kwargs):
+            response = render(view, context, **kwargs)
+            response['Content-Language'] = 'uk'
+            patch_vary_headers(response, ['Accept-Language'])
+            return response
+
+        with mock.patch.object(views.MCCView, 'render_to_response', with_headers):
+            first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(url)
+        self.assertEqual(second['Content-Language'], 'uk')
+        self.assertEqual(second['Vary'], first['Vary'])
+        self.assertIn('Accept-Language', second['Vary'])
+
+    def test_missing_objects_still_404(self):
+        self.assertEqual(self.client.get('/mcc/missing/').status_code, 404)
+        self.assertEqual(self.client.get('/node/missing/').status_code, 404)
+        self.assertEqual(self.client.get('/substation/999/').status_code, 404)
+
+
+@override_settings(LOCATOR_PAGE_CACHE=False)
+class FragmentCacheTestCase(TestCase):
+    def setUp(self):
+        caches['template_fragments'].clear()
+        hierarchy.invalidate()
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=self.substation)
+        self.node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc)
+        self.mcc_url = reverse('mcc', kwargs={'mcc_slug': self.mcc.slug})
+        self.node_url = reverse('node-detail', kwargs={'slug': self.node.slug})
+
+    def test_node_grid_skips_node_query(self):
+        first = self.client.get(self.mcc_url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.mcc_url)
+        self.assertEqual(first.content, second.content)
+
+    def test_fragments_follow_edits(self):
+        self.client.get(self.mcc_url)
+        self.client.get(self.node_url)
+        self.node.title = 'Pump'
+        self.node.save()
+        self.assertContains(self.client.get(self.mcc_url), 'Pump')
+        self.assertContains(self.client.get(self.node_url), 'Pump')
+
+    def test_node_card_kept_on_sibling_edit(self):
+        """Editing another node of the MCC bumps its updated_at, but the card only shows the MCC title"""
+        fragments = caches['template_fragments']
+        self.client.get(self.node_url)
+        Node.objects.create(title="Fan", slug="1_2", level="4.8", round_per_minute=1000, power=7.5, mcc=self.mcc)
+        with mock.patch.object(fragments, 'set', wraps=fragments.set) as cache_set:
+            self.client.get(self.node_url)
+        self.assertFalse([call for call in cache_set.call_args_list if 'node_card' in call.args[0]])
+
+        self.mcc.title = 'MCC-9'
+        self.mcc.save()
+        self.assertContains(self.client.get(self.node_url), 'MCC-9')
+
+    def test_substation_lists_follow_new_mccs(self):
+        User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        url = reverse('substation', kwargs={'sub_num': self.substation.pk})
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            MCC.objects.create(title='MCC-2', substation=self.substation)
+            DS.objects.create(title='РП-2', slug='rp-2', level='4.8')
+        response = self.client.get(url)
+        self.assertContains(response, 'MCC-2')
+        self.assertContains(response, 'РП-2')
+
+    @override_settings(LOCATOR_FRAGMENT_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        self.client.get(self.mcc_url)
+        with self.assertNumQueries(2):
+            self.client.get(self.mcc_url)
+
+    def test_cached_template_loader(self):
+        loaders = engines['django'].engine.template_loaders
+        self.assertIsInstance(loaders[0], cached.Loader)
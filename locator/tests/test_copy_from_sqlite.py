@@ -0,0 +1,63 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TestCase
+
+from locator.models import (Change,
+                            DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+SOURCE = 'test_sqlite_source'
+
+
+class CopyFromSqliteTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.path = os.path.join(tempfile.mkdtemp(), 'source.sqlite3')
+        connections.settings[SOURCE] = connections.configure_settings({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': cls.path}})[DEFAULT_DB_ALIAS]
+        call_command('migrate', database=SOURCE, verbosity=0)
+        substation = DS.objects.using(SOURCE).create(title='РП-4', slug='rp-4', level='4.8')
+        mcc = MCC.objects.using(SOURCE).create(title='MCC-1', substation=substation)
+        for i in range(7):
+            Node.objects.using(SOURCE).create(title=f'Pump {i}', slug=f'4_{i}', level='4.8',
+                                              round_per_minute=1500, power='7.5', mcc=mcc)
+        connections[SOURCE].close()
+        del connections[SOURCE]
+        del connections.settings[SOURCE]
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+        super().tearDownClass()
+
+    def test_copies_rows_and_keys(self):
+        out = StringIO()
+        call_command('copy_from_sqlite', self.path, batch_size=3, stdout=out)
+        self.assertIn('rows', out.getvalue())
+        self.assertEqual(Node.objects.count(), 7)
+        node = Node.objects.select_related('mcc__substation').get(slug='4_6')
+        self.assertEqual(node.mcc.substation.slug, 'rp-4')
+        self.assertEqual(str(node.power), '7.5')
+        self.assertEqual(Change.objects.filter(kind=Change.NODE).count(), 7)
+        # sequences continue after the copied keys
+        new = MCC.objects.create(title='MCC-2', substation=node.mcc.substation)
+        self.assertGreater(new.pk, node.mcc.pk)
+
+    def test_refuses_filled_target(self):
+        DS.objects.create(title='РП-5', slug='rp-5', level='4.8')
+        with self.assertRaises(CommandError):
+            call_command('copy_from_sqlite', self.path, stdout=StringIO())
+        call_command('copy_from_sqlite', self.path, replace=True, stdout=StringIO())
+        self.assertEqual(list(DS.objects.values_list('slug', flat=True)), ['rp-4'])
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('copy_from_sqlite', '/nonexistent.sqlite3', stdout=StringIO())
@@ -0,0 +1,104 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from urllib.parse import quote
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from locator import hierarchy
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+from locator.tests.test_images import make_photo
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportSiteTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        hierarchy.invalidate()
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=self.substation)
+        self.node = Node.objects.create(title="Pump", slug="1_1", level="4.8", round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc, label=make_photo())
+        Node.objects.create(title="Fan", slug="1_2", level="4.8", round_per_minute=1000, power=7.5, mcc=self.mcc)
+
+    def export(self, **options):
+        out = StringIO()
+        call_command('export_site', self.output, workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def read(self, path):
+        with open(os.path.join(self.output, path), encoding='utf-8') as f:
+            return f.read()
+
+    def test_pages_and_assets_written(self):
+        self.assertIn('14 of 14 pages rendered', self.export())
+        for path in ['index.html', f'substation/{self.substation.pk}/index.html', 'mcc/mcc-1/index.html',
+                     'node/1_1/index.html', 'node/1_2/index.html', 'level/4.8/index.html', 'search/index.html',
+                     'static/locator/css/styles.css', 'search-index.json', 'search-index.js']:
+            self.assertTrue(os.path.exists(os.path.join(self.output, path)), path)
+
+    def test_links_are_relative(self):
+        self.export()
+        html = self.read('mcc/mcc-1/index.html')
+        self.assertIn('href="../../node/1_1/index.html"', html)
+        self.assertIn('href="../../static/locator/css/styles.css"', html)
+        self.assertNotIn('href="/', html)
+        self.assertNotIn('src="/', html)
+
+    def test_level_pages(self):
+        """Sidebar level links lead to exported pages listing the whole level"""
+        self.export()
+        html = self.read('index.html')
+        self.assertIn('href="level/4.8/index.html"', html)
+        self.assertIn(f'href="{quote("level/Не вказaно/index.html")}"', html)
+        level = self.read('level/4.8/index.html')
+        self.assertIn('href="../../node/1_2/index.html"', level)
+        self.assertNotIn('?page=', level)
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'level', 'Не вказaно', 'index.html')))
+
+    def test_photo_derivatives_copied(self):
+        self.export()
+        html = self.read('node/1_1/index.html')
+        self.assertIn('card.webp', html)
+        self.assertNotIn(self.node.label.name, html.replace('derivatives/', ''))
+        card = os.path.join(self.output, 'media', 'derivatives',
+                            os.path.splitext(self.node.label.name)[0], 'card.jpg')
+        self.assertTrue(os.path.exists(card))
+
+    def test_search_index(self):
+        self.export()
+        index = json.loads(self.read('search-index.json'))
+        self.assertEqual([entry['slug'] for entry in index], ['1_1', '1_2'])
+        self.assertEqual(index[0]['url'], 'node/1_1/index.html')
+        self.assertEqual(index[0]['substation'], 'РП-1')
+
+    def test_incremental_export(self):
+        """Only a changed node and its MCC and level pages are rendered again; deleted nodes are removed"""
+        self.export()
+        self.assertIn('0 of 14 pages rendered', self.export())
+
+        node = Node.objects.get(slug='1_2')
+        node.title = 'Big fan'
+        with self.captureOnCommitCallbacks(execute=True):
+            node.save()
+        self.assertIn('3 of 14 pages rendered', self.export())
+        self.assertIn('Big fan', self.read('node/1_2/index.html'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Node.objects.get(slug='1_2').delete()
+        self.assertIn('1 removed', self.export())
+        self.assertFalse(os.path.exists(os.path.join(self.output, 'node/1_2/index.html')))
@@ -0,0 +1,84 @@
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from locator import hierarchy
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class HierarchyCacheTestCase(TestCase):
+    def setUp(self):
+        hierarchy.invalidate()
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=self.substation)
+        self.node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc)
+
+    def test_tree_with_node_counts(self):
+        substation, = hierarchy.substations()
+        self.assertEqual(substation.node_count, 1)
+        self.assertEqual(substation.motor_centers.all()[0].node_count, 1)
+
+    def test_steady_state_costs_no_queries(self):
+        hierarchy.substations()
+        with self.assertNumQueries(0):
+            hierarchy.substations()
+            self.assertEqual(hierarchy.substation(self.substation.pk), self.substation)
+            self.assertIsNone(hierarchy.substation(999))
+
+    def test_invalidated_by_node_create_and_delete(self):
+        hierarchy.substations()
+        with self.captureOnCommitCallbacks(execute=True):
+            node = Node.objects.create(title="Node 2", slug="1_2", level="4.8", round_per_minute=1000,
+                                       power=7.5, mcc=self.mcc)
+        self.assertEqual(hierarchy.substations()[0].node_count, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            node.delete()
+        self.assertEqual(hierarchy.substations()[0].node_count, 1)
+
+    def test_invalidated_after_commit(self):
+        """The cache is cleared once the edit is committed, not while readers still see the old rows"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            Node.objects.create(title="Node 2", slug="1_2", level="4.8", round_per_minute=1000,
+                                power=7.5, mcc=self.mcc)
+        self.assertIn(hierarchy.invalidate, callbacks)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(hierarchy.substations()[0].node_count, 2)
+
+    def test_node_edit_keeps_cache(self):
+        """Editing a node without moving it does not change the counts"""
+        hierarchy.substations()
+        node = Node.objects.get(pk=self.node.pk)
+        node.title = 'Renamed'
+        node.save()
+        with self.assertNumQueries(0):
+            hierarchy.substations()
+
+    def test_invalidated_by_substation_and_mcc_changes(self):
+        hierarchy.substations()
+        with self.captureOnCommitCallbacks(execute=True):
+            MCC.objects.create(title="MCC-2", substation=self.substation)
+        self.assertEqual(len(hierarchy.substations()[0].motor_centers.all()), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            DS.objects.create(title='РП-2', slug='rp-2', level='4.8')
+        self.assertEqual(len(hierarchy.substations()), 2)
+
+    def test_sidebar_renders_without_queries(self):
+        from django.template import Context, Template
+        template = Template("{% load locator_tags %}{% show_substations %}")
+        template.render(Context())
+        with self.assertNumQueries(0):
+            self.assertIn('РП-1', template.render(Context()))
+
+    @override_settings(LOCATOR_SHARED_CACHE='default')
+    def test_shared_cache_version_triggers_rebuild(self):
+        """A bump of the shared version by another process forces a rebuild here"""
+        hierarchy.substations()
+        with self.assertNumQueries(0):
+            hierarchy.substations()
+        caches['default'].incr(hierarchy.shared_version.key)
+        # substations, their MCCs, and the MCC/substation summaries
+        with self.assertNumQueries(3):
+            hierarchy.substations()
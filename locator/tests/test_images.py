@@ -0,0 +1,113 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from locator import images
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_photo(name='photo.jpg', size=(2000, 1500), exif=None):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, 'JPEG', **({'exif': exif} if exif else {}))
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, LOCATOR_PHOTO_THREADS=0)
+class DerivativesTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", slug="mcc-1", substation=self.substation)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000,
+                                            power=7.5, mcc=self.mcc, label=make_photo())
+
+    def test_derivatives_generated_on_save(self):
+        """Every rendition exists in both formats right after the node is saved"""
+        for name in images.derivative_names(self.node.label.name):
+            self.assertTrue(default_storage.exists(name), name)
+
+    def test_derivative_dimensions(self):
+        """Derivatives keep the aspect ratio and fit the rendition box"""
+        name = images.derivative_name(self.node.label.name, 'card', 'webp')
+        with default_storage.open(name) as f:
+            self.assertEqual(Image.open(f).size, (480, 360))
+
+    def test_derivative_url_generates_lazily(self):
+        """A missing derivative is rendered on first request"""
+        images.delete_derivatives(self.node.label.name)
+        url = images.derivative_url(self.node.label, 'thumb', 'webp')
+        self.assertTrue(url.endswith('/thumb.webp'))
+        self.assertTrue(default_storage.exists(images.derivative_name(self.node.label.name, 'thumb', 'webp')))
+
+    def test_node_photo_tag_renders_srcset(self):
+        rendered = Template("{% load locator_tags %}{% node_photo node %}").render(Context({'node': self.node}))
+        self.assertIn('type="image/webp"', rendered)
+        self.assertIn('480w', rendered)
+        self.assertNotIn(self.node.label.url + '"', rendered)
+
+    def test_srcset_lists_real_widths(self):
+        """Portrait photos are narrower than the rendition box, and small ones are not enlarged"""
+        with self.captureOnCommitCallbacks(execute=True):
+            node = Node.objects.create(title="Node 2", slug="1_2", level="4.8", round_per_minute=1000, power=7.5,
+                                       mcc=self.mcc, label=make_photo('portrait.jpg', size=(900, 1200)))
+        widths = [candidate.split()[1] for candidate in images.srcset(node.label, 'webp').split(', ')]
+        self.assertEqual(widths, ['120w', '360w', '900w'])
+
+    def test_build_derivatives_command(self):
+        images.delete_derivatives(self.node.label.name)
+        out = StringIO()
+        call_command('build_derivatives', workers=1, stdout=out)
+        self.assertIn('6 derivatives written', out.getvalue())
+        for name in images.derivative_names(self.node.label.name):
+            self.assertTrue(default_storage.exists(name), name)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, LOCATOR_PHOTO_MAX_SIZE=1000, LOCATOR_PHOTO_THREADS=0)
+class NormalizeTestCase(TestCase):
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", slug="mcc-1", substation=self.substation)
+
+    def test_rotated_stripped_and_resized(self):
+        """An upload is turned upright, loses its EXIF tags and fits LOCATOR_PHOTO_MAX_SIZE"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotate 90° clockwise to view
+        exif[0x010F] = 'Camera maker'
+        with self.captureOnCommitCallbacks(execute=True):
+            node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000, power=7.5,
+                                       mcc=self.mcc, label=make_photo('rotated.jpg', size=(2000, 1500), exif=exif))
+        original = node.label.name
+        node.refresh_from_db()
+        self.assertNotEqual(node.label.name, original)
+        self.assertFalse(node.label.storage.exists(original))
+        with node.label.open('rb') as f:
+            image = Image.open(f)
+            self.assertEqual(image.size, (750, 1000))
+            self.assertEqual(len(image.getexif()), 0)
+        self.assertTrue(default_storage.exists(images.derivative_name(node.label.name, 'card', 'webp')))
+
+    def test_clean_photo_kept(self):
+        """A photo that is already upright, bare and small keeps its name"""
+        with self.captureOnCommitCallbacks(execute=True):
+            node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000, power=7.5,
+                                       mcc=self.mcc, label=make_photo(size=(800, 600)))
+        self.assertIsNone(images.normalized(node.label.name, node.label.storage))
+        node.refresh_from_db()
+        self.assertTrue(node.label.storage.exists(node.label.name))
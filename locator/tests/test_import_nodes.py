@@ -0,0 +1,77 @@
+import json
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+CSV_HEADER = 'title,slug,level,round_per_minute,power,mcc\n'
+
+
+class ImportNodesTestCase(TestCase):
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=self.substation)
+        Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000, power=7.5, mcc=self.mcc)
+
+    def run_import(self, content, suffix='.csv', **options):
+        with tempfile.NamedTemporaryFile('w', suffix=suffix, encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            out, err = StringIO(), StringIO()
+            call_command('import_nodes', f.name, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_import_creates_nodes(self):
+        out, err = self.run_import(CSV_HEADER + 'Pump,1_2,21.0,1500,11.0,mcc-1\nFan,1_3,4.8,900,5.5,mcc-1\n')
+        self.assertIn('2 created', out)
+        self.assertEqual(Node.objects.get(slug='1_3').mcc, self.mcc)
+        self.assertEqual(Node.objects.get(slug='1_3').substation, self.substation)
+
+    def test_jsonl_import(self):
+        rows = [{'title': 'Pump', 'slug': '1_2', 'level': '21.0', 'round_per_minute': 1500, 'power': 11, 'mcc': 'mcc-1'}]
+        out, err = self.run_import('\n'.join(json.dumps(row) for row in rows), suffix='.jsonl')
+        self.assertIn('1 created', out)
+        self.assertTrue(Node.objects.filter(slug='1_2', level='21.0').exists())
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        """Rows breaking the NodeForm rules are rejected, valid rows still import"""
+        out, err = self.run_import(CSV_HEADER
+                                   + 'Pump,1_2,21.0,5000,11.0,mcc-1\n'
+                                   + 'Fan,1_3,99.9,900,5.5,mcc-1\n'
+                                   + 'Fan,1_4,4.8,900,5.5,mcc-9\n'
+                                   + 'Fan,1_5,4.8,900,5.5,mcc-1\n'
+                                   + 'Fan,1_5,4.8,900,5.5,mcc-1\n')
+        self.assertIn('1 created', out)
+        self.assertIn('4 invalid', out)
+        self.assertIn('line 2: round_per_minute', err)
+        self.assertIn('line 3: level', err)
+        self.assertIn("unknown mcc 'mcc-9'", err)
+        self.assertIn("duplicate slug '1_5'", err)
+        self.assertEqual(Node.objects.count(), 2)
+
+    def test_existing_slug_rejected_without_upsert(self):
+        out, err = self.run_import(CSV_HEADER + 'Renamed,1_1,4.8,1000,7.5,mcc-1\n')
+        self.assertIn('already exists', err)
+        self.assertEqual(Node.objects.get(slug='1_1').title, 'Node 1')
+
+    def test_upsert_updates_existing(self):
+        out, err = self.run_import(CSV_HEADER + 'Renamed,1_1,8.0,1000,7.5,mcc-1\n', upsert=True)
+        self.assertIn('1 updated', out)
+        self.assertEqual(Node.objects.get(slug='1_1').title, 'Renamed')
+
+    def test_dry_run_writes_nothing(self):
+        out, err = self.run_import(CSV_HEADER + 'Pump,1_2,21.0,1500,11.0,mcc-1\n', dry_run=True)
+        self.assertIn('[dry run] 1 rows: 1 created', out)
+        self.assertFalse(Node.objects.filter(slug='1_2').exists())
+
+    def test_batches(self):
+        rows = ''.join(f'Pump,2_{i},21.0,1500,11.0,mcc-1\n' for i in range(25))
+        out, err = self.run_import(CSV_HEADER + rows, batch_size=10)
+        self.assertIn('25 created', out)
+        self.assertEqual(Node.objects.count(), 26)
@@ -0,0 +1,132 @@
+import shutil
+import threading
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from locator import images, jobs
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node,
+                            PhotoJob)
+from locator.tests.test_images import make_photo
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, LOCATOR_PHOTO_JOBS=True, LOCATOR_PHOTO_JOB_ATTEMPTS=2)
+class PhotoJobTestCase(TestCase):
+    def tearDown(self):
+        # photos are named by content, so one test's derivatives would be found by the next
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", slug="mcc-1", substation=self.substation)
+        self.node = Node.objects.create(title="Node 1", slug="1_1", level="4.8", round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc, label=make_photo(size=(1200, 900)))
+
+    def work(self):
+        out, err = StringIO(), StringIO()
+        call_command('photo_worker', threads=1, once=True, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_upload_queues_a_job(self):
+        """Saving a photo only queues it; the worker renders the derivatives"""
+        job = PhotoJob.objects.get()
+        self.assertEqual((job.name, job.status), (self.node.label.name, PhotoJob.PENDING))
+        card = images.derivative_name(self.node.label.name, 'card', 'jpeg')
+        self.assertEqual(images.derivative_url(self.node.label, 'card'), self.node.label.url)
+
+        out, _ = self.work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.result), (PhotoJob.DONE, 1, self.node.label.name))
+        self.assertTrue(default_storage.exists(card))
+
+    def test_one_job_per_photo(self):
+        """Edits that keep the photo and identical uploads queue nothing new"""
+        self.node.title = 'Renamed'
+        self.node.save()
+        Node.objects.create(title="Node 2", slug="1_2", level="4.8", round_per_minute=1000,
+                            power=7.5, mcc=self.mcc, label=make_photo(size=(1200, 900)))
+        self.assertEqual(PhotoJob.objects.count(), 1)
+
+    def test_retries_then_fails(self):
+        """A failing job is retried with backoff and marked failed after the last attempt"""
+        with mock.patch('locator.photos.process', side_effect=OSError('disk full')), \
+                self.assertLogs('locator.jobs', 'WARNING'):
+            self.work()
+            job = PhotoJob.objects.get()
+            self.assertEqual((job.status, job.attempts), (PhotoJob.PENDING, 1))
+            self.assertIn('disk full', job.error)
+            self.assertGreater(job.run_after, timezone.now())
+
+            self.work()
+            self.assertEqual(PhotoJob.objects.get().attempts, 1)  # not due yet
+            PhotoJob.objects.update(run_after=timezone.now())
+            _, err = self.work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (PhotoJob.FAILED, 2))
+        self.assertIn('failed after 2 attempts', err)
+
+        self.assertEqual(jobs.retry(PhotoJob.objects.all()), 1)
+        self.work()
+        self.assertEqual(PhotoJob.objects.get().status, PhotoJob.DONE)
+
+    def test_interrupted_jobs_requeued(self):
+        PhotoJob.objects.update(status=PhotoJob.RUNNING, started_at=timezone.now() - timedelta(hours=1))
+        out, _ = self.work()
+        self.assertIn('1 interrupted jobs queued again', out)
+        self.assertEqual(PhotoJob.objects.get().status, PhotoJob.DONE)
+
+    def test_admin_retry_action(self):
+        PhotoJob.objects.update(status=PhotoJob.FAILED, attempts=2)
+        self.client.force_login(User.objects.create_superuser('admin', password='password'))
+        response = self.client.post(reverse('admin:locator_photojob_changelist'),
+                                    {'action': 'retry', '_selected_action': [PhotoJob.objects.get().pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(PhotoJob.objects.get().status, PhotoJob.PENDING)
+        self.assertEqual(self.client.get(reverse('admin:locator_photojob_changelist')).status_code, 200)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, LOCATOR_PHOTO_JOBS=False, LOCATOR_PHOTO_THREADS=1)
+class BackgroundProcessingTestCase(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def test_upload_request_does_not_wait_for_processing(self):
+        """Without the queue the photo is processed on the photo thread, not in the request"""
+        mcc = MCC.objects.create(title="MCC-1", slug="mcc-1",
+                                 substation=DS.objects.create(title='РП-1', slug='rp-1', level='4.8'))
+        user = User.objects.create_user('operator', password='password')
+        user.user_permissions.add(Permission.objects.get(codename='add_node'))
+        self.client.force_login(user)
+
+        responded = threading.Event()
+        events = []
+
+        def process(*args):
+            # Inline processing would wait here for a response that never comes.
+            events.append(('process', responded.wait(5), threading.current_thread().name))
+
+        with mock.patch('locator.photos.process', side_effect=process):
+            response = self.client.post(reverse('add_node'), {
+                'title': 'Pump', 'slug': '1_1', 'level': '4.8', 'round_per_minute': 1000, 'power': 7.5,
+                'mcc': mcc.pk, 'label': make_photo(size=(1200, 900))})
+            responded.set()
+            # One photo thread: a no-op behind the upload's task finishes after it.
+            jobs.in_background(lambda: None).result(timeout=10)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(len(events), 1)
+        _, waited, thread = events[0]
+        self.assertTrue(waited)
+        self.assertTrue(thread.startswith('locator-photos'))
@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from locator import levels
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+from locator.views import LevelView
+
+
+class LevelTestCase(TestCase):
+    def setUp(self):
+        self.substations = [DS.objects.create(title=f'РП-{i}', slug=f'rp-{i}', level='4.8') for i in (4, 5)]
+        self.mccs = [MCC.objects.create(title=f'MCC-{i}', substation=self.substations[i % 2]) for i in range(1, 4)]
+        for i in range(12):
+            Node.objects.create(title='Pump', slug=f'{i % 3}_{i}', level='21.0' if i < 9 else '4.8',
+                                round_per_minute=1450, power=7.5, mcc=self.mccs[i % 3])
+
+    def test_groups_by_substation_and_mcc(self):
+        response = self.client.get(reverse('level', kwargs={'level': '21.0'}))
+        self.assertEqual(response.status_code, 200)
+        groups = response.context['groups']
+        self.assertEqual([substation for substation, _ in groups], [self.substations[0], self.substations[1]])
+        self.assertEqual([mcc for mcc, _ in groups[0][1]], [self.mccs[1]])
+        self.assertEqual([mcc for mcc, _ in groups[1][1]], [self.mccs[0], self.mccs[2]])
+        self.assertEqual(sum(len(nodes) for _, mccs in groups for _, nodes in mccs), 9)
+        self.assertContains(response, '67.5 kW')
+
+    def test_page_is_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = levels.LevelPaginator(levels.nodes_on('21.0'), 4, node_count=9).page(2)
+            [(node.mcc.title, node.substation.title) for node in page]
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(page.paginator.num_pages, 3)
+
+    def test_pagination(self):
+        url = reverse('level', kwargs={'level': '21.0'})
+        with mock.patch.object(LevelView, 'paginate_by', 4):
+            response = self.client.get(url, {'page': 3})
+            self.assertEqual(response.context['paginator'].count, 9)
+            self.assertEqual(len(response.context['nodes']), 1)
+            self.assertContains(response, '?page=2')
+            self.assertEqual(self.client.get(url, {'page': 4}).status_code, 404)
+
+    def test_unknown_and_empty_levels(self):
+        self.assertEqual(self.client.get(reverse('level', kwargs={'level': '99'})).status_code, 404)
+        response = self.client.get(reverse('level', kwargs={'level': '32.0'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['groups'], [])
+
+    def test_api(self):
+        self.client.force_login(User.objects.create_user('technician', password='password'))
+        url = reverse('api-level-detail', kwargs={'version': 'v1', 'level': '21.0'})
+        data = self.client.get(url, {'page_size': 4}).json()
+        self.assertEqual(data['count'], 9)
+        self.assertIn('page=2', data['next'])
+        substations = data['results']
+        self.assertEqual(substations[0]['id'], self.substations[0].pk)
+        self.assertEqual([node['slug'] for node in substations[0]['mccs'][0]['nodes']], ['1_1', '1_4', '1_7'])
+
+        listing = self.client.get(reverse('api-level-list', kwargs={'version': 'v1'})).json()
+        self.assertEqual([(row['key'], row['node_count']) for row in listing], [('21.0', 9), ('4.8', 3)])
+        self.assertEqual(self.client.get(reverse('api-level-detail', kwargs={'version': 'v1', 'level': '99'}))
+                         .status_code, 404)
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from locator import images
+
+
+class ServeMediaTestCase(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.content = os.urandom(100 * 1024)
+        digest = 'ab' * 32
+        self.hashed = f'photos/ab/{digest}.jpg'
+        self.derivative = images.derivative_name(self.hashed, 'card', 'webp')
+        for name in ('photos/pump.jpg', self.hashed, self.derivative):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(self.content)
+        self.client.force_login(User.objects.create_user('operator', password='password'))
+
+    def get(self, path, **headers):
+        return self.client.get(f'/media/{path}', headers=headers)
+
+    def test_whole_file(self):
+        response = self.get('photos/pump.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        # Not content-addressed, so revalidated on each use.
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        revalidated = self.get('photos/pump.jpg', If_Modified_Since=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_hashed_names_are_immutable(self):
+        for path in (self.hashed, self.derivative):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)['Cache-Control'], 'private, max-age=31536000, immutable')
+
+    def test_ranges(self):
+        size = len(self.content)
+        for header, start, end in (('bytes=0-99', 0, 99), ('bytes=1000-', 1000, size - 1),
+                                   ('bytes=-500', size - 500, size - 1), ('bytes=5-999999', 5, size - 1)):
+            with self.subTest(header=header):
+                response = self.get('photos/pump.jpg', Range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(response['Content-Length'], str(end - start + 1))
+                self.assertEqual(b''.join(response.streaming_content), self.content[start:end + 1])
+
+        self.assertEqual(self.get('photos/pump.jpg', Range=f'bytes={size}-').status_code, 416)
+        # Several ranges, or a range of a file that changed since, get the whole file.
+        self.assertEqual(self.get('photos/pump.jpg', Range='bytes=0-1,5-6').status_code, 200)
+        self.assertEqual(self.get('photos/pump.jpg', Range='bytes=0-1',
+                                  If_Range='Mon, 01 Jan 2001 00:00:00 GMT').status_code, 200)
+
+    @override_settings(LOCATOR_MEDIA_SENDFILE='x-accel-redirect', LOCATOR_MEDIA_ACCEL_PREFIX='/protected-media/')
+    def test_accel_redirect(self):
+        response = self.get(self.hashed)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.hashed}')
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response.content, b'')
+
+    @override_settings(LOCATOR_MEDIA_SENDFILE='x-sendfile')
+    def test_sendfile(self):
+        response = self.get('photos/pump.jpg')
+        self.assertEqual(response['X-Sendfile'], os.path.join(self.media_root, 'photos', 'pump.jpg'))
+        self.assertEqual(response.content, b'')
+
+    def test_login_required(self):
+        self.client.logout()
+        self.assertEqual(self.get('photos/pump.jpg').status_code, 403)
+
+    def test_missing_and_outside_files(self):
+        for path in ('photos/none.jpg', 'photos/', '../manage.py'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).status_code, 404)
@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.urls import reverse
+
+from locator import denormalized
+from locator.models import (Change,
+                            DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class NodeSubstationTestCase(TestCase):
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-4', slug='rp-4', level='4.8')
+        self.other_substation = DS.objects.create(title='РП-5', slug='rp-5', level='4.8')
+        self.mcc = MCC.objects.create(title='MCC-1', substation=self.substation)
+        self.other_mcc = MCC.objects.create(title='MCC-2', substation=self.other_substation)
+        self.node = Node.objects.create(title='Pump', slug='1_1', level='4.8', round_per_minute=1450,
+                                        power=7.5, mcc=self.mcc)
+
+    def test_copied_on_save(self):
+        self.assertEqual(self.node.substation_id, self.substation.pk)
+        node = Node.objects.get(pk=self.node.pk)
+        node.mcc_id = self.other_mcc.pk
+        node.save(update_fields=['mcc'])
+        self.assertEqual(Node.objects.get(pk=node.pk).substation_id, self.other_substation.pk)
+
+    def test_mcc_moved_to_other_substation(self):
+        before = self.node.updated_at
+        self.mcc.substation = self.other_substation
+        self.mcc.save()
+        node = Node.objects.get(pk=self.node.pk)
+        self.assertEqual(node.substation_id, self.other_substation.pk)
+        self.assertGreater(node.updated_at, before)
+        self.assertFalse(denormalized.stale().exists())
+
+    def test_repair_command(self):
+        Node.objects.filter(pk=self.node.pk).update(mcc=self.other_mcc)
+        with self.assertRaises(CommandError):
+            call_command('repair_node_substations', check=True, stdout=StringIO())
+
+        seq = Change.objects.order_by('-seq').values_list('seq', flat=True).first()
+        out = StringIO()
+        call_command('repair_node_substations', stdout=out)
+        self.assertIn('1 nodes repaired', out.getvalue())
+        self.assertEqual(Node.objects.get(pk=self.node.pk).substation_id, self.other_substation.pk)
+        self.assertTrue(Change.objects.filter(kind=Change.NODE, object_id=self.node.pk, seq__gt=seq).exists())
+        call_command('repair_node_substations', check=True, stdout=StringIO())
+
+    def test_api_substation_filter(self):
+        self.client.force_login(User.objects.create_user('technician', password='password'))
+        Node.objects.create(title='Fan', slug='2_1', level='4.8', round_per_minute=950, power=3, mcc=self.other_mcc)
+        response = self.client.get(reverse('api-node-list', kwargs={'version': 'v1'}),
+                                   {'substation': self.other_substation.pk})
+        self.assertEqual([node['slug'] for node in response.json()['results']], ['2_1'])
+        self.assertEqual(response.json()['results'][0]['substation_title'], 'РП-5')
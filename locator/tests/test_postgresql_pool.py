@@ -0,0 +1,31 @@
+import threading
+import time
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import SimpleTestCase
+
+from locator.db.backends.postgresql_pool.base import WaitingConnectionPool
+
+
+class WaitingConnectionPoolTestCase(SimpleTestCase):
+    def setUp(self):
+        # No server needed: the pool only calls psycopg2.connect() and reads .closed.
+        patcher = mock.patch('psycopg2.pool.psycopg2.connect', side_effect=lambda *args, **kwargs: mock.Mock(closed=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pool = WaitingConnectionPool(1, 1, timeout=0.1)
+
+    def test_exhausted_pool_times_out(self):
+        self.pool.getconn('first')
+        started = time.monotonic()
+        with self.assertRaisesMessage(OperationalError, 'All 1 pooled database connections'):
+            self.pool.getconn('second')
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+    def test_waits_for_returned_connection(self):
+        self.pool.timeout = 5
+        connection = self.pool.getconn('first')
+        threading.Timer(0.05, self.pool.putconn, args=(connection, 'first')).start()
+        self.assertIs(self.pool.getconn('second'), connection)
+        self.assertIs(connection.pool, self.pool)
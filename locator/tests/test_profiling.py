@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from locator import profiling
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class ProfilingTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        settings = override_settings(LOCATOR_PROFILE_DIR=directory, LOCATOR_PAGE_CACHE=False)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.directory = directory
+
+        substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        mcc = MCC.objects.create(title='MCC-1', substation=substation)
+        Node.objects.create(title='Pump', slug='1_1', level='4.8', round_per_minute=1000, power=7.5, mcc=mcc)
+        self.url = reverse('node-detail', args=('1_1',))
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+
+    def test_sampled_profile_for_staff(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        profile_id = response['X-Profile-Id']
+        with open(profiling.file_path(profile_id, 'json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        self.assertEqual(meta['view'], 'node-detail')
+        self.assertEqual(meta['query_count'], len(meta['queries']))
+        self.assertTrue(meta['queries'][0]['sql'])
+        self.assertIsNotNone(profiling.file_path(profile_id, 'folded'))
+
+        download = self.client.get(response['X-Profile-Url'])
+        self.assertEqual(download.status_code, 200)
+        self.assertIn('attachment', download['Content-Disposition'])
+
+    def test_cprofile_by_query_flag(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.url, {'_profile': 'cprofile'})
+        self.assertIsNotNone(profiling.file_path(response['X-Profile-Id'], 'prof'))
+
+    def test_ignored_for_other_users(self):
+        self.client.force_login(User.objects.create_user('viewer', password='x'))
+        response = self.client.get(self.url, HTTP_X_PROFILE='sample')
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_download_requires_staff(self):
+        self.client.force_login(self.staff)
+        profile_id = self.client.get(self.url, HTTP_X_PROFILE='1')['X-Profile-Id']
+        self.client.force_login(User.objects.create_user('viewer', password='x'))
+        response = self.client.get(reverse('profile_download', args=(profile_id, 'json')))
+        self.assertEqual(response.status_code, 302)
+
+    def test_unknown_profile(self):
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('profile_download', args=('20260101-000000-00000000', 'json'))).status_code,
+                         404)
+
+    @override_settings(LOCATOR_PROFILE_KEEP=2)
+    def test_old_profiles_pruned(self):
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get(self.url, HTTP_X_PROFILE='sample')
+        self.assertEqual(len({name.split('.')[0] for name in os.listdir(self.directory)}), 2)
+
+    async def test_profile_under_asgi(self):
+        await sync_to_async(self.async_client.force_login)(self.staff)
+        response = await self.async_client.get(self.url, headers={'X-Profile': 'cprofile'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(profiling.file_path(response['X-Profile-Id'], 'prof'))
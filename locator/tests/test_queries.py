@@ -0,0 +1,95 @@
+from django.contrib.auth.models import User, Permission
+from django.http import HttpResponse
+from django.test import TestCase, override_settings
+from django.urls import path, reverse
+
+from locator import hierarchy
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+from locator.queries import QueryRecorder, fingerprint
+from locator.testing import QueryBudgetMixin
+
+
+def create_tower():
+    substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+    mccs = [MCC.objects.create(title=f'MCC-{i}', substation=substation) for i in (1, 2)]
+    for mcc in mccs:
+        for j in range(5):
+            Node.objects.create(title='Node', slug=f'{mcc.pk}_{j}', level='4.8', round_per_minute=1000,
+                                power=7.5, mcc=mcc)
+    return substation, mccs
+
+
+def n_plus_one_view(request):
+    return HttpResponse(','.join(node.mcc.title for node in Node.objects.all()))
+
+
+urlpatterns = [path('n-plus-one/', n_plus_one_view)]
+
+
+class QueryRecorderTestCase(TestCase):
+    def test_fingerprint_collapses_in_lists(self):
+        self.assertEqual(fingerprint('SELECT 1 WHERE id IN (%s, %s, %s)'), 'SELECT 1 WHERE id IN (...)')
+
+    def test_records_count_and_duplicates(self):
+        create_tower()
+        recorder = QueryRecorder()
+        with recorder.record():
+            for node in Node.objects.all():
+                node.mcc
+        self.assertEqual(recorder.count, 11)
+        sql, n = recorder.duplicates()[0]
+        self.assertEqual(n, 10)
+        self.assertIn('locator_motorcontrolcenter', sql)
+
+
+@override_settings(LOCATOR_QUERY_INSPECTOR=True)
+class QueryInspectorMiddlewareTestCase(TestCase):
+    def setUp(self):
+        self.substation, self.mccs = create_tower()
+        hierarchy.substations()
+
+    def test_headers(self):
+        response = self.client.get(reverse('mcc', kwargs={'mcc_slug': self.mccs[0].slug}))
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertTrue(response['X-Query-Time'].endswith('ms'))
+
+    def test_no_warning_for_views(self):
+        with self.assertNoLogs('locator.queries', 'WARNING'):
+            self.client.get(reverse('node-detail', kwargs={'slug': Node.objects.first().slug}))
+            self.client.get(reverse('mcc', kwargs={'mcc_slug': self.mccs[0].slug}))
+            self.client.get(reverse('api-node-list', kwargs={'version': 'v1'}))
+
+    @override_settings(ROOT_URLCONF='locator.tests.test_queries')
+    def test_n_plus_one_logged(self):
+        with self.assertLogs('locator.queries', 'WARNING') as logs:
+            self.client.get('/n-plus-one/')
+        self.assertIn('Possible N+1', logs.output[0])
+
+
+class QueryBudgetTestCase(QueryBudgetMixin, TestCase):
+    """Query budgets of the read views for a logged in technician"""
+
+    def setUp(self):
+        self.substation, self.mccs = create_tower()
+        user = User.objects.create_user(username='testuser', password='password')
+        user.user_permissions.add(Permission.objects.get(codename='view_node'))
+        self.client.login(username='testuser', password='password')
+        hierarchy.substations()
+        # session + user (+ permissions for search) on top of each view's own queries
+        self.query_budgets = {
+            reverse('home'): 2,
+            reverse('substation', kwargs={'sub_num': self.substation.pk}): 2,
+            reverse('mcc', kwargs={'mcc_slug': self.mccs[0].slug}): 4,
+            reverse('node-detail', kwargs={'slug': f'{self.mccs[0].pk}_1'}): 3,
+            reverse('search_node') + f'?slug={self.mccs[0].pk}_1': 5,
+            reverse('api-node-list', kwargs={'version': 'v1'}): 3,
+        }
+
+    def test_read_views_within_budget(self):
+        self.assertQueryBudgets()
+
+    def test_budget_exceeded_fails(self):
+        with self.assertRaises(AssertionError):
+            self.assertQueryBudget(reverse('mcc', kwargs={'mcc_slug': self.mccs[0].slug}), 1)
@@ -0,0 +1,96 @@
+import time
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+
+from locator import hierarchy, routers, search
+from locator.models import Node
+
+
+router = routers.ReplicaRouter()
+
+
+def read_view(request):
+    return HttpResponse(router.db_for_read(Node) or 'default')
+
+
+def write_view(request):
+    router.db_for_write(Node)
+    return HttpResponse(router.db_for_read(Node) or 'default')
+
+
+@override_settings(LOCATOR_READ_REPLICAS=['replica'], LOCATOR_REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingTestCase(SimpleTestCase):
+    def setUp(self):
+        routers._health.clear()
+        patcher = mock.patch.object(routers, 'check_replica', return_value=True)
+        self.check_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+
+    def call(self, view, method='get', replica=True, cookies=None):
+        view = routers.replica_reads(view) if replica else view
+        request = getattr(self.factory, method)('/')
+        request.COOKIES.update(cookies or {})
+        middleware = routers.ReplicaRoutingMiddleware(lambda request: middleware_view(request))
+
+        def middleware_view(request):
+            middleware.process_view(request, view, (), {})
+            return view(request)
+        return middleware(request)
+
+    def test_marked_views_read_from_replica(self):
+        self.assertEqual(self.call(read_view).content, b'replica')
+
+    def test_other_views_read_from_primary(self):
+        self.assertEqual(self.call(lambda request: read_view(request), replica=False).content, b'default')
+        self.assertEqual(self.call(read_view, method='post').content, b'default')
+
+    def test_outside_requests_use_primary(self):
+        self.assertIsNone(router.db_for_read(Node))
+
+    def test_write_pins_client_to_primary(self):
+        response = self.call(write_view)
+        self.assertEqual(response.content, b'default')
+        pin = response.cookies[routers.PIN_COOKIE]
+        self.assertEqual(pin['max-age'], 10)
+        self.assertEqual(self.call(read_view, cookies={routers.PIN_COOKIE: pin.value}).content, b'default')
+        expired = str(time.time() - 1)
+        self.assertEqual(self.call(read_view, cookies={routers.PIN_COOKIE: expired}).content, b'replica')
+
+    def test_reads_do_not_pin(self):
+        self.assertNotIn(routers.PIN_COOKIE, self.call(read_view).cookies)
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        self.check_replica.return_value = False
+        self.assertEqual(self.call(read_view).content, b'default')
+        self.call(read_view)
+        self.assertEqual(self.check_replica.call_count, 1, 'health is cached between checks')
+
+    def test_no_migrations_on_replicas(self):
+        self.assertFalse(router.allow_migrate('replica', 'locator'))
+        self.assertTrue(router.allow_migrate('default', 'locator'))
+
+    def test_read_only_views_are_marked(self):
+        for url in [reverse('home'), reverse('mcc', args=('mcc-1',)), reverse('node-detail', args=('1_1',)),
+                    reverse('search_node'), reverse('api-node-list', kwargs={'version': 'v1'})]:
+            func = resolve(url).func
+            view = getattr(func, 'view_class', None) or getattr(func, 'cls', None) or func
+            self.assertTrue(getattr(view, 'read_replica', False), url)
+        self.assertFalse(getattr(resolve(reverse('add_node')).func.view_class, 'read_replica', False))
+
+
+@override_settings(LOCATOR_READ_REPLICAS=['replica'])
+class SharedCachesTestCase(TestCase):
+    def test_built_from_primary(self):
+        """Process caches rebuilt in a replica request still read the primary"""
+        hierarchy.invalidate()
+        search.index.invalidate()
+        token = routers._request.set({'replica': 'replica', 'wrote': False})
+        self.addCleanup(routers._request.reset, token)
+        # 'replica' is not a configured database, so routing a read there would fail.
+        with mock.patch('django.db.router.routers', [router]):
+            self.assertEqual(hierarchy.substations(), [])
+            self.assertEqual(search.index.search('1_1'), [])
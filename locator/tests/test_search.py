@@ -0,0 +1,192 @@
+from django.contrib.auth.models import User, Permission
+from django.core.cache import cache
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from locator import search
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class NodeIndexTestCase(TestCase):
+    def setUp(self):
+        search.index.invalidate()
+        substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", substation=substation)
+        for slug, title in [('2_1', 'Pump'), ('2_10', 'Fan'), ('2_109', 'Conveyor'),
+                            ('2_40', 'Crusher'), ('1_11', 'Feed pump')]:
+            Node.objects.create(title=title, slug=slug, level='4.8', round_per_minute=1000, power=7.5, mcc=self.mcc)
+
+    def slugs(self, query, **kwargs):
+        return [match.entry.slug for match in search.index.search(query, **kwargs)]
+
+    def test_exact_then_prefix_shortest_first(self):
+        self.assertEqual(self.slugs('2_1')[:3], ['2_1', '2_10', '2_109'])
+
+    def test_substring(self):
+        self.assertIn('2_109', self.slugs('109'))
+
+    def test_typo_tolerant(self):
+        """A letter O typed for a zero still finds the node"""
+        self.assertEqual(self.slugs('2_4O')[0], '2_40')
+
+    def test_title_word_prefix(self):
+        self.assertEqual(set(self.slugs('pump')), {'2_1', '1_11'})
+
+    def test_incremental_updates(self):
+        node = Node.objects.get(slug='2_40')
+        self.slugs('2_4')
+        with self.assertNumQueries(0):
+            self.slugs('2_4')
+        node.slug = '3_40'
+        with self.captureOnCommitCallbacks(execute=True):
+            node.save()
+        with self.assertNumQueries(0):
+            self.assertNotIn('2_40', self.slugs('2_4'))
+            self.assertEqual(self.slugs('3_40'), ['3_40'])
+        with self.captureOnCommitCallbacks(execute=True):
+            node.delete()
+        self.assertEqual(self.slugs('3_40'), [])
+
+    def test_rolled_back_edit_not_indexed(self):
+        self.slugs('2_4')
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Node.objects.create(title='Phantom', slug='9_99', level='4.8', round_per_minute=1000,
+                                        power=7.5, mcc=self.mcc)
+                    raise DatabaseError('rolled back')
+            except DatabaseError:
+                pass
+        self.assertEqual(self.slugs('9_99'), [])
+
+    @override_settings(LOCATOR_SHARED_CACHE='default')
+    def test_shared_version_between_processes(self):
+        """Edits made in one process reach another that has the index loaded"""
+        cache.clear()
+        first, second = search.NodeIndex(), search.NodeIndex()
+        second.shared_version = first.shared_version
+        second.search('2_4')
+        node = Node.objects.get(slug='2_40')
+
+        # The first process never loaded its index, but still bumps.
+        first.update(node.pk, '3_40', node.title)
+        Node.objects.filter(pk=node.pk).update(slug='3_40')
+        self.assertEqual([match.entry.slug for match in second.search('3_40')], ['3_40'])
+
+        # Both loaded: an edit the other process made in between is not skipped.
+        first.search('2_1')
+        other = Node.objects.get(slug='2_109')
+        first.update(other.pk, '7_77', other.title)
+        Node.objects.filter(pk=other.pk).update(slug='7_77')
+        second.update(node.pk, '8_88', node.title)
+        Node.objects.filter(pk=node.pk).update(slug='8_88')
+        with self.assertNumQueries(1):
+            self.assertEqual(second.search('7_77')[0].entry.slug, '7_77')
+        self.assertEqual(first.search('8_88')[0].entry.slug, '8_88')
+
+    def test_edit_distance(self):
+        self.assertEqual(search.edit_distance('2_4o', '2_40', 2), 1)
+        self.assertEqual(search.edit_distance('abc', 'xyzuvw', 1), 2)
+
+
+class SearchViewsTestCase(TestCase):
+    def setUp(self):
+        search.index.invalidate()
+        substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        mcc = MCC.objects.create(title="MCC-1", substation=substation)
+        for slug in ('2_1', '2_10', '2_40'):
+            Node.objects.create(title='Node', slug=slug, level='4.8', round_per_minute=1000, power=7.5, mcc=mcc)
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.user.user_permissions.add(Permission.objects.get(codename='view_node'))
+        self.client.login(username='testuser', password='password')
+
+    def test_search_view_ranked(self):
+        response = self.client.get(reverse('search_node'), {'q': '2_1'})
+        self.assertEqual([node.slug for node in response.context['node']], ['2_1', '2_10'])
+
+    def test_search_view_no_match(self):
+        response = self.client.get(reverse('search_node'), {'q': 'zzz'})
+        self.assertEqual(list(response.context['node']), [])
+
+    def test_autocomplete(self):
+        response = self.client.get(reverse('autocomplete_node'), {'q': '2_4O'})
+        result = response.json()['results'][0]
+        self.assertEqual(result['slug'], '2_40')
+        self.assertEqual(result['url'], reverse('node-detail', args=('2_40',)))
+
+    def test_autocomplete_requires_permission(self):
+        self.client.logout()
+        response = self.client.get(reverse('autocomplete_node'), {'q': '2'})
+        self.assertEqual(response.status_code, 403)
+
+
+class BatchLookupTestCase(TestCase):
+    def setUp(self):
+        self.substations = [DS.objects.create(title=f'РП-{i}', slug=f'rp-{i}', level='4.8') for i in (1, 2)]
+        self.mccs = [MCC.objects.create(title=f'MCC-{i}', substation=s) for i, s in enumerate(self.substations, 1)]
+        for mcc in self.mccs:
+            for j in range(3):
+                Node.objects.create(title='Node', slug=f'{mcc.pk}_{j}', level='4.8', round_per_minute=1000,
+                                    power=7.5, mcc=mcc)
+        self.user = User.objects.create_user(username='testuser', password='password')
+        self.user.user_permissions.add(Permission.objects.get(codename='view_node'))
+        self.client.login(username='testuser', password='password')
+
+    def test_parse_slugs(self):
+        self.assertEqual(search.parse_slugs('1_1, 1_2;1_3\n1_1  2_6'), ['1_1', '1_2', '1_3', '2_6'])
+
+    def test_lookup_batch_single_query_grouped(self):
+        slugs = [f'{self.mccs[1].pk}_0', f'{self.mccs[0].pk}_2', f'{self.mccs[0].pk}_1', '9_9']
+        with self.assertNumQueries(1):
+            result = search.lookup_batch(slugs)
+            groups = result.groups
+            self.assertEqual([substation.title for substation, _ in groups], ['РП-1', 'РП-2'])
+            mcc, nodes = groups[0][1][0]
+        self.assertEqual(mcc, self.mccs[0])
+        self.assertEqual([node.slug for node in nodes], [f'{self.mccs[0].pk}_1', f'{self.mccs[0].pk}_2'])
+        self.assertEqual(result.missing, ['9_9'])
+
+    def test_search_view_pasted_list(self):
+        response = self.client.post(reverse('search_node'), {'slugs': f'{self.mccs[0].pk}_0 {self.mccs[1].pk}_1 x_1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['batch'].nodes), 2)
+        self.assertContains(response, 'Не знайдено: x_1')
+        self.assertEqual(list(response.context['node']), [])
+
+    def test_search_view_uploaded_file(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        upload = SimpleUploadedFile('list.txt', f'{self.mccs[0].pk}_0\n{self.mccs[0].pk}_1\n'.encode())
+        response = self.client.post(reverse('search_node'), {'file': upload})
+        self.assertEqual(len(response.context['batch'].nodes), 2)
+
+    def test_api_batch(self):
+        url = reverse('api-node-batch', kwargs={'version': 'v1'})
+        response = self.client.get(url, {'slugs': f'{self.mccs[0].pk}_0,{self.mccs[1].pk}_2,x_1'})
+        data = response.json()
+        self.assertEqual(data['found'], 2)
+        self.assertEqual(data['missing'], ['x_1'])
+        self.assertEqual(data['substations'][1]['mccs'][0]['nodes'][0]['slug'], f'{self.mccs[1].pk}_2')
+
+        response = self.client.post(url, {'slugs': [f'{self.mccs[0].pk}_1']}, content_type='application/json')
+        self.assertEqual(response.json()['found'], 1)
+
+    def test_oversize_lists_rejected(self):
+        """Lists over MAX_BATCH are refused rather than cut short"""
+        slugs = [f'9_{i}' for i in range(search.MAX_BATCH + 1)]
+        with self.assertRaises(ValueError):
+            search.lookup_batch(slugs)
+        response = self.client.post(reverse('api-node-batch', kwargs={'version': 'v1'}), {'slugs': slugs},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(search.MAX_BATCH + 1), response.json()['slugs'])
+        response = self.client.post(reverse('search_node'), {'slugs': ' '.join(slugs)})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('batch', response.context)
+        self.assertTrue(response.context['batch_form'].non_field_errors())
+
+    def test_api_batch_requires_slugs(self):
+        response = self.client.get(reverse('api-node-batch', kwargs={'version': 'v1'}))
+        self.assertEqual(response.status_code, 400)
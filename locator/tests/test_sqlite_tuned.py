@@ -0,0 +1,79 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.test import SimpleTestCase
+
+
+ALIAS = 'tuned_sqlite'
+
+
+class SqliteTunedTestCase(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'tuned.sqlite3')
+        self.connect(timeout=0.1, busy_retries=5)
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id integer PRIMARY KEY, title text)')
+
+    def connect(self, **options):
+        if ALIAS in connections.settings:
+            self.disconnect()
+        connections.settings[ALIAS] = connections.configure_settings({DEFAULT_DB_ALIAS: {
+            'ENGINE': 'locator.db.backends.sqlite_tuned', 'NAME': self.path, 'OPTIONS': options}})[DEFAULT_DB_ALIAS]
+        self.addCleanup(self.disconnect)
+
+    def disconnect(self):
+        if ALIAS in connections.settings:
+            connections[ALIAS].close()
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+
+    def hold_write_lock(self, seconds=None):
+        """Take the write lock from another connection, releasing it after `seconds`."""
+        other = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        other.execute('BEGIN IMMEDIATE')
+        other.execute("INSERT INTO item (title) VALUES ('other')")
+        if seconds is not None:
+            timer = threading.Timer(seconds, other.execute, ['COMMIT'])
+            timer.start()
+            self.addCleanup(timer.join)
+        else:
+            self.addCleanup(other.close)
+        return other
+
+    def insert(self, title):
+        with transaction.atomic(using=ALIAS):
+            with connections[ALIAS].cursor() as cursor:
+                cursor.execute('INSERT INTO item (title) VALUES (%s)', [title])
+
+    def test_pragmas(self):
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_readers_not_blocked_by_writer(self):
+        self.insert('mine')
+        self.hold_write_lock()
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('SELECT title FROM item')
+            self.assertEqual(cursor.fetchall(), [('mine',)])
+
+    def test_write_retries_until_lock_released(self):
+        self.hold_write_lock(seconds=0.2)
+        self.insert('mine')
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+    def test_gives_up_after_retries(self):
+        self.connect(timeout=0.05, busy_retries=1)
+        self.hold_write_lock()
+        with self.assertRaisesMessage(OperationalError, 'database is locked'):
+            self.insert('mine')
@@ -0,0 +1,138 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import re_path
+
+from locator import images, views
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+from locator.tests.test_images import make_photo
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+# config/urls.py with DEBUG off
+urlpatterns = [re_path(r'^static/(?P<path>.*)$', views.serve_static)]
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, LOCATOR_PHOTO_THREADS=0)
+class ContentAddressedStorageTestCase(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title="MCC-1", slug="mcc-1", substation=self.substation)
+
+    def create_node(self, slug, photo):
+        return Node.objects.create(title="Node", slug=slug, level="4.8", round_per_minute=1000,
+                                   power=7.5, mcc=self.mcc, label=photo)
+
+    def test_identical_uploads_share_one_file(self):
+        """Re-uploading the same bytes does not write a suffixed copy"""
+        node1 = self.create_node('1_1', make_photo('2_6.jpg'))
+        node2 = self.create_node('1_2', make_photo('2_6.jpg'))
+        self.assertEqual(node1.label.name, node2.label.name)
+        self.assertTrue(node1.label.storage.is_hashed(node1.label.name))
+
+    def test_delete_keeps_file_while_referenced(self):
+        node1 = self.create_node('1_1', make_photo())
+        node2 = self.create_node('1_2', make_photo())
+        name = node1.label.name
+        with self.captureOnCommitCallbacks(execute=True):
+            Node.objects.get(pk=node1.pk).delete()
+        self.assertTrue(node2.label.storage.exists(name))
+
+    def test_delete_last_reference_removes_file_and_derivatives(self):
+        node = self.create_node('1_1', make_photo())
+        name = node.label.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/node/{node.slug}/delete/')
+        self.assertFalse(node.label.storage.exists(name))
+        self.assertFalse(default_storage.exists(images.derivative_name(name, 'card', 'jpeg')))
+
+    def test_replacing_label_releases_old_file(self):
+        node = self.create_node('1_1', make_photo())
+        old_name = node.label.name
+        node = Node.objects.get(pk=node.pk)
+        node.label = make_photo(size=(100, 100))
+        with self.captureOnCommitCallbacks(execute=True):
+            node.save()
+        self.assertNotEqual(node.label.name, old_name)
+        self.assertFalse(node.label.storage.exists(old_name))
+
+    def test_dedupe_photos_command(self):
+        """Legacy duplicates are merged into one hashed file"""
+        storage = Node._meta.get_field('label').storage
+        content = make_photo().read()
+        default_storage.save('photos/2_109.jpg', ContentFile(content))
+        default_storage.save('photos/2_109_4zRkzQi.jpg', ContentFile(content))
+        node1 = self.create_node('1_1', None)
+        node2 = self.create_node('1_2', None)
+        Node.objects.filter(pk=node1.pk).update(label='photos/2_109.jpg')
+        Node.objects.filter(pk=node2.pk).update(label='photos/2_109_4zRkzQi.jpg')
+
+        call_command('dedupe_photos', stdout=StringIO())
+
+        names = set(Node.objects.values_list('label', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertTrue(storage.is_hashed(names.pop()))
+        self.assertFalse(storage.exists('photos/2_109.jpg'))
+        self.assertFalse(storage.exists('photos/2_109_4zRkzQi.jpg'))
+
+
+@override_settings(ROOT_URLCONF=__name__, STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'locator.storage.CompressedManifestStaticFilesStorage'},
+})
+class CompressedStaticFilesTestCase(SimpleTestCase):
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root, ignore_errors=True)
+        settings = override_settings(STATIC_ROOT=static_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.css = staticfiles_storage.stored_name('locator/css/styles.css')
+
+    def test_collectstatic_writes_compressed_copies(self):
+        self.assertRegex(self.css, r'^locator/css/styles\.[0-9a-f]{12}\.css$')
+        with staticfiles_storage.open(self.css) as f, staticfiles_storage.open(self.css + '.gz') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), f.read())
+        # Images are compressed already.
+        image = staticfiles_storage.stored_name('locator/images/ava2.jpg')
+        self.assertFalse(staticfiles_storage.exists(image + '.gz'))
+
+    def test_serves_precompressed_and_immutable(self):
+        response = self.client.get(f'/static/{self.css}', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+        self.assertEqual(int(response['Content-Length']),
+                         os.path.getsize(staticfiles_storage.path(self.css + '.gz')))
+
+        plain = self.client.get(f'/static/{self.css}')
+        self.assertNotIn('Content-Encoding', plain)
+        with staticfiles_storage.open(self.css) as f:
+            self.assertEqual(b''.join(plain.streaming_content), f.read())
+
+    def test_unfingerprinted_names_are_revalidated(self):
+        response = self.client.get('/static/locator/css/styles.css')
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+        revalidated = self.client.get('/static/locator/css/styles.css',
+                                      headers={'If-Modified-Since': response['Last-Modified']})
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(self.client.get('/static/locator/css/none.css').status_code, 404)
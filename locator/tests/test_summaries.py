@@ -0,0 +1,112 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from locator import hierarchy, summaries
+from locator.models import (DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node,
+                            NodeSummary)
+
+
+class SummaryTestCase(TestCase):
+    def setUp(self):
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title='MCC-1', substation=self.substation)
+        self.other_substation = DS.objects.create(title='РП-2', slug='rp-2', level='4.8')
+        self.other_mcc = MCC.objects.create(title='MCC-2', substation=self.other_substation)
+        self.nodes = [Node.objects.create(title='Pump', slug=f'1_{i}', level='4.8', round_per_minute=rpm,
+                                          power=power, mcc=self.mcc)
+                      for i, (rpm, power) in enumerate([(1450, 7.5), (2950, 30), (980, 11)])]
+
+    def summary(self, scope, key):
+        return NodeSummary.objects.filter(scope=scope, key=str(key)).first()
+
+    def assertMatchesRebuild(self):
+        incremental = list(NodeSummary.objects.order_by('scope', 'key').values())
+        summaries.rebuild()
+        rebuilt = list(NodeSummary.objects.order_by('scope', 'key').values())
+        strip = lambda rows: [{k: v for k, v in row.items() if k != 'id'} for row in rows]  # noqa: E731
+        self.assertEqual(strip(incremental), strip(rebuilt))
+
+    def test_totals_per_group(self):
+        for scope, key in [('mcc', self.mcc.pk), ('substation', self.substation.pk), ('level', '4.8')]:
+            with self.subTest(scope=scope):
+                summary = self.summary(scope, key)
+                self.assertEqual(summary.node_count, 3)
+                self.assertEqual(summary.total_power, Decimal('48.5'))
+                self.assertEqual(summary.max_power, Decimal('30.0'))
+                self.assertEqual((summary.rpm_750, summary.rpm_1000, summary.rpm_1500, summary.rpm_3000),
+                                 (0, 1, 1, 1))
+        self.assertIsNone(self.summary('mcc', self.other_mcc.pk))
+
+    def test_edit_adjusts_totals_and_max(self):
+        node = Node.objects.get(slug='1_1')
+        node.power = 5
+        node.save()
+        summary = self.summary('mcc', self.mcc.pk)
+        self.assertEqual(summary.total_power, Decimal('23.5'))
+        self.assertEqual(summary.max_power, Decimal('11.0'))
+        self.assertMatchesRebuild()
+
+    def test_repeated_saves_of_one_instance(self):
+        node = self.nodes[0]
+        node.power = 8
+        node.save()
+        node.power = 9
+        node.save()
+        self.assertEqual(self.summary('mcc', self.mcc.pk).total_power, Decimal('50.0'))
+        self.assertMatchesRebuild()
+
+    def test_move_to_other_mcc_and_level(self):
+        node = Node.objects.get(slug='1_1')
+        node.mcc = self.other_mcc
+        node.level = '21.0'
+        node.save()
+        self.assertEqual(self.summary('mcc', self.mcc.pk).node_count, 2)
+        self.assertEqual(self.summary('substation', self.other_substation.pk).total_power, Decimal('30.0'))
+        self.assertEqual(self.summary('level', '21.0').node_count, 1)
+        self.assertEqual(self.summary('level', '4.8').max_power, Decimal('11.0'))
+        self.assertMatchesRebuild()
+
+    def test_delete(self):
+        for node in Node.objects.filter(slug__in=['1_0', '1_1']):
+            node.delete()
+        summary = self.summary('substation', self.substation.pk)
+        self.assertEqual((summary.node_count, summary.total_power, summary.max_power), (1, Decimal('11.0'), Decimal('11.0')))
+        Node.objects.all().delete()
+        self.assertFalse(NodeSummary.objects.exists())
+
+    def test_mcc_moved_to_other_substation(self):
+        self.mcc.substation = self.other_substation
+        self.mcc.save()
+        self.assertIsNone(self.summary('substation', self.substation.pk))
+        self.assertEqual(self.summary('substation', self.other_substation.pk).node_count, 3)
+
+    def test_rpm_classes(self):
+        self.assertEqual([summaries.rpm_class(rpm) for rpm in (0, 740, 960, 1480, 2980, 3100)],
+                         ['rpm_750', 'rpm_750', 'rpm_1000', 'rpm_1500', 'rpm_3000', 'rpm_3000'])
+
+    def test_pages_show_summaries(self):
+        hierarchy.invalidate()
+        User.objects.create_user(username='testuser', password='password')
+        self.client.login(username='testuser', password='password')
+        response = self.client.get(reverse('substation', kwargs={'sub_num': self.substation.pk}))
+        self.assertContains(response, '48.5 kW')
+        node = Node.objects.get(slug='1_0')
+        node.power = 10
+        with self.captureOnCommitCallbacks(execute=True):
+            node.save()
+        self.assertContains(self.client.get(reverse('mcc', kwargs={'mcc_slug': self.mcc.slug})), '51.0 kW')
+        response = self.client.get(reverse('substation', kwargs={'sub_num': self.substation.pk}))
+        self.assertContains(response, '51.0 kW')
+
+    def test_api(self):
+        self.client.force_login(User.objects.create_user('technician', password='password'))
+        response = self.client.get(reverse('api-summary-list', kwargs={'version': 'v1'}), {'scope': 'level'})
+        row, = response.json()
+        self.assertEqual(row['key'], '4.8')
+        self.assertEqual(row['total_power'], '48.5')
+        self.assertEqual(row['rpm'], {'750': 0, '1000': 1, '1500': 1, '3000': 1})
@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from locator.models import (Change,
+                            DistributiveSubstation as DS,
+                            MotorControlCenter as MCC,
+                            Node)
+
+
+class SyncApiTestCase(TestCase):
+    def setUp(self):
+        self.url = reverse('api-sync-list', kwargs={'version': 'v1'})
+        self.client.force_login(User.objects.create_user('technician', password='password'))
+        self.substation = DS.objects.create(title='РП-1', slug='rp-1', level='4.8')
+        self.mcc = MCC.objects.create(title='MCC-1', substation=self.substation)
+        for i in range(3):
+            Node.objects.create(title=f'Node {i}', slug=f'1_{i}', level='4.8', round_per_minute=1000,
+                                power=5, mcc=self.mcc)
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync_without_token(self):
+        data = self.sync()
+        self.assertEqual([s['slug'] for s in data['substations']], ['rp-1'])
+        self.assertEqual([m['slug'] for m in data['mccs']], ['mcc-1'])
+        self.assertEqual([n['slug'] for n in data['nodes']], ['1_0', '1_1', '1_2'])
+        self.assertFalse(data['more'])
+
+    def test_only_changes_since_token(self):
+        token = self.sync()['token']
+        self.assertEqual(self.sync(token)['nodes'], [])
+
+        node = Node.objects.get(slug='1_1')
+        node.power = 7.5
+        node.save()
+        deleted = Node.objects.get(slug='1_2')
+        deleted_pk = deleted.pk
+        deleted.delete()
+
+        data = self.sync(token)
+        self.assertEqual([(n['slug'], n['power']) for n in data['nodes']], [('1_1', '7.5')])
+        self.assertEqual(data['deleted']['nodes'], [deleted_pk])
+        self.assertEqual(data['substations'], [])
+        self.assertEqual(self.sync(data['token'])['nodes'], [])
+
+    def test_resume_in_pages(self):
+        """A sync split by `limit` sees every object exactly once"""
+        seen, token, more = [], 0, True
+        while more:
+            data = self.sync(token, limit=2)
+            seen += [n['slug'] for n in data['nodes']] + [m['slug'] for m in data['mccs']]
+            token, more = data['token'], data['more']
+        self.assertEqual(sorted(seen), ['1_0', '1_1', '1_2', 'mcc-1'])
+
+    def test_log_keeps_one_row_per_object(self):
+        node = Node.objects.get(slug='1_0')
+        for power in (1, 2, 3):
+            node.power = power
+            node.save()
+        self.assertEqual(Change.objects.filter(kind=Change.NODE, object_id=node.pk).count(), 1)
+
+    def test_mcc_rename_resends_its_nodes(self):
+        token = self.sync()['token']
+        self.mcc.title = 'MCC-2'
+        self.mcc.save()
+        data = self.sync(token)
+        self.assertEqual([m['slug'] for m in data['mccs']], ['mcc-2'])
+        self.assertEqual({n['mcc'] for n in data['nodes']}, {'mcc-2'})
+
+    def test_constant_queries(self):
+        # the session, the user and five for the feed
+        with self.assertNumQueries(7):
+            self.sync()
+
+    def test_invalid_token(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'abc'}).status_code, 400)
+
+    def test_invalid_limit(self):
+        for limit in ('x', '0'):
+            with self.subTest(limit=limit):
+                response = self.client.get(self.url, {'limit': limit})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()), ['limit'])
+
+    def test_import_nodes_is_recorded(self):
+        token = self.sync()['token']
+        with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False) as f:
+            f.write(json.dumps({'title': 'New', 'slug': '1_9', 'level': '4.8', 'round_per_minute': 0,
+                                'power': 1, 'mcc': 'mcc-1'}) + '\n')
+        self.addCleanup(os.remove, f.name)
+        call_command('import_nodes', f.name, stdout=StringIO())
+        self.assertEqual([n['slug'] for n in self.sync(token)['nodes']], ['1_9'])
@@ -1,6 +1,7 @@
 from django.test import TestCase, RequestFactory
 from django.template import Context, Template
 from django.contrib.auth.models import User
+from locator import hierarchy
 from locator.models import DistributiveSubstation as DS
 from locator.templatetags.locator_tags import show_substations
 
@@ -8,6 +9,7 @@ class TemplateTagsTestCase(TestCase):
     @classmethod
     def setUpTestData(cls):
         """Create some test data"""
+        hierarchy.invalidate()
         DS.objects.create(title='Substation 1', slug='substation-1')
         DS.objects.create(title='Substation 2', slug='substation-2')
 
@@ -17,7 +19,7 @@ class TemplateTagsTestCase(TestCase):
 
         self.assertIsInstance(rendered, dict)
         self.assertIn('rooms', rendered)
-        self.assertEqual(list(rendered['rooms']), list(DS.objects.all()))
+        self.assertEqual(list(rendered['rooms']), list(DS.objects.order_by('pk')))
 
     def test_template_rendering(self):
         """Test if the rendered template contains the expected content"""
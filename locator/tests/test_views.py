@@ -4,7 +4,7 @@ from django.db.models.query import QuerySet
 from django.contrib.auth.models import User, Permission
 
 import json
-from locator import views
+from locator import hierarchy, views
 from locator import forms
 from locator.models import (DistributiveSubstation as DS, 
                             MotorControlCenter as MCC, 
@@ -15,12 +15,13 @@ class HomeViewTestCase(TestCase):
 
     def setUp(self):
         """Create test data"""
-        client = Client()
-        self.response = client.get('/')
-
+        hierarchy.invalidate()
         DS.objects.create(title='РП-1', slug='rp-1',level = '4.8')
         DS.objects.create(title='РП-2', slug='rp-2',level = '4.8')
 
+        client = Client()
+        self.response = client.get('/')
+
     def test_view_url_exists_at_desired_location(self):
         """Test that the URL mapping is correct"""
         self.assertEqual(self.response.status_code, 200)
@@ -33,21 +34,21 @@ class HomeViewTestCase(TestCase):
         """Test that the view passes the correct context data to the template"""
         self.assertIn('substations', self.response.context)
         substations = self.response.context['substations']
-        self.assertIsInstance(substations, QuerySet)
-        self.assertEqual(substations.count(), 2) 
+        self.assertEqual(list(substations), list(DS.objects.order_by('pk')))
 
     def test_get_queryset(self):
-        """Test that the view fetches the correct queryset"""
+        """Test that the view serves the substations from the hierarchy cache"""
         view = views.HomeView()
-        queryset = view.get_queryset()
-        self.assertIsInstance(queryset, QuerySet)
-        self.assertEqual(queryset.count(), 2)  
+        with self.assertNumQueries(0):
+            substations = view.get_queryset()
+        self.assertEqual(len(substations), 2)
 
 
 class SubstationViewTestCase(TestCase):
 
     def setUp(self):
         """Create test data"""
+        hierarchy.invalidate()
         substation =  DS.objects.create(
             title = 'РП-1',
             slug = 'rp-1',
@@ -71,16 +72,18 @@ class SubstationViewTestCase(TestCase):
         """Test that the view passes the correct context data to the template"""
         self.assertIn('rooms', self.response.context)
         rooms = self.response.context['rooms']
-        self.assertIsInstance(rooms, QuerySet)
-        self.assertEqual(rooms.count(), 2)  
+        self.assertEqual(rooms, [self.mcc1, self.mcc2])
 
     def test_get_queryset(self):
-        """Test that the view fetches the correct queryset based on the provided sub_num"""
+        """Test that the view fetches the MCCs of the provided sub_num"""
         view = views.SubstationView()
         view.kwargs = {'sub_num': 1} 
         queryset = view.get_queryset()
-        self.assertIsInstance(queryset, QuerySet)
-        self.assertEqual(queryset.count(), 2) 
+        self.assertEqual(len(queryset), 2)
+
+    def test_unknown_substation(self):
+        response = Client().get('/substation/99/')
+        self.assertEqual(response.status_code, 404)
 
     # def test_get_context_data(self):
     #     """Test that the view sets the correct title in the context data"""
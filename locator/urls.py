@@ -1,11 +1,18 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import include, path, re_path
+
+from . import async_urls
+from .api import router
 from .views import (HomeView, 
                     SubstationView, 
                     MCCView, 
                     NodeView, 
+                    LevelView,
                     AddNodeView, 
                     UpdateNodeView, 
                     SearchNodeView, 
+                    autocomplete_node,
+                    download_profile,
                     NodeDeleteView,
                     NodeDeleteConfirmView,
                     LoginUserView, 
@@ -16,11 +23,18 @@ urlpatterns = [
     path('substation/<int:sub_num>/', SubstationView.as_view(), name='substation'),
     path('mcc/<slug:mcc_slug>/', MCCView.as_view(), name='mcc'),
     path('node/<slug:slug>/', NodeView.as_view(), name='node-detail'),
+    path('level/<str:level>/', LevelView.as_view(), name='level'),
     path('add_node/', AddNodeView.as_view(), name='add_node'),
     path('edit/<slug:slug>/', UpdateNodeView.as_view(), name='edit_node'),
     path('search/', SearchNodeView.as_view(), name='search_node'),
+    path('search/autocomplete/', autocomplete_node, name='autocomplete_node'),
     path('node/<slug:slug>/delete/', NodeDeleteView.as_view(), name='node_delete'),
     path('node_delete_confirm/', NodeDeleteConfirmView.as_view(), name='node_delete_confirm'),
+    path('profiles/<str:profile_id>/<str:kind>/', download_profile, name='profile_download'),
     path('login/', LoginUserView.as_view(), name='login'),
     path('logout/', logout_user, name='logout_user'),
+    re_path(r'^api/(?P<version>v1)/', include(router.urls)),
 ]
+
+if getattr(settings, 'LOCATOR_ASYNC_VIEWS', False):
+    urlpatterns = async_urls.urlpatterns + urlpatterns
@@ -1,5 +1,11 @@
+import threading
+from contextlib import contextmanager
 from typing import Any, Dict
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
 DS_CHOICES = [ 
         ('РП-4', 'Substation-4'),
         ('РП-5', 'Substation-5'),
@@ -42,3 +48,53 @@ class DataMixin:
     def __init__(self) -> None:
         if self.title_page:
             self.extra_context['title'] = self.title_page
+
+
+class SharedVersion:
+    """Version counter in the LOCATOR_SHARED_CACHE cache.
+
+    Process-level caches compare it on read so that an invalidation made in one
+    worker reaches the others. Without a shared cache it is always None.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+
+    def _cache(self):
+        alias = getattr(settings, 'LOCATOR_SHARED_CACHE', None)
+        return caches[alias] if alias else None
+
+    def get(self):
+        cache = self._cache()
+        if cache is None:
+            return None
+        version = cache.get(self.key)
+        if version is None:
+            cache.add(self.key, 1, timeout=None)
+            version = cache.get(self.key)
+        return version
+
+    def bump(self):
+        cache = self._cache()
+        if cache is None:
+            return None
+        try:
+            return cache.incr(self.key)
+        except ValueError:
+            cache.add(self.key, 1, timeout=None)
+            return cache.get(self.key)
+
+
+@contextmanager
+def closing_thread_connections():
+    """Close the database connections a worker thread opened once its work is done.
+
+    Each thread gets its own connections, which would otherwise stay open after
+    the thread is gone. The main thread keeps its own (tests run inside its
+    transaction).
+    """
+    try:
+        yield
+    finally:
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
@@ -1,78 +1,164 @@
+import mimetypes
+import os
+import re
 from typing import Any, Dict
-from django.db.models.base import Model as Model
 from django.db.models.query import QuerySet
-from django.http import HttpResponse, JsonResponse, HttpResponseNotFound
-from django.urls import reverse_lazy
-from django.shortcuts import render, get_object_or_404, redirect
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponseNotModified, JsonResponse
+from django.urls import reverse, reverse_lazy
+from django.shortcuts import get_object_or_404, redirect
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, TemplateView
 from django.views.generic.edit import DeleteView
+from django.views.static import was_modified_since
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
 
-from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.contrib.auth import login, logout
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import permission_required
+from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.contrib.auth import logout
 from django.contrib.auth.views import LoginView
 
+from . import hierarchy, levels, media, profiling, search
+from .caching import ConditionalPageMixin
+from .routers import replica_reads
 from .utils import DataMixin
-from .forms import NodeForm, LoginUserForm
+from .forms import NodeForm, LoginUserForm, BatchSearchForm
 from .filters import NodeFilter
-from .models import (DistributiveSubstation as DS,
-                     MotorControlCenter as MCC, 
-                     Node)
+from .models import MotorControlCenter as MCC, Node
 
 
-class HomeView(DataMixin, ListView):
+class HomeView(ConditionalPageMixin, DataMixin, ListView):
     template_name = 'locator/base.html'
+    read_replica = True
     context_object_name = 'substations'
     title_page = 'Гoлoвна'
 
-    def get_queryset(self) -> QuerySet[Any]:
-        return DS.objects.all()
+    def get_data_version(self):
+        substations = hierarchy.substations()
+        return 'home', max((substation.updated_at for substation in substations), default=None)
+
+    def get_queryset(self):
+        return hierarchy.substations()
     
 
-class SubstationView(DataMixin, ListView):
+class SubstationView(ConditionalPageMixin, DataMixin, ListView):
     template_name = 'locator/mcc.html'
+    read_replica = True
     context_object_name = 'rooms'
 
+    def get_data_version(self):
+        substation = hierarchy.substation(self.kwargs['sub_num'])
+        if substation is None:
+            return None
+        mccs = substation.motor_centers.all()
+        last_modified = max([substation.updated_at, *(mcc.updated_at for mcc in mccs)])
+        return f'{substation.title}:{hierarchy.substation_version(substation)}', last_modified
+
     def get_queryset(self):
-        return MCC.objects.filter(substation__id=self.kwargs['sub_num'])
+        self.substation = hierarchy.substation(self.kwargs['sub_num'])
+        if self.substation is None:
+            raise Http404('Substation not found')
+        return list(self.substation.motor_centers.all())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        substation = DS.objects.get(id=self.kwargs['sub_num'])
-        context['title'] = substation.title
+        context['title'] = self.substation.title
+        context['substation'] = self.substation
+        context['substation_version'] = hierarchy.substation_version(self.substation)
+        context['summary'] = self.substation.summary
         return context
 
 
-class MCCView(DataMixin, ListView):
+class MCCView(ConditionalPageMixin, DataMixin, ListView):
     template_name = 'locator/nodes.html'
+    read_replica = True
     context_object_name = 'nodes'
+    mcc = None
+
+    def get_data_version(self):
+        self.mcc = self.version_queryset().first()
+        return self.loaded_version()
+
+    def version_queryset(self):
+        return MCC.objects.filter(slug=self.kwargs['mcc_slug'])
+
+    def loaded_version(self):
+        # MotorControlCenter.updated_at moves with every change to its nodes.
+        if self.mcc is None:
+            return None
+        return f'{self.mcc.pk}:{self.mcc.updated_at.isoformat()}', self.mcc.updated_at
 
     def get_queryset(self) -> QuerySet[Any]:
-        # mcc__slug=self.kwargs['mcc_slug']
-        return Node.objects.filter(mcc__slug=self.kwargs['mcc_slug'])
+        if self.mcc is None:
+            self.mcc = get_object_or_404(MCC, slug=self.kwargs['mcc_slug'])
+        return Node.objects.filter(mcc=self.mcc)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        mcc = MCC.objects.get(slug=self.kwargs['mcc_slug'])
-        context['title'] = f'{mcc.title}(PП-{mcc.substation_id + 3})'
+        context['title'] = f'{self.mcc.title}(PП-{self.mcc.substation_id + 3})'
+        context['mcc'] = self.mcc
+        context['summary'] = getattr(hierarchy.motor_center(self.mcc.pk), 'summary', None)
         return context
     
 
-class NodeView(DetailView):
+class NodeView(ConditionalPageMixin, DetailView):
     template_name = 'locator/node.html'
+    read_replica = True
     context_object_name = 'node'
     slug_url_kwarg = 'slug'
+    node = None
+
+    def get_data_version(self):
+        self.node = self.version_queryset().first()
+        return self.loaded_version()
+
+    def version_queryset(self):
+        return Node.objects.select_related('mcc').filter(slug=self.kwargs[self.slug_url_kwarg])
+
+    def loaded_version(self):
+        if self.node is None:
+            return None
+        version = f'{self.node.pk}:{self.node.updated_at.isoformat()}:{self.node.mcc.title}'
+        return version, max(self.node.updated_at, self.node.mcc.updated_at)
 
     def get_object(self):
-        return get_object_or_404(Node, slug=self.kwargs[self.slug_url_kwarg])
+        if self.node is not None:
+            return self.node
+        return get_object_or_404(Node.objects.select_related('mcc'), slug=self.kwargs[self.slug_url_kwarg])
     
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        node = Node.objects.get(slug=self.kwargs['slug'])
-        context['title'] = f'{node.title}_{node.slug}'
+        context['title'] = f'{self.object.title}_{self.object.slug}'
         return context
     
 
+class LevelView(DataMixin, ListView):
+    template_name = 'locator/level.html'
+    read_replica = True
+    context_object_name = 'nodes'
+    paginate_by = levels.PAGE_SIZE
+
+    def get_queryset(self):
+        self.summary = levels.summary(self.kwargs['level'])
+        if not levels.is_known(self.kwargs['level'], self.summary):
+            raise Http404('Level not found')
+        return levels.nodes_on(self.kwargs['level'])
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return levels.LevelPaginator(queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+                                     node_count=self.summary.node_count if self.summary else None, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['title'] = f"Відмітка {self.kwargs['level']}"
+        context['level'] = self.kwargs['level']
+        context['groups'] = search.group_nodes(context['nodes'])
+        context['summary'] = self.summary
+        return context
+
+
 class AddNodeView(PermissionRequiredMixin, DataMixin, CreateView):
     model = Node
     form_class = NodeForm 
@@ -94,8 +180,9 @@ class UpdateNodeView(PermissionRequiredMixin, DataMixin, UpdateView):
 
 
 class SearchNodeView(PermissionRequiredMixin, DataMixin, ListView):
-    queryset = Node.objects.all()
+    queryset = Node.objects.select_related('mcc', 'substation')
     template_name = 'locator/search_node.html'
+    read_replica = True
     context_object_name = 'node'
     title_page = 'Сторінка пошуку'
     permission_required = 'locator.view_node'
@@ -103,14 +190,107 @@ class SearchNodeView(PermissionRequiredMixin, DataMixin, ListView):
     def get_queryset(self) -> QuerySet[Any]:
         queryset = super().get_queryset()
         self.filterset = NodeFilter(self.request.GET, queryset=queryset)
+        if self.is_batch():
+            return self.filterset.qs.none()
         return self.filterset.qs
+
+    def is_batch(self) -> bool:
+        return self.request.method == 'POST' or 'slugs' in self.request.GET
     
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context['form'] = self.filterset.form
+        context['batch_form'] = self.batch_form = self.get_batch_form()
+        if self.batch_form.is_bound and self.batch_form.is_valid() and self.batch_form.cleaned_data['slug_list']:
+            context['batch'] = search.lookup_batch(self.batch_form.cleaned_data['slug_list'])
         return context
+
+    def get_batch_form(self):
+        if self.request.method == 'POST':
+            return BatchSearchForm(self.request.POST, self.request.FILES)
+        if self.is_batch():
+            return BatchSearchForm(self.request.GET)
+        return BatchSearchForm()
+
+    def post(self, request, *args, **kwargs):
+        # Pasted lists and uploaded files are too long for a query string.
+        return self.get(request, *args, **kwargs)
     
 
+@replica_reads
+@permission_required('locator.view_node', raise_exception=True)
+def autocomplete_node(request):
+    return JsonResponse(autocomplete_results(request.GET))
+
+
+def autocomplete_results(params) -> dict:
+    try:
+        limit = min(int(params.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+    matches = search.index.search(params.get('q', ''), limit=limit)
+    return {'results': [
+        {'slug': match.entry.slug,
+         'title': match.entry.title,
+         'score': match.score,
+         'url': reverse('node-detail', args=(match.entry.slug,))}
+        for match in matches
+    ]}
+
+
+@staff_member_required
+def download_profile(request, profile_id, kind):
+    path = profiling.file_path(profile_id, kind)
+    if path is None:
+        raise Http404('No such profile')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
+
+
+def serve_media(request, path):
+    """Uploaded photos for signed-in users, with ranges and long caching; see locator.media."""
+    media.check_access(request.user)
+    fullpath = media.locate(path)
+    try:
+        info = os.stat(fullpath)
+    except OSError:
+        raise Http404('No such file')
+    media.check_file(info)
+    return media.response(request, path, fullpath, info, media.read_chunks)
+
+
+# name.0123456789ab.css, as written by ManifestStaticFilesStorage
+FINGERPRINTED_RE = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+
+def serve_static(request, path):
+    """collectstatic output with DEBUG off, precompressed and cached; see locator.storage."""
+    fullpath = media.locate(path, settings.STATIC_ROOT)
+    try:
+        info = os.stat(fullpath)
+    except OSError:
+        raise Http404('No such file')
+    media.check_file(info)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), info.st_mtime):
+        response = HttpResponseNotModified()
+    else:
+        content_type, _ = mimetypes.guess_type(fullpath)
+        accepted = request.headers.get('Accept-Encoding', '')
+        for encoding, ext in (('br', '.br'), ('gzip', '.gz')):
+            if re.search(rf'\b{encoding}\b', accepted) and os.path.isfile(fullpath + ext):
+                response = FileResponse(open(fullpath + ext, 'rb'), content_type=content_type)
+                response['Content-Encoding'] = encoding
+                break
+        else:
+            response = FileResponse(open(fullpath, 'rb'), content_type=content_type)
+    response['Last-Modified'] = http_date(info.st_mtime)
+    if FINGERPRINTED_RE.search(path):
+        response['Cache-Control'] = f"public, max-age={getattr(settings, 'LOCATOR_STATIC_MAX_AGE', 60 * 60 * 24 * 365)}, immutable"
+    else:
+        response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
 class NodeDeleteView(DeleteView):
     model = Node
     template_name = 'locator/delete_node.html'